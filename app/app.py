@@ -3,16 +3,23 @@
 import os, sys
 sys.path.append(os.path.dirname(__file__))
 
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+import json
+import threading
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 import pymysql
 from pymysql.cursors import DictCursor
-from db_conn import get_db
+try:
+    from app.db_conn import get_db, havuz_istatistik
+    import app.sweax_metrik as sweax_metrik
+except Exception:
+    from db_conn import get_db, havuz_istatistik
+    import sweax_metrik
 try:
 
-    from app.sweax_ai import mesajlari_getir
+    from app.sweax_ai import mesaj_sayfasi, veritabani_olustur
 except Exception:
-    from sweax_ai import mesajlari_getir
+    from sweax_ai import mesaj_sayfasi, veritabani_olustur
 
 try:
 
@@ -31,14 +38,33 @@ except Exception:
 # Yapay zekâ çekirdeği (senin mevcut fonksiyonun aynen kalıyor)
 try:
     # Render'da paketli klasörle çalışma
-    from app.sweax_ai import konus
+    from app.sweax_ai import konus, konus_akis, MesgulHatasi
 except ModuleNotFoundError:
     # Lokal geliştirme
-    from sweax_ai import konus
+    from sweax_ai import konus, konus_akis, MesgulHatasi
+
+try:
+    from app.sweaxrag import model_on_yukle
+    from app.sweax_model import YERLESIM
+except Exception:
+    from sweaxrag import model_on_yukle
+    from sweax_model import YERLESIM
 
 app = Flask(__name__)
 app.secret_key = "313131"  # dilersen ENV'den al
 
+# Embedding modeli / gömme servisi ve bilgi indeksi açılışta arka planda ısıtılır
+if os.environ.get("SWEAX_PRELOAD", "1") == "1":
+    threading.Thread(target=model_on_yukle, name="sweax-isinma", daemon=True).start()
+
+# Ollama sohbet modeli(leri) açılışta belleğe alınır; keep_alive ile orada kalır
+if os.environ.get("SWEAX_OLLAMA_WARMUP", "1") == "1":
+    threading.Thread(target=YERLESIM.on_yukle, name="sweax-ollama-isinma", daemon=True).start()
+
+# Bağlantı testi + eksik indeks taşıması (messages (conversation_id, id)) arka planda
+if os.environ.get("SWEAX_DB_MIGRATE", "1") == "1":
+    threading.Thread(target=veritabani_olustur, name="sweax-tasima", daemon=True).start()
+
 # ------------------------------
 # Veritabanı bağlantı yardımcıları
 
@@ -117,6 +143,17 @@ def api_chat():
         print("⚠️ Yapay zekâ çağrısında hata:", e)
         return jsonify({"error": str(e)}), 500
 
+@app.get("/api/metrikler")
+def api_metrikler():
+    """
+    Admin için performans metrikleri (DB havuzu vb.). Değerler bu isteği karşılayan worker'a aittir
+    (havuz, LLM eşzamanlılığı, önbellekler süreç başına; N worker'da toplam kapasite N katıdır).
+    """
+    if "admin" not in session:
+        return jsonify({"error": "Yetkisiz erişim"}), 403
+    return jsonify({"worker": {"pid": os.getpid(), "not": "sınırlar ve sayaçlar worker başınadır"},
+                    "db_havuz": havuz_istatistik(), **sweax_metrik.ozet()})
+
 @app.route("/admincikis")
 def admincikis():
     session.pop("admin", None)
@@ -183,6 +220,12 @@ def sweax_ai():
         return redirect(url_for("giris"))
     return render_template("sweax_ai.html", kullanici=session["user"])
 
+def _mesgul_yaniti(e: MesgulHatasi):
+    """Model kuyruğu dolu: hemen 429 + Retry-After (istemci bekletilmez)."""
+    yanit = jsonify({"error": str(e), "mesgul": True})
+    yanit.headers["Retry-After"] = str(max(1, round(e.bekleme)))
+    return yanit, 429
+
 # 📨 Mesaj gönderme (AJAX)
 @app.route("/api/ai_mesaj", methods=["POST"])
 def api_ai_mesaj():
@@ -198,17 +241,76 @@ def api_ai_mesaj():
         # 🧠 Kullanıcı kimliğini de fonksiyona gönderiyoruz
         cevap = konus(metin, kullanici_id=session["user_id"])
         return jsonify({"cevap": cevap})
+    except MesgulHatasi as e:
+        return _mesgul_yaniti(e)
     except Exception as e:
         print("⚠️ Yapay zekâ hata:", e)
         return jsonify({"error": str(e)}), 500
 
+# 📡 Akışlı mesaj (NDJSON): {"parca": "..."} satırları, en sonda {"cevap": "..."}
+@app.route("/api/ai_mesaj/akis", methods=["POST"])
+def api_ai_mesaj_akis():
+    if "user_id" not in session:
+        return jsonify({"error": "Giriş yapılmamış"}), 403
+
+    data = request.get_json()
+    metin = data.get("mesaj", "").strip()
+    if not metin:
+        return jsonify({"error": "Boş mesaj gönderilemez"}), 400
+    kullanici_id = session["user_id"]
+
+    # İlk olay (ilk token ya da hazır cevap) gelmeden yanıt başlatılmaz:
+    # kabul kontrolü reddederse akış yerine düz 429 döner.
+    olaylar = konus_akis(metin, kullanici_id=kullanici_id)
+    try:
+        ilk = next(olaylar, None)
+    except MesgulHatasi as e:
+        return _mesgul_yaniti(e)
+    except Exception as e:
+        print("⚠️ Yapay zekâ akış hatası:", e)
+        return jsonify({"error": str(e)}), 500
+
+    def satir(tur, icerik):
+        anahtar = "parca" if tur == "parca" else "cevap"
+        return json.dumps({anahtar: icerik}, ensure_ascii=False) + "\n"
+
+    def uret():
+        try:
+            if ilk is not None:
+                yield satir(*ilk)
+            for tur, icerik in olaylar:
+                yield satir(tur, icerik)
+        except Exception as e:
+            print("⚠️ Yapay zekâ akış hatası:", e)
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        finally:
+            olaylar.close()  # istemci koptuysa LLM slotu hemen bırakılır
+
+    return Response(
+        stream_with_context(uret()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.route("/api/sohbet/<int:sohbet_id>")
 def api_sohbet_detay(sohbet_id):
+    """
+    Sohbet geçmişi, keyset sayfalı: ?limit=50 (en fazla 200), ?once=<mesaj id> daha eski sayfa,
+    ?sonra=<mesaj id> daha yeni mesajlar. Gövde eskiden yeniye mesaj listesi;
+    X-Daha-Var başlığı istenen yönde başka sayfa olup olmadığını söyler.
+    """
     if "user_id" not in session:
         return jsonify([])
 
-    mesajlar = mesajlari_getir(sohbet_id, limit=50)
-    return jsonify(mesajlar)
+    limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+    mesajlar, devami = mesaj_sayfasi(
+        sohbet_id, limit=limit,
+        once=request.args.get("once", type=int),
+        sonra=request.args.get("sonra", type=int),
+    )
+    yanit = jsonify(mesajlar)
+    yanit.headers["X-Daha-Var"] = "1" if devami else "0"
+    return yanit
 
 # 🧱 Sohbet listesini getir
 @app.route("/api/sohbetler")
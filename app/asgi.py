@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# asgi.py — ASGI girişi: /api/ai_mesaj ve /api/ai_mesaj/akis doğrudan async (sweax_async),
+# geri kalan her şey Flask'a (istek başına thread, SWEAX_ASGI_WSGI_THREADS ile sınırlı).
+# Çalıştırma: gunicorn -k uvicorn.workers.UvicornWorker app.asgi:asgi_app
+# Böylece süren bir sohbet bir worker'ı kilitlemez; tek worker aynı anda çok sohbet taşır.
+import os
+import json
+import asyncio
+from http.cookies import SimpleCookie
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+
+try:
+    from app.app import app as flask_app
+    from app.sweax_async import konus_async, konus_akis_async, istemci_kapat
+    from app.sweax_zamanlayici import MesgulHatasi
+except ModuleNotFoundError:
+    from app import app as flask_app
+    from sweax_async import konus_async, konus_akis_async, istemci_kapat
+    from sweax_zamanlayici import MesgulHatasi
+
+ASGI_WSGI_THREAD = int(os.environ.get("SWEAX_ASGI_WSGI_THREADS", "16"))  # aynı anda çalışan Flask isteği
+
+_wsgi = WsgiToAsgi(flask_app)
+_wsgi_sinir = asyncio.Semaphore(ASGI_WSGI_THREAD)
+
+
+async def _flask(scope, receive, send):
+    # WsgiToAsgi uygulamayı thread_sensitive çalıştırır: bağlam yoksa worker'daki tüm Flask
+    # istekleri tek thread'de sırayla işlenir. İstek başına ThreadSensitiveContext her isteğe
+    # kendi thread'ini verir; aynı anda en fazla ASGI_WSGI_THREAD istek çalışır.
+    async with _wsgi_sinir, ThreadSensitiveContext():
+        await _wsgi(scope, receive, send)
+
+
+def _oturum_oku(scope) -> dict:
+    """Flask'ın imzalı session çerezini çözer (aynı secret_key ile)."""
+    cerez_basligi = b""
+    for ad, deger in scope.get("headers", []):
+        if ad == b"cookie":
+            cerez_basligi = deger
+            break
+    cerezler = SimpleCookie()
+    cerezler.load(cerez_basligi.decode("latin-1"))
+    morsel = cerezler.get(flask_app.config["SESSION_COOKIE_NAME"])
+    if not morsel:
+        return {}
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        return serializer.loads(morsel.value, max_age=max_age)
+    except Exception:
+        return {}
+
+
+async def _govde_oku(receive) -> bytes:
+    govde = b""
+    while True:
+        mesaj = await receive()
+        govde += mesaj.get("body", b"")
+        if not mesaj.get("more_body"):
+            return govde
+
+
+async def _json_gonder(send, veri: dict, durum: int = 200, basliklar: list | None = None):
+    govde = json.dumps(veri, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": durum,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                    (b"content-length", str(len(govde)).encode())] + (basliklar or []),
+    })
+    await send({"type": "http.response.body", "body": govde})
+
+
+async def _mesgul_gonder(send, e: MesgulHatasi):
+    await _json_gonder(send, {"error": str(e), "mesgul": True}, 429,
+                       [(b"retry-after", str(max(1, round(e.bekleme))).encode())])
+
+
+async def _mesaj_al(scope, receive, send) -> tuple | None:
+    """Oturum + istek gövdesi: (kullanici_id, metin); geçersizse hata yanıtı gönderilir ve None."""
+    oturum = _oturum_oku(scope)
+    if "user_id" not in oturum:
+        await _json_gonder(send, {"error": "Giriş yapılmamış"}, 403)
+        return None
+    try:
+        data = json.loads(await _govde_oku(receive) or b"{}")
+    except ValueError:
+        data = {}
+    metin = (data.get("mesaj") or "").strip()
+    if not metin:
+        await _json_gonder(send, {"error": "Boş mesaj gönderilemez"}, 400)
+        return None
+    return oturum["user_id"], metin
+
+
+async def api_ai_mesaj(scope, receive, send):
+    """Flask'taki /api/ai_mesaj ile aynı sözleşme; yalnızca async."""
+    istek = await _mesaj_al(scope, receive, send)
+    if istek is None:
+        return
+    kullanici_id, metin = istek
+    try:
+        cevap = await konus_async(metin, kullanici_id=kullanici_id)
+        await _json_gonder(send, {"cevap": cevap})
+    except MesgulHatasi as e:
+        await _mesgul_gonder(send, e)
+    except Exception as e:
+        print("⚠️ Yapay zekâ hata:", e)
+        await _json_gonder(send, {"error": str(e)}, 500)
+
+
+def _satir(tur: str, icerik: str) -> bytes:
+    anahtar = "parca" if tur == "parca" else "cevap"
+    return (json.dumps({anahtar: icerik}, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def api_ai_mesaj_akis(scope, receive, send):
+    """Flask'taki /api/ai_mesaj/akis ile aynı NDJSON sözleşmesi: {"parca": ...} satırları, sonda {"cevap": ...}."""
+    istek = await _mesaj_al(scope, receive, send)
+    if istek is None:
+        return
+    kullanici_id, metin = istek
+
+    # İlk olay gelmeden yanıt başlatılmaz: kabul kontrolü reddederse akış yerine düz 429 döner.
+    olaylar = konus_akis_async(metin, kullanici_id=kullanici_id)
+    try:
+        olay = await anext(olaylar, None)
+    except MesgulHatasi as e:
+        return await _mesgul_gonder(send, e)
+    except Exception as e:
+        print("⚠️ Yapay zekâ akış hatası:", e)
+        return await _json_gonder(send, {"error": str(e)}, 500)
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no")],
+    })
+    hata = None
+    try:
+        while olay is not None:
+            await send({"type": "http.response.body", "body": _satir(*olay), "more_body": True})
+            olay = await anext(olaylar, None)
+    except Exception as e:
+        hata = e
+    finally:
+        await olaylar.aclose()  # istemci koptuysa LLM slotu hemen bırakılır
+    son = b""
+    if hata is not None:
+        print("⚠️ Yapay zekâ akış hatası:", hata)
+        son = (json.dumps({"error": str(hata)}, ensure_ascii=False) + "\n").encode("utf-8")
+    await send({"type": "http.response.body", "body": son})
+
+
+async def asgi_app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            mesaj = await receive()
+            if mesaj["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif mesaj["type"] == "lifespan.shutdown":
+                await istemci_kapat()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http" and scope["method"] == "POST":
+        if scope["path"] == "/api/ai_mesaj":
+            return await api_ai_mesaj(scope, receive, send)
+        if scope["path"] == "/api/ai_mesaj/akis":
+            return await api_ai_mesaj_akis(scope, receive, send)
+    return await _flask(scope, receive, send)
@@ -1,44 +1,260 @@
 # -*- coding: utf-8 -*-
 # db_conn.py — Railway MySQL bağlantısı (Otomatik lokal/uzak algılama)
+# Bağlantılar artık süreç başına tek bir havuzdan veriliyor; her get_db()
+# çağrısı yeni bir TCP + TLS + auth el sıkışması yapmıyor.
 import os
+import time
+import threading
+from collections import deque
+
 import pymysql
 from pymysql.cursors import DictCursor
 
-def get_db():
+# ---- Havuz ayarları (ENV ile değiştirilebilir) ----
+HAVUZ_BOYUT    = int(os.getenv("DB_POOL_SIZE", "5"))         # süreç başına en fazla bağlantı
+HAVUZ_MAX_YAS  = float(os.getenv("DB_POOL_MAX_AGE", "1800"))  # sn; eski bağlantılar yenilenir
+HAVUZ_BEKLEME  = float(os.getenv("DB_POOL_TIMEOUT", "10"))    # sn; boş bağlantı bekleme sınırı
+HAVUZ_PING_ESIK = float(os.getenv("DB_POOL_PING_AFTER", "5")) # sn; bu kadar boşta kalana ping at
+
+
+def _baglanti_ayarlari() -> dict:
     """
-    Railway MySQL veritabanına bağlanır.
+    Bağlantı parametrelerini döndürür.
     Ortam değişkenleri yoksa (örneğin localde) otomatik olarak fallback değerlere geçer.
     """
+    # Önce Render/Railway ortam değişkenlerini dene
+    host = os.getenv("DB_HOST")
+    port = int(os.getenv("DB_PORT", "3306"))
+    user = os.getenv("DB_USER")
+    password = os.getenv("DB_PASS")
+    dbname = os.getenv("DB_NAME")
+
+    # Eğer host tanımlı değilse → lokal test değerlerini kullan
+    if not host:
+        print("⚙️ Ortam değişkeni bulunamadı, lokal test ayarları kullanılacak.")
+        host = "trolley.proxy.rlwy.net"
+        port = 27988
+        user = "root"
+        password = "hTcqeooYFyYYOezICaMbkUvPEebvRXYb"
+        dbname = "railway"
+
+    return dict(host=host, port=port, user=user, password=password, database=dbname)
+
+
+def _yeni_baglanti(ayarlar: dict):
+    return pymysql.connect(
+        **ayarlar,
+        cursorclass=DictCursor,
+        autocommit=True,
+        charset="utf8mb4"
+    )
+
+
+class _HavuzBaglantisi:
+    """
+    Havuzdan alınan bağlantının ince sarmalayıcısı.
+    `with get_db() as conn` bloğundan çıkınca (veya close() çağrılınca)
+    bağlantı kapatılmaz, havuza geri bırakılır. Diğer her şey gerçek
+    pymysql bağlantısına yönlendirilir.
+    """
+
+    def __init__(self, havuz, conn, olusturma: float):
+        self._havuz = havuz
+        self._conn = conn
+        self._olusturma = olusturma
+
+    def __getattr__(self, ad):
+        if self._conn is None:
+            raise pymysql.err.InterfaceError("Bağlantı havuza geri bırakıldı.")
+        return getattr(self._conn, ad)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._birak(hatali=exc_type is not None)
+
+    def close(self):
+        self._birak()
+
+    def _birak(self, hatali: bool = False):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._havuz._geri_al(conn, self._olusturma, hatali)
+
+
+class BaglantiHavuzu:
+    """
+    Sınırlı, thread-safe MySQL bağlantı havuzu.
+    - Alırken sağlık kontrolü (bir süre boşta kaldıysa ping)
+    - Yaşa göre yenileme (max_yas)
+    - Boş bağlantı yoksa en fazla `bekleme` sn bekler, sonra hata verir
+    """
+
+    def __init__(self, ayarlar: dict, boyut: int = HAVUZ_BOYUT, max_yas: float = HAVUZ_MAX_YAS,
+                 bekleme: float = HAVUZ_BEKLEME, ping_esik: float = HAVUZ_PING_ESIK):
+        self.ayarlar = ayarlar
+        self.boyut = max(1, boyut)
+        self.max_yas = max_yas
+        self.bekleme = bekleme
+        self.ping_esik = ping_esik
+        self._kosul = threading.Condition()
+        self._bos = deque()          # (conn, olusturma, son_kullanim)
+        self._kullanimda = 0
+        self._acik = 0
+        # istatistikler
+        self._alim = 0
+        self._yeni = 0
+        self._yenilenen = 0
+        self._bozuk = 0
+        self._zaman_asimi = 0
+        self._toplam_bekleme = 0.0
+        self._max_bekleme = 0.0
+
+    # ---- dış API ----
+    def al(self) -> _HavuzBaglantisi:
+        baslangic = time.monotonic()
+        son_tarih = baslangic + self.bekleme
+        with self._kosul:
+            while True:
+                if self._bos:
+                    conn, olusturma, son_kullanim = self._bos.pop()  # LIFO: en sıcak bağlantı
+                    self._kullanimda += 1
+                    break
+                if self._acik < self.boyut:
+                    conn, olusturma, son_kullanim = None, 0.0, 0.0
+                    self._acik += 1
+                    self._kullanimda += 1
+                    break
+                kalan = son_tarih - time.monotonic()
+                if kalan <= 0:
+                    self._zaman_asimi += 1
+                    raise TimeoutError(f"DB havuzunda {self.bekleme:g} sn içinde boş bağlantı bulunamadı.")
+                self._kosul.wait(kalan)
+            bekleme = time.monotonic() - baslangic
+            self._alim += 1
+            self._toplam_bekleme += bekleme
+            self._max_bekleme = max(self._max_bekleme, bekleme)
+
+        try:
+            if conn is not None:
+                conn, olusturma = self._kontrol_et(conn, olusturma, son_kullanim)
+            if conn is None:
+                conn, olusturma = _yeni_baglanti(self.ayarlar), time.monotonic()
+                with self._kosul:
+                    self._yeni += 1
+        except Exception:
+            self._yer_ac()
+            raise
+        return _HavuzBaglantisi(self, conn, olusturma)
+
+    def istatistik(self) -> dict:
+        with self._kosul:
+            return {
+                "boyut": self.boyut,
+                "kullanimda": self._kullanimda,
+                "bosta": len(self._bos),
+                "acik": self._acik,
+                "alim": self._alim,
+                "yeni_baglanti": self._yeni,
+                "yenilenen": self._yenilenen,
+                "bozuk": self._bozuk,
+                "zaman_asimi": self._zaman_asimi,
+                "ort_bekleme_ms": round(1000 * self._toplam_bekleme / self._alim, 2) if self._alim else 0.0,
+                "max_bekleme_ms": round(1000 * self._max_bekleme, 2),
+            }
+
+    def kapat(self):
+        """Boştaki tüm bağlantıları kapatır (kullanımdakiler geri gelince kapanır)."""
+        with self._kosul:
+            bos, self._bos = list(self._bos), deque()
+            self._acik -= len(bos)
+            self.boyut = 0
+            self._kosul.notify_all()
+        for conn, _, _ in bos:
+            _sessiz_kapat(conn)
+
+    # ---- iç yardımcılar ----
+    def _kontrol_et(self, conn, olusturma: float, son_kullanim: float):
+        simdi = time.monotonic()
+        if self.max_yas and simdi - olusturma > self.max_yas:
+            _sessiz_kapat(conn)
+            with self._kosul:
+                self._yenilenen += 1
+            return None, 0.0
+        if simdi - son_kullanim > self.ping_esik:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                _sessiz_kapat(conn)
+                with self._kosul:
+                    self._bozuk += 1
+                return None, 0.0
+        return conn, olusturma
+
+    def _geri_al(self, conn, olusturma: float, hatali: bool):
+        if hatali:
+            try:
+                conn.rollback()
+            except Exception:
+                _sessiz_kapat(conn)
+                with self._kosul:
+                    self._bozuk += 1
+                self._yer_ac()
+                return
+        with self._kosul:
+            self._kullanimda -= 1
+            if conn.open and self._acik <= self.boyut:
+                self._bos.append((conn, olusturma, time.monotonic()))
+                self._kosul.notify()
+                return
+            self._acik -= 1
+            self._kosul.notify()
+        _sessiz_kapat(conn)
+
+    def _yer_ac(self):
+        with self._kosul:
+            self._kullanimda -= 1
+            self._acik -= 1
+            self._kosul.notify()
+
+
+def _sessiz_kapat(conn):
     try:
-        # Önce Render/Railway ortam değişkenlerini dene
-        host = os.getenv("DB_HOST")
-        port = int(os.getenv("DB_PORT", "3306"))
-        user = os.getenv("DB_USER")
-        password = os.getenv("DB_PASS")
-        dbname = os.getenv("DB_NAME")
-
-        # Eğer host tanımlı değilse → lokal test değerlerini kullan
-        if not host:
-            print("⚙️ Ortam değişkeni bulunamadı, lokal test ayarları kullanılacak.")
-            host = "trolley.proxy.rlwy.net"
-            port = 27988
-            user = "root"
-            password = "hTcqeooYFyYYOezICaMbkUvPEebvRXYb"
-            dbname = "railway"
-
-        # Bağlantıyı kur
-        conn = pymysql.connect(
-            host=host,
-            port=port,
-            user=user,
-            password=password,
-            database=dbname,
-            cursorclass=DictCursor,
-            autocommit=True,
-            charset="utf8mb4"
-        )
-        return conn
+        conn.close()
+    except Exception:
+        pass
 
+
+# ---- Süreç başına havuz (gunicorn fork sonrası yeniden kurulur) ----
+_havuz = None
+_havuz_pid = None
+_havuz_kilit = threading.Lock()
+
+def _havuz_al() -> BaglantiHavuzu:
+    global _havuz, _havuz_pid
+    pid = os.getpid()
+    if _havuz is None or _havuz_pid != pid:
+        with _havuz_kilit:
+            if _havuz is None or _havuz_pid != pid:
+                # Fork'tan miras kalan soketler ebeveynle paylaşılır; kapatmadan bırakıyoruz.
+                _havuz = BaglantiHavuzu(_baglanti_ayarlari())
+                _havuz_pid = pid
+    return _havuz
+
+
+def get_db():
+    """
+    Railway MySQL veritabanı bağlantısını havuzdan verir.
+    `with get_db() as conn` bloğu bitince bağlantı kapanmaz, havuza döner.
+    """
+    try:
+        return _havuz_al().al()
     except Exception as e:
         print(f"❌ Veritabanı bağlantı hatası: {e}")
         return None
+
+
+def havuz_istatistik() -> dict:
+    """Havuz boyutlandırması için anlık istatistikler (kullanımda, boşta, bekleme süreleri)."""
+    return _havuz_al().istatistik()
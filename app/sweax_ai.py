@@ -1,32 +1,54 @@
 # -*- coding: utf-8 -*-
 # sweaxai.py — Hafif RAM sürümü (Render 512 MB dostu)
-import re, requests, os
+import re, json, time, requests, os, queue, threading, atexit
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-import deepl
 
 # ============ YENİ: MySQL bağlantısı db_conn.py üzerinden ============
 try:
     from app.db_conn import get_db
+    from app.sweax_baglam import BAGLAM
 except ModuleNotFoundError:
     from db_conn import get_db
+    from sweax_baglam import BAGLAM
 # ====================================================================
+try:
+    import app.sweax_http as sweax_http
+    import app.sweax_ceviri as sweax_ceviri
+    from app.sweax_niyet import NiyetYonlendirici
+    from app.sweax_hesap import hesapla, HesapHatasi, SozdizimiHatasi
+    from app.sweax_pencere import pencere_olustur, token_say, kirp, PENCERE_MESAJ
+    from app.sweax_cevap import CevapOnbellegi, CEVAP_GUNCEL_TTL, gecmis_ozeti
+    from app.sweax_zamanlayici import LLM, MesgulHatasi, ONCELIK_SOHBET, ONCELIK_OZET
+    from app.sweax_model import YERLESIM, VARSAYILAN_MODEL, MATEMATIK_MODEL
+except ModuleNotFoundError:
+    import sweax_http
+    import sweax_ceviri
+    from sweax_niyet import NiyetYonlendirici
+    from sweax_hesap import hesapla, HesapHatasi, SozdizimiHatasi
+    from sweax_pencere import pencere_olustur, token_say, kirp, PENCERE_MESAJ
+    from sweax_cevap import CevapOnbellegi, CEVAP_GUNCEL_TTL, gecmis_ozeti
+    from sweax_zamanlayici import LLM, MesgulHatasi, ONCELIK_SOHBET, ONCELIK_OZET
+    from sweax_model import YERLESIM, VARSAYILAN_MODEL, MATEMATIK_MODEL
+
 try:
 
-    from app.sweaxrag import _guncel_sorgu_mu, web_fallback_ara , web_ara_genel
+    from app.sweaxrag import web_fallback_ara , web_ara_genel, web_kaynaklari, web_sonuc_bicimle
 except ModuleNotFoundError:
-    from sweaxrag import _guncel_sorgu_mu, web_fallback_ara ,web_ara_genel
+    from sweaxrag import web_fallback_ara ,web_ara_genel, web_kaynaklari, web_sonuc_bicimle
 
 try:
-    from app.sweaxrag import wiki_ozet, wiki_ozet_with_meta, rag_cevap_uret
+    from app.sweaxrag import wiki_ozet, wiki_ozet_with_meta, rag_cevap_uret, soru_guncel_mi, gomme_modeli_hazir
 except ModuleNotFoundError:
-    from sweaxrag import wiki_ozet, wiki_ozet_with_meta, rag_cevap_uret
+    from sweaxrag import wiki_ozet, wiki_ozet_with_meta, rag_cevap_uret, soru_guncel_mi, gomme_modeli_hazir
 
 # ====== VERİTABANI FONKSİYONLARI (Railway MySQL uyumlu) ======
+MESAJ_INDEKSI = "idx_messages_sohbet_id"
+
 def veritabani_olustur():
     """
     SQLite'taki gibi dosya oluşturma yerine MySQL tablolarını kontrol eder.
-    Tablolar zaten Render/Railway üzerinde oluşturulmuş olmalı.
+    Tablolar zaten Render/Railway üzerinde oluşturulmuş olmalı; eksik indeksler eklenir.
     """
     try:
         with get_db() as conn, conn.cursor() as cur:
@@ -34,21 +56,143 @@ def veritabani_olustur():
         print("✅ MySQL bağlantısı başarılı (veritabani_olustur testi).")
     except Exception as e:
         print(f"⚠️ Veritabanı bağlantısı başarısız: {e}")
+        return
+    mesaj_indeksi_olustur()
+
+def mesaj_indeksi_olustur():
+    """
+    Geçmiş sorguları (son N, önce/sonra id) için messages (conversation_id, id) indeksini garanti eder.
+    Aynı iki sütunla başlayan bir indeks zaten varsa dokunulmaz; birden çok worker aynı anda
+    çalıştırırsa "Duplicate key name" (1061) hatası yok sayılır.
+    """
+    try:
+        with get_db() as conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT index_name, seq_in_index, column_name
+                FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'messages'
+                ORDER BY index_name, seq_in_index
+            """)
+            indeksler = {}
+            for row in cur.fetchall():
+                row = {k.lower(): v for k, v in row.items()}
+                indeksler.setdefault(row["index_name"], []).append(row["column_name"].lower())
+            if any(sutunlar[:2] == ["conversation_id", "id"] for sutunlar in indeksler.values()):
+                return
+            cur.execute(f"CREATE INDEX {MESAJ_INDEKSI} ON messages (conversation_id, id)")
+            print(f"✅ messages tablosuna {MESAJ_INDEKSI} (conversation_id, id) indeksi eklendi.")
+    except Exception as e:
+        if getattr(e, "args", (None,))[0] == 1061:
+            return
+        print(f"⚠️ mesaj_indeksi_olustur hata: {e}")
+
+# ---- Toplu kayıt: kullanıcı + asistan mesajı tek INSERT, tek transaction ----
+YAZ_ARKADA = os.environ.get("SWEAX_WRITE_BEHIND", "0") == "1"  # 1: kayıtlar arka planda toplu yazılır
+YAZ_ARKADA_ARALIK = float(os.environ.get("SWEAX_WRITE_BEHIND_INTERVAL", "0.2"))  # sn
+YAZ_ARKADA_PAKET = int(os.environ.get("SWEAX_WRITE_BEHIND_BATCH", "50"))  # bir flush'taki en fazla tur
+YAZ_ARKADA_DENEME = int(os.environ.get("SWEAX_WRITE_BEHIND_RETRIES", "4"))  # paket başına en fazla deneme
+YAZ_ARKADA_GERI = float(os.environ.get("SWEAX_WRITE_BEHIND_BACKOFF", "0.5"))  # sn; her denemede iki katı
+
+_yazma_kuyrugu: "queue.Queue[tuple]" = queue.Queue()
+_yazici = None
+_yazici_kilit = threading.Lock()
+
+def _mesajlari_yaz(turlar: list[tuple]):
+    """
+    [(sohbet_id, kullanici_metni, asistan_metni), ...] listesini tek transaction'da yazar:
+    tek çok satırlı INSERT + conversations.updated_at güncellemesi. token_count da yazılır.
+    """
+    satirlar, parametreler = [], []
+    for sohbet_id, kullanici_metni, asistan_metni in turlar:
+        satirlar += ["(%s, %s, %s, %s)", "(%s, %s, %s, %s)"]
+        parametreler += [sohbet_id, "user", kullanici_metni, token_say(kullanici_metni),
+                         sohbet_id, "assistant", asistan_metni, token_say(asistan_metni)]
+    sohbetler = sorted({t[0] for t in turlar})
+
+    with get_db() as conn, conn.cursor() as cur:
+        conn.begin()
+        cur.execute(
+            "INSERT INTO messages (conversation_id, role, content, token_count) VALUES " + ", ".join(satirlar),
+            parametreler
+        )
+        cur.execute(
+            "UPDATE conversations SET updated_at = NOW() WHERE id IN (" + ", ".join(["%s"] * len(sohbetler)) + ")",
+            sohbetler
+        )
+        conn.commit()
+
+def _yazici_dongusu():
+    while True:
+        paket = [_yazma_kuyrugu.get()]
+        # Kısa bir pencere boyunca gelenleri aynı pakete topla
+        try:
+            while len(paket) < YAZ_ARKADA_PAKET:
+                paket.append(_yazma_kuyrugu.get(timeout=YAZ_ARKADA_ARALIK))
+        except queue.Empty:
+            pass
+        try:
+            _paketi_yaz(paket)
+        finally:
+            for _ in paket:
+                _yazma_kuyrugu.task_done()
 
-def mesaj_ekle(kullanici_id, rol: str, icerik: str, sohbet_id=None):
-    """Mesajı belirli bir kullanıcı ve sohbete kaydeder."""
+def _paketi_yaz(paket: list[tuple]):
+    """
+    Geçici hatalarda (MySQL kopması, havuz zaman aşımı) paketi artan beklemeyle yeniden dener;
+    sonraki paketler bu arada beklediği için sohbet içi sıra korunur. Hepsi başarısız olursa
+    turlar kaybolur: BAGLAM'da duran hâlleri silinir, bağlam bir sonraki okumada DB'den gelir.
+    """
+    for deneme in range(YAZ_ARKADA_DENEME):
+        try:
+            _mesajlari_yaz(paket)
+            return
+        except Exception as e:
+            hata = e
+            if deneme + 1 < YAZ_ARKADA_DENEME:
+                print(f"⚠️ Arka plan mesaj kaydı hata (deneme {deneme + 1}/{YAZ_ARKADA_DENEME}): {e}")
+                time.sleep(YAZ_ARKADA_GERI * 2 ** deneme)
+    print(f"⚠️ Arka plan mesaj kaydı başarısız ({len(paket)} tur kayboldu): {hata}")
+    for sohbet_id in {t[0] for t in paket}:
+        BAGLAM.sohbet_gecersiz(sohbet_id)
+
+def _yazici_baslat():
+    global _yazici
+    if _yazici is not None and _yazici.is_alive():
+        return
+    with _yazici_kilit:
+        if _yazici is None or not _yazici.is_alive():
+            _yazici = threading.Thread(target=_yazici_dongusu, name="sweax-yazici", daemon=True)
+            _yazici.start()
+
+def bekleyen_mesajlari_yaz():
+    """Kuyruktaki tüm mesajlar yazılana kadar bekler (kapanışta çağrılır)."""
+    if _yazici is not None and _yazici.is_alive():
+        _yazma_kuyrugu.join()
+
+atexit.register(bekleyen_mesajlari_yaz)
+
+def mesaj_cifti_ekle(kullanici_id, kullanici_metni: str, asistan_metni: str, sohbet_id=None):
+    """
+    Bir sohbet turunu (user + assistant) tek round-trip'te kaydeder.
+    SWEAX_WRITE_BEHIND=1 ise yazma kuyruğa atılır ve istek beklemeden döner.
+    """
     try:
         sohbet_id = sohbet_id or aktif_sohbet_id_al(kullanici_id)
         if not sohbet_id:
-            print("⚠️ sohbet_id alınamadı, mesaj kaydedilmedi.")
+            print("⚠️ sohbet_id alınamadı, mesajlar kaydedilmedi.")
             return
-        with get_db() as conn, conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO messages (conversation_id, role, content)
-                VALUES (%s, %s, %s)
-            """, (sohbet_id, rol, icerik))
+        if YAZ_ARKADA:
+            _yazici_baslat()
+            _yazma_kuyrugu.put((sohbet_id, kullanici_metni, asistan_metni))
+        else:
+            _mesajlari_yaz([(sohbet_id, kullanici_metni, asistan_metni)])
+        # Bir sonraki tur bağlamı (ve aktif sohbeti) DB'ye sormadan buradan alır
+        BAGLAM.mesajlar_eklendi(kullanici_id, sohbet_id, [
+            {"role": "user", "content": kullanici_metni, "token_count": token_say(kullanici_metni)},
+            {"role": "assistant", "content": asistan_metni, "token_count": token_say(asistan_metni)},
+        ])
     except Exception as e:
-        print(f"⚠️ mesaj_ekle hata: {e}")
+        print(f"⚠️ mesaj_cifti_ekle hata: {e}")
 
 def yeni_sohbet_olustur(kullanici_id):
     """Yeni sohbet oluşturur ve başlığı 'Sohbet X' olarak ayarlar."""
@@ -59,7 +203,9 @@ def yeni_sohbet_olustur(kullanici_id):
             toplam = cur.fetchone()["toplam"] + 1
             baslik = f"Sohbet {toplam}"
             cur.execute("INSERT INTO conversations (user_id, title) VALUES (%s, %s)", (kullanici_id, baslik))
-            return cur.lastrowid
+            sohbet_id = cur.lastrowid
+        BAGLAM.sohbet_acildi(kullanici_id, sohbet_id)
+        return sohbet_id
     except Exception as e:
         print(f"⚠️ yeni_sohbet_olustur hata: {e}")
         return None
@@ -81,7 +227,10 @@ def kullanici_sohbetlerini_getir(kullanici_id):
         return []
 
 def aktif_sohbet_id_al(kullanici_id):
-    """Kullanıcının aktif (arşivlenmemiş) son sohbetini döndürür."""
+    """Kullanıcının aktif (arşivlenmemiş) son sohbetini döndürür (önce bağlam önbelleği)."""
+    sohbet_id = BAGLAM.aktif_sohbet(kullanici_id)
+    if sohbet_id is not None:
+        return sohbet_id
     try:
         with get_db() as conn, conn.cursor() as cur:
             cur.execute("""
@@ -92,11 +241,14 @@ def aktif_sohbet_id_al(kullanici_id):
               """, (kullanici_id,))
             row = cur.fetchone()
             if row:
+                BAGLAM.aktif_ayarla(kullanici_id, row["id"])
                 return row["id"]
             # Yoksa yeni sohbet oluştur
             cur.execute("INSERT INTO conversations (user_id, title) VALUES (%s, %s)",
                         (kullanici_id, "Yeni Sohbet"))
-            return cur.lastrowid
+            sohbet_id = cur.lastrowid
+        BAGLAM.sohbet_acildi(kullanici_id, sohbet_id)
+        return sohbet_id
     except Exception as e:
         print(f"⚠️ aktif_sohbet_id_al hata: {e}")
         return None
@@ -105,54 +257,98 @@ def aktif_sohbet_id_al(kullanici_id):
 
 def mesajlari_getir(sohbet_id, limit: int = 5):
     """
-    Belirli bir sohbetin mesaj geçmişini (user + assistant) getirir.
+    Sohbetin SON `limit` mesajını (user + assistant) eskiden yeniye döndürür.
+    (conversation_id, id) indeksinde sondan okunur; sohbet uzadıkça maliyet değişmez.
     """
     try:
         with get_db() as conn, conn.cursor() as cur:
             cur.execute("""
-                SELECT role, content, created_at 
-                FROM messages 
-                WHERE conversation_id = %s 
-                ORDER BY id ASC 
+                SELECT id, role, content, token_count, created_at
+                FROM messages
+                WHERE conversation_id = %s
+                ORDER BY id DESC
                 LIMIT %s
             """, (sohbet_id, limit))
-            return cur.fetchall()
+            return cur.fetchall()[::-1]
     except Exception as e:
         print(f"⚠️ mesajlari_getir hata: {e}")
         return []
+
+def mesaj_sayfasi(sohbet_id, limit: int = 50, once: int | None = None, sonra: int | None = None) -> tuple[list[dict], bool]:
+    """
+    Keyset sayfalama: `once` verilirse o id'den eski, `sonra` verilirse o id'den yeni en fazla
+    `limit` mesaj; hiçbiri yoksa son `limit` mesaj. Mesajlar hep eskiden yeniye sıralı döner.
+    İkinci değer, istenen yönde (once/son → daha eski, sonra → daha yeni) başka mesaj olup olmadığı.
+    """
+    if sonra is not None:
+        kosul, sira, arg = "AND id > %s", "ASC", (sonra,)
+    elif once is not None:
+        kosul, sira, arg = "AND id < %s", "DESC", (once,)
+    else:
+        kosul, sira, arg = "", "DESC", ()
+    try:
+        with get_db() as conn, conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT id, role, content, token_count, created_at
+                FROM messages
+                WHERE conversation_id = %s {kosul}
+                ORDER BY id {sira}
+                LIMIT %s
+            """, (sohbet_id, *arg, limit + 1))
+            satirlar = cur.fetchall()
+    except Exception as e:
+        print(f"⚠️ mesaj_sayfasi hata: {e}")
+        return [], False
+    devami = len(satirlar) > limit
+    satirlar = satirlar[:limit]
+    return (satirlar if sira == "ASC" else satirlar[::-1]), devami
+
+def sohbet_baglami(sohbet_id, limit: int = 5) -> list[dict]:
+    """LLM bağlamı için son mesajlar; sıcak sohbette önbellekten, değilse DB'den doldurarak."""
+    mesajlar = BAGLAM.son_mesajlar(sohbet_id, limit)
+    if mesajlar is not None:
+        return mesajlar
+    if limit > BAGLAM.n:
+        return mesajlari_getir(sohbet_id, limit=limit)
+    mesajlar = mesajlari_getir(sohbet_id, limit=BAGLAM.n)
+    BAGLAM.mesajlari_doldur(sohbet_id, mesajlar)
+    return mesajlar[-limit:] if limit else []
 # ===============================================================
 
 OLLAMA = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/chat")
 SON_KONU = None
 
 # ===== Yardımcılar =====
-def _guvenli_ifade_mi(metin: str) -> bool:
-    return bool(re.fullmatch(r"[0-9\ \+\-\*\/\.\(\)]+", metin))
-
 def _hesapla(ifade: str) -> str:
     try:
-        return f"Sonuç: {eval(ifade)}"
-    except Exception:
+        return f"Sonuç: {hesapla(ifade)}"
+    except SozdizimiHatasi:
         return "Gardaş bu işlem yanlış yazılmış, bi daha bak hele."
+    except HesapHatasi as e:
+        return f"⚠️ {e}"
 
 def _simdi_ist():
     return datetime.now(ZoneInfo("Europe/Istanbul"))
 
-def tarih_saat_cevap(metin: str) -> str | None:
-    s = metin.lower(); now = _simdi_ist()
-    if "saat kaç" in s or "şu an saat" in s: return f"Şu an saat (İstanbul): {now:%H:%M}"
-    if "hangi yıldayız" in s or "yıl kaç" in s: return f"{now.year} yılındayız."
-    m = re.search(r"(\d+)\s*yıl\s*sonra", s)
-    if m: return f"{m.group(1)} yıl sonra: {now.year + int(m.group(1))}"
-    if "ayın kaçı" in s: return f"Bugün tarih: {now:%d.%m.%Y} (İstanbul)."
-    if "hangi aydayız" in s:
+def tarih_saat_cevap(metin: str, niyet=None) -> str | None:
+    niyet = niyet or NIYETLER.yonlendir(metin, sadece={"tarih"})
+    if niyet.ad != "tarih":
+        return None
+    tur = niyet.argumanlar["tur"]; now = _simdi_ist()
+    if tur == "saat": return f"Şu an saat (İstanbul): {now:%H:%M}"
+    if tur == "yil": return f"{now.year} yılındayız."
+    if tur == "yil_sonra":
+        yil = niyet.argumanlar["yil"]
+        return f"{yil} yıl sonra: {now.year + int(yil)}"
+    if tur == "ay_gunu": return f"Bugün tarih: {now:%d.%m.%Y} (İstanbul)."
+    if tur == "ay":
         ay = ["Ocak","Şubat","Mart","Nisan","Mayıs","Haziran","Temmuz","Ağustos","Eylül","Ekim","Kasım","Aralık"][now.month-1]
         return f"{ay} ayındayız."
-    if "günlerden ne" in s or "hangi gün" in s:
+    if tur == "gun":
         gun = ["Pazartesi","Salı","Çarşamba","Perşembe","Cuma","Cumartesi","Pazar"][now.weekday()]
         return f"Bugün {gun}."
-    if "yarın tarih" in s:  t = now + timedelta(days=1); return f"Yarın: {t:%d.%m.%Y}"
-    if "dün tarih" in s:    t = now - timedelta(days=1); return f"Dün: {t:%d.%m.%Y}"
+    if tur == "yarin":  t = now + timedelta(days=1); return f"Yarın: {t:%d.%m.%Y}"
+    if tur == "dun":    t = now - timedelta(days=1); return f"Dün: {t:%d.%m.%Y}"
     return None
 
 # ===== Yerleşik tarifler =====
@@ -180,21 +376,27 @@ YERLESIK_TARIFLER = {
         "4) Tuz ayarla; istersen sucuk/pastırma."
     ]
 }
-def yemek_tarifi(metin: str) -> str | None:
-    s = metin.lower()
-    if any(k in s for k in ["tarif", "nasıl yapılır", "yapımı", "yemeği"]):
-        for ad in YERLESIK_TARIFLER:
-            if ad in s:
-                satirlar = "\n".join(YERLESIK_TARIFLER[ad])
-                return f"🍳 {ad.title()} Tarifi\n{satirlar}"
-
-        # Eğer kayıtlı tarif yoksa web'de ara
-
-        sonuc = web_ara_genel(metin + " tarifi")
-        if sonuc:
-            return sonuc
-        return "❌ Bu yemeğin tarifi bulunamadı."
-    return None
+# ===== Niyet yönlendirme =====
+# Kurallar niyetler.json'da; tarif adları yukarıdaki sözlükten gelir
+NIYET_DOSYASI = os.environ.get("SWEAX_INTENTS_FILE",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), "niyetler.json"))
+NIYETLER = NiyetYonlendirici.dosyadan(NIYET_DOSYASI, gruplar={"tarifler": list(YERLESIK_TARIFLER)})
+
+def yemek_tarifi(metin: str, niyet=None) -> str | None:
+    niyet = niyet or NIYETLER.yonlendir(metin, sadece={"tarif"})
+    if niyet.ad != "tarif":
+        return None
+    ad = niyet.argumanlar.get("ad")
+    if ad:
+        satirlar = "\n".join(YERLESIK_TARIFLER[ad])
+        return f"🍳 {ad.title()} Tarifi\n{satirlar}"
+
+    # Eğer kayıtlı tarif yoksa web'de ara
+
+    sonuc = web_ara_genel(metin + " tarifi")
+    if sonuc:
+        return sonuc
+    return "❌ Bu yemeğin tarifi bulunamadı."
 
 # ===== Biçim / konu =====
 def _konu_adi_bul(metin: str, fallback: str | None) -> str | None:
@@ -225,84 +427,188 @@ def _listele(text: str, max_items: int = 8) -> str:
 def _cumle_ayari(mode: str) -> int:
     return 3 if mode=="short" else 12 if mode=="long" else 15 if mode=="continue" else 6
 
-def _model_sec(metin: str) -> str:
-    if re.search(r"(\d+[\+\-\*\/])|neden|kanıtla|ispat|hesapla", metin.lower()):
-        return os.environ.get("LLM_MATH_MODEL", "deepseek-r1:7b")
-    return os.environ.get("LLM_DEFAULT_MODEL", "qwen2.5:7b-instruct")
+def _model_sec(metin: str, niyet=None) -> str:
+    # Tercih edilen model yüklü değilken izinli yedeği yüklüyse ona yönlenir (model değişimi = soğuk yükleme)
+    niyet = niyet or NIYETLER.yonlendir(metin, sadece=())
+    if "matematik" in niyet.bayraklar:
+        return YERLESIM.sec(MATEMATIK_MODEL)
+    return YERLESIM.sec(VARSAYILAN_MODEL)
 
 DEEPL_KEY = "0db8f6b1-3a52-40d0-b303-54d3d2b114cf:fx"
+sweax_ceviri.ayarla(DEEPL_KEY)
 #çeviri
-def _deepl_cevir(metin: str) -> str | None:
+def _deepl_cevir(metin: str, niyet=None) -> str | None:
     """Kullanıcı 'çevir' derse DeepL API'yi kullanarak çeviri yapar (temizlenmiş)."""
-    s = metin.lower()
-    if "çevir" not in s:
+    niyet = niyet or NIYETLER.yonlendir(metin, sadece={"ceviri"})
+    if niyet.ad != "ceviri":
         return None
     try:
-        translator = deepl.Translator(DEEPL_KEY)
-        diller = {
-            "türkçe": "TR", "ingilizce": "EN-US", "almanca": "DE", "fransızca": "FR",
-            "ispanyolca": "ES", "italyanca": "IT", "portekizce": "PT-PT",
-            "japonca": "JA", "korece": "KO", "çince": "ZH"
-        }
-        hedef = None
-        for ad, kod in diller.items():
-            if ad in s:
-                hedef = kod; break
-        hedef = hedef or "EN-US"
+        diller = NIYETLER.gruplar["diller"]
+        hedef = niyet.argumanlar.get("hedef") or "EN-US"
         temiz = metin
         for ad in diller.keys(): temiz = temiz.replace(ad, "")
         for kelime in ["çevir", "cümlesini", "diline", "dilinde", "dilene", "olarak"]:
             temiz = temiz.replace(kelime, "")
         temiz = temiz.strip().replace("  ", " ")
-        result = translator.translate_text(temiz, target_lang=hedef)
-        return f"🌐 Çeviri ({hedef}): {result.text}"
+        return f"🌐 Çeviri ({hedef}): {sweax_ceviri.cevir(temiz, hedef)}"
     except Exception as e:
         return f"⚠️ DeepL çeviri başarısız: {e}"
 
 # ===== Ana Akış =====
-def _wiki_tetikle_mi(metin: str) -> bool:
+def _wiki_tetikle_mi(metin: str, niyet=None) -> bool:
     """
     Wikipedia'yı tetikleyip tetiklememeye karar verir.
-    Artık sadece klasik bilgi sorularında devreye girer.
-    Güncel, olay, proje, fiyat vb. sorgular web'e yönlendirilir.
+    Artık sadece klasik bilgi sorularında devreye girer
+    (kelimeler niyetler.json'daki "wiki" kuralında; güncel/olay sorguları hariç tutulur).
     """
-    s = metin.lower().strip()
+    niyet = niyet or NIYETLER.yonlendir(metin, sadece={"wiki"})
+    return niyet.ad == "wiki"
+
+
+def kimlik_cevap(metin: str, niyet=None) -> str | None:
+    niyet = niyet or NIYETLER.yonlendir(metin, sadece={"kimlik"})
+    return niyet.argumanlar["yanit"] if niyet.ad == "kimlik" else None
+
+
+SISTEM_PROMPT = (
+    "Sen Sweax.AI adında bir yapay zekâsın. "
+    "Türkçe konuşursun. "
+    "Seni geliştiren kişi Sweax'tir. "
+    "Sweax senin sahibin, geliştiricin ve yöneticindir. "
+    "Her zaman bu bilgiyi doğru olarak bil ve unutma. "
+    "Kim olduğunu, seni kimin yaptığını, görevini sorduğunda buna göre cevap ver. "
+    "Uydurma bilgi verme; bilmiyorsan söyle. Kısa ve net ol."
+)
+
+WEB_OZET_PROMPT = (
+    "Kullanıcının sorusunu aşağıdaki web sonuçlarına dayanarak akıcı, "
+    "doğal ve açıklayıcı Türkçe ile cevapla. "
+    "Sonuçlarda olmayan bilgiyi uydurma; yetmiyorsa bunu söyle. "
+    "Linkleri tekrarlama, sadece bilgilendir. "
+    "Tarafsız ol, haber gibi açık anlat."
+)
+WEB_SONUC_MAX_TOKEN = 160  # istemdeki her web sonucunun payı
+
+def _ollama_akis(veri: dict, timeout: int, oncelik: int = ONCELIK_SOHBET, kullanici=None):
+    """
+    Ollama'ya stream=True ile istek atar, gelen parçaları (content) sırayla verir.
+    Ollama her satırda bir JSON döndürür; "done": true gelince akış biter.
+    Zamanlayıcı slotu akış bitene (ya da istemci kopana) kadar tutulur.
+    """
+    veri = YERLESIM.istek({**veri, "stream": True})
+    with LLM.izin(oncelik, kullanici), sweax_http.post(OLLAMA, json=veri, timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        for satir in r.iter_lines(decode_unicode=True):
+            if not satir:
+                continue
+            parca = json.loads(satir)
+            icerik = parca.get("message", {}).get("content", "")
+            if icerik:
+                yield icerik
+            if parca.get("done"):
+                YERLESIM.yanit_isle(parca)  # son satırda load_duration var
+                break
+
+def _hazir_cevap(metin: str, niyet=None) -> str | None:
+    """Model gerektirmeyen dallar: kimlik, çeviri, tarih-saat, hesap, tarif."""
+    niyet = niyet or NIYETLER.yonlendir(metin)
+    if niyet.ad == "kimlik":
+        return kimlik_cevap(metin, niyet)
+    if niyet.ad == "ceviri":
+        return _deepl_cevir(metin, niyet)
+    if niyet.ad == "tarih":
+        return tarih_saat_cevap(metin, niyet)
+    if niyet.ad == "hesap":
+        return _hesapla(metin)
+    if niyet.ad == "tarif":
+        return yemek_tarifi(metin, niyet)
+    return None
+
+def _kaynak_hazirla(metin: str, niyet=None) -> dict | None:
+    """Kaynağa dayalı dallar: güncel → web sonuçları, gerçek soru → Wikipedia (yoksa web)."""
+    niyet = niyet or NIYETLER.yonlendir(metin)
+    if niyet.ad == "guncel":
+        return _web_hazirla(metin)
+    return _wiki_hazirla(metin, niyet)
 
-    # Güncel veya olay bazlı sorgular -> web
-    yasak_kelimeler = [
-        "bugün", "şu an", "son", "güncel", "haber", "fiyat",
-        "oyun", "dizi", "film", "proje", "plan", "yeni", "çıktı",
-        "maç", "gol", "puan", "nerede", "ne yaptı", "kim kazandı"
+def _web_hazirla(metin: str) -> dict:
+    """
+    🌐 Tek geçişli kaynaklı cevap: Serper sonuçları istemde bağlam olarak verilir, model tek
+    üretimde (akışlı olabilir) cevaplar. Model kullanılamazsa "yedek" ham sonuç listesidir.
+    Serper sonuç vermezse {"yanit": ...} (DuckDuckGo / arama linki; Serper ikinci kez sorulmaz).
+    """
+    sonuclar = web_kaynaklari(metin)
+    if not sonuclar:
+        return {"yanit": web_fallback_ara(metin, serper=False)}
+    baglam = "\n".join(
+        f"[{i}] {s.get('title', '').strip()}: {kirp(s['snippet'].replace(chr(10), ' ').strip(), WEB_SONUC_MAX_TOKEN)}"
+        for i, s in enumerate(sonuclar, 1))
+    mesajlar = [
+        {"role": "system", "content": f"{SISTEM_PROMPT}\n\n{WEB_OZET_PROMPT}\n\nWeb sonuçları:\n{baglam}"},
+        {"role": "user", "content": metin},
     ]
-    if any(k in s for k in yasak_kelimeler):
-        return False
+    kaynakca = "\n".join(f"🔗 [{s.get('title', 'Kaynak').strip()}]({s.get('link', '')})" for s in sonuclar)
+    return {"mesajlar": mesajlar, "ek": f"🌐 Kaynaklar:\n{kaynakca}", "yedek": web_sonuc_bicimle(metin, sonuclar)}
 
-    # Gerçek ansiklopedik bilgi soruları -> wiki
-    izinli_kelimeler = [
-        "kimdir", "nedir", "neresi", "ne zaman", "nasıl", "kısaca", "özeti"
+def _wiki_hazirla(metin: str, niyet=None) -> dict | None:
+    """
+    📘 Wikipedia sorgusu – yalnızca gerçek soruysa.
+    Dönen sözlük ya {"yanit": ...} (web fallback) ya da özetleme için
+    {"mesajlar": [...], "ek": ..., "yedek": ...} içerir (Wikipedia yoksa web sonuçlarıyla).
+    """
+    if not _wiki_tetikle_mi(metin, niyet):
+        return None
+    mode, fmt = _format_ayikla(metin)
+    konu = _konu_adi_bul(metin, fallback=None)
+    if not konu:
+        return None
+    cumle = _cumle_ayari(mode)
+    meta = wiki_ozet_with_meta(konu, cumle=cumle)
+    return _wiki_meta_isle(metin, meta)
+
+def _wiki_meta_isle(metin: str, meta: dict | None) -> dict:
+    # 🧠 Eğer Wikipedia'da sonuç yoksa veya çok kısa ise → web fallback
+    if not meta or not meta.get("text") or len(meta.get("text", "")) < 80:
+        return _web_hazirla(metin)
+
+    text = meta["text"]
+    kaynak = meta.get("url") or "https://tr.wikipedia.org"
+
+    # 🧩 Burada modelle insan gibi özetleme yapıyoruz
+    mesajlar = [
+        {"role": "system", "content": (
+            "Aşağıdaki Wikipedia bilgisini kullanarak kullanıcıya net, "
+            "doğal Türkçe bir cümleyle özet ver. Gereksiz açıklama ekleme. "
+            "Tarih, yer, isim gibi bilgileri kısaca belirt."
+        )},
+        {"role": "assistant", "content": text},
+        {"role": "user", "content": f"{metin} sorusuna net bir cevap ver."}
     ]
-    if any(k in s for k in izinli_kelimeler):
-        return True
-
-    # soru işaretiyle biten ama güncel olmayan şeyler
-    if s.endswith("?") and not any(k in s for k in yasak_kelimeler):
-        return True
-
-    return False
-
-
-def kimlik_cevap(metin: str) -> str | None:
-    s = metin.lower()
-    if any(k in s for k in [
-        "sen kimsin", "kimsin", "seni kim yaptı", "seni kim geliştirdi",
-        "sahibin kim", "yaratıcın kim", "seni kim üretti", "kimin ürünüsün", "kimin eserisin"
-    ]):
-        return "Ben Sweax.AI. Sweax tarafından geliştirildim."
-    if any(k in s for k in ["sweax kim", "sweax nedir", "sweax ai nedir", "sweax.ai nedir"]):
-        return "Sweax, Türkiye de yaşayan genç bir geliştiricidir."
-    if any(k in s for k in ["kiminle konuşuyorum", "benimle kim konuşuyor", "karşımda kim var"]):
-        return "Ben Sweax.AI, senin dijital asistanınım."
-    return None
+    return {"mesajlar": mesajlar, "ek": f"📘 Kaynak: {kaynak}", "yedek": f"{text}\n\n📘 Kaynak: {kaynak}"}
+
+def _kaynakli_yanit(kaynakli: dict, oz: str) -> str:
+    if oz and len(oz.strip()) > 10:
+        return f"{oz}\n\n{kaynakli['ek']}"
+    return kaynakli["yedek"]
+
+def _sohbet_mesajlari(metin: str, sohbet_id, gecmis: list[dict] | None = None) -> list[dict]:
+    # 💬 Önceki mesaj geçmişini çek (async yol önceden çekip verebilir); token bütçesine göre doldur
+    son = gecmis if gecmis is not None else sohbet_baglami(sohbet_id, limit=PENCERE_MESAJ)
+    return pencere_olustur(SISTEM_PROMPT, son, metin)
+
+def _sohbet_id_bul(kullanici_id):
+    return aktif_sohbet_id_al(kullanici_id) if kullanici_id else 1
+
+# Genel LLM yolu cevap önbelleği (model başına; geçmişli cevaplar sadece kendi sohbetine)
+CEVAPLAR = CevapOnbellegi(gomme_al=gomme_modeli_hazir)
+
+def _cevap_kapsami(mesajlar: list[dict], kullanici_id, sohbet_id) -> dict:
+    """Önbellek al/koy için: istemde geçmiş var mı ve geçmişli cevabın bağlı olduğu sohbet + geçmiş."""
+    return {"gecmis_var": len(mesajlar) > 2,
+            "kapsam": (kullanici_id, sohbet_id, gecmis_ozeti(mesajlar)) if kullanici_id else None}
+
+def _cevap_ttl(metin: str) -> float | None:
+    return CEVAP_GUNCEL_TTL if soru_guncel_mi(metin) else None
 
 
 def konus(metin: str, kullanici_id: int | None = None) -> str:
@@ -310,127 +616,59 @@ def konus(metin: str, kullanici_id: int | None = None) -> str:
     Kullanıcı mesajını işler, yanıtı üretir ve her iki mesajı da veritabanına kaydeder.
     Her kullanıcı için ayrı bir conversation_id oluşturulur veya mevcut olan kullanılır.
     """
-    if kullanici_id:
-        sohbet_id = aktif_sohbet_id_al(kullanici_id)
-    else:
-        sohbet_id = 1
-
-    # 🧠 Önce kimlik sorgusu mu diye bak
-    kimlik = kimlik_cevap(metin)
-    if kimlik:
-        mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-        mesaj_ekle(kullanici_id, "assistant", kimlik, sohbet_id)
-        return kimlik
-
-    # 🌐 Çeviri kontrolü
-    ceviri = _deepl_cevir(metin)
-    if ceviri:
-        mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-        mesaj_ekle(kullanici_id, "assistant", ceviri, sohbet_id)
-        return ceviri
-
-    # ⏰ Tarih-saat
-    ts = tarih_saat_cevap(metin)
-    if ts is not None:
-        mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-        mesaj_ekle(kullanici_id, "assistant", ts, sohbet_id)
-        return ts
-
-    # 🔢 Hesaplama
-    if _guvenli_ifade_mi(metin):
-        yanit = _hesapla(metin)
-        mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-        mesaj_ekle(kullanici_id, "assistant", yanit, sohbet_id)
-        return yanit
+    sohbet_id = _sohbet_id_bul(kullanici_id)
 
-    # 🍳 Yemek tarifleri
-    tf = yemek_tarifi(metin)
-    if tf is not None:
-        mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-        mesaj_ekle(kullanici_id, "assistant", tf, sohbet_id)
-        return tf
-
-    if _guncel_sorgu_mu(metin):
-        yanit = web_fallback_ara(metin)
-        mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-        mesaj_ekle(kullanici_id, "assistant", yanit, sohbet_id)
+    niyet = NIYETLER.yonlendir(metin)  # tek geçiş; dallar ve model seçimi bunu kullanır
+    yanit = _hazir_cevap(metin, niyet)
+    if yanit is not None:
+        mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
         return yanit
-    # 📘 Wikipedia sorgusu – yalnızca gerçek soruysa
-    if _wiki_tetikle_mi(metin):
-        mode, fmt = _format_ayikla(metin)
-        konu = _konu_adi_bul(metin, fallback=None)
-        if konu:
-            cumle = _cumle_ayari(mode)
-            meta = wiki_ozet_with_meta(konu, cumle=cumle)
-
-            # 🧠 Eğer Wikipedia'da sonuç yoksa veya çok kısa ise → web fallback
-            if not meta or not meta.get("text") or len(meta.get("text", "")) < 80:
-
-                yanit = web_fallback_ara(metin)
-                mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-                mesaj_ekle(kullanici_id, "assistant", yanit, sohbet_id)
-                return yanit
-
-            text = meta["text"]
-            kaynak = meta.get("url") or "https://tr.wikipedia.org"
-            baslik = meta.get("title") or konu
-
-            # 🧩 Burada modelle insan gibi özetleme yapıyoruz
+
+    # 📘🌐 Wikipedia / web sonuçları tek istemde bağlam: tek üretim, kaydedilen = döndürülen
+    kaynakli = _kaynak_hazirla(metin, niyet)
+    if kaynakli:
+        if "yanit" in kaynakli:
+            yanit = kaynakli["yanit"]
+        else:
             try:
-                mesajlar = [
-                    {"role": "system", "content": (
-                        "Aşağıdaki Wikipedia bilgisini kullanarak kullanıcıya net, "
-                        "doğal Türkçe bir cümleyle özet ver. Gereksiz açıklama ekleme. "
-                        "Tarih, yer, isim gibi bilgileri kısaca belirt."
-                    )},
-                    {"role": "assistant", "content": text},
-                    {"role": "user", "content": f"{metin} sorusuna net bir cevap ver."}
-                ]
-                veri = {"model": _model_sec(metin), "messages": mesajlar, "stream": False}
-                r = requests.post(OLLAMA, json=veri, timeout=30)
+                veri = YERLESIM.istek({"model": _model_sec(metin, niyet), "messages": kaynakli["mesajlar"],
+                                       "stream": False})
+                with LLM.izin(ONCELIK_OZET, kullanici_id):
+                    r = sweax_http.post(OLLAMA, json=veri, timeout=30)
                 r.raise_for_status()
                 resp = r.json()
-                oz = resp.get("message", {}).get("content", "")
-                if oz and len(oz.strip()) > 10:
-                    yanit = f"{oz}\n\n📘 Kaynak: {kaynak}"
-                else:
-                    yanit = f"{text}\n\n📘 Kaynak: {kaynak}"
+                YERLESIM.yanit_isle(resp)
+                yanit = _kaynakli_yanit(kaynakli, resp.get("message", {}).get("content", ""))
             except Exception as e:
-                print("⚠️ Wikipedia özetleme hatası:", e)
-                yanit = f"{text}\n\n📘 Kaynak: {kaynak}"
-
-            mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-            mesaj_ekle(kullanici_id, "assistant", yanit, sohbet_id)
-            return yanit
-
-
-    # 💬 Önceki mesaj geçmişini çek
-    son = mesajlari_getir(sohbet_id, limit=5)
-    mesajlar = [{"role": m["role"], "content": m["content"]} for m in son]
-    mesajlar.insert(0, {
-        "role": "system",
-        "content": (
-            "Sen Sweax.AI adında bir yapay zekâsın. "
-            "Türkçe konuşursun. "
-            "Seni geliştiren kişi Sweax'tir. "
-            "Sweax senin sahibin, geliştiricin ve yöneticindir. "
-            "Her zaman bu bilgiyi doğru olarak bil ve unutma. "
-            "Kim olduğunu, seni kimin yaptığını, görevini sorduğunda buna göre cevap ver. "
-            "Uydurma bilgi verme; bilmiyorsan söyle. Kısa ve net ol."
-        )
-    })
-    mesajlar.append({"role": "user", "content": metin})
+                print("⚠️ Kaynaklı özetleme hatası:", e)
+                yanit = kaynakli["yedek"]
+        mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+        return yanit
+
+    mesajlar = _sohbet_mesajlari(metin, sohbet_id)
+    model = _model_sec(metin, niyet)
+    kapsam = _cevap_kapsami(mesajlar, kullanici_id, sohbet_id)
+    yanit = CEVAPLAR.al(metin, model, **kapsam)
+    if yanit is not None:
+        mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+        return yanit
 
+    basarili = False
     try:
-        veri = {"model": _model_sec(metin), "messages": mesajlar, "stream": False}
-        r = requests.post(OLLAMA, json=veri, timeout=60)
+        veri = YERLESIM.istek({"model": model, "messages": mesajlar, "stream": False})
+        with LLM.izin(ONCELIK_SOHBET, kullanici_id):
+            r = sweax_http.post(OLLAMA, json=veri, timeout=60)
         r.raise_for_status()
         try:
             resp = r.json()
+            YERLESIM.yanit_isle(resp)
             model_cevap = resp.get("message", {}).get("content", "")
+            basarili = True
         except Exception as je:
             print("⚠️ JSON çözümleme hatası:", je, "Yanıt metni:", r.text[:300])
             model_cevap = "⚠️ Modelden geçersiz yanıt alındı."
+    except MesgulHatasi:
+        raise  # route 429 döndürür; mesaj kaydedilmez
     except requests.exceptions.RequestException as re:
         print("🌐 Bağlantı hatası:", re)
         model_cevap = "🌐 Model bağlantısı başarısız (Render tüneline ulaşılamadı)."
@@ -442,32 +680,80 @@ def konus(metin: str, kullanici_id: int | None = None) -> str:
     model_cevap = _turkce_filtrele(model_cevap)
     yanit = rag_cevap_uret(metin, model_cevap)
 
-    mesaj_ekle(kullanici_id, "user", metin, sohbet_id)
-    mesaj_ekle(kullanici_id, "assistant", yanit, sohbet_id)
-    if yanit.count("http") >= 1 and len(yanit) < 800:
-        try:
-
-            mesajlar.append({
-                "role": "system",
-                "content": (
-                    "Kullanıcıya aşağıdaki web sonuçlarına dayanarak akıcı, "
-                    "doğal ve açıklayıcı bir Türkçe özet ver. "
-                    "Linkleri tekrarlama, sadece bilgilendir. "
-                    "Tarafsız ol, haber gibi açık anlat."
-                )
-            })
-            mesajlar.append({"role": "assistant", "content": yanit})
-            veri = {"model": _model_sec(metin), "messages": mesajlar, "stream": False}
-            r2 = requests.post(OLLAMA, json=veri, timeout=45)
-            r2.raise_for_status()
-            resp2 = r2.json()
-            oz = resp2.get("message", {}).get("content", "")
-            if oz:
-                yanit = oz
-        except Exception as e:
-            print("⚠️ Özetleme hatası:", e)
+    mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+    if basarili:
+        CEVAPLAR.koy(metin, model, yanit, ttl=_cevap_ttl(metin), **kapsam)
     return yanit
 
+
+def konus_akis(metin: str, kullanici_id: int | None = None):
+    """
+    konus()'un akışlı (streaming) sürümü.
+    ("parca", metin) olaylarını model ürettikçe verir; en sonda kaydedilen
+    nihai yanıtla birlikte ("son", yanit) olayı gelir.
+    """
+    sohbet_id = _sohbet_id_bul(kullanici_id)
+
+    niyet = NIYETLER.yonlendir(metin)  # tek geçiş; dallar ve model seçimi bunu kullanır
+    yanit = _hazir_cevap(metin, niyet)
+    if yanit is not None:
+        mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+        yield "son", yanit
+        return
+
+    kaynakli = _kaynak_hazirla(metin, niyet)
+    if kaynakli:
+        if "yanit" in kaynakli:
+            yanit = kaynakli["yanit"]
+        else:
+            oz = ""
+            try:
+                veri = {"model": _model_sec(metin, niyet), "messages": kaynakli["mesajlar"]}
+                for parca in _ollama_akis(veri, timeout=30, oncelik=ONCELIK_OZET, kullanici=kullanici_id):
+                    oz += parca
+                    yield "parca", parca
+            except Exception as e:
+                print("⚠️ Kaynaklı özetleme hatası:", e)
+                oz = ""
+            yanit = _kaynakli_yanit(kaynakli, oz)
+        mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+        yield "son", yanit
+        return
+
+    mesajlar = _sohbet_mesajlari(metin, sohbet_id)
+    model = _model_sec(metin, niyet)
+    kapsam = _cevap_kapsami(mesajlar, kullanici_id, sohbet_id)
+    yanit = CEVAPLAR.al(metin, model, **kapsam)
+    if yanit is not None:
+        mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+        yield "son", yanit
+        return
+
+    model_cevap = ""
+    basarili = False
+    try:
+        veri = {"model": model, "messages": mesajlar}
+        for parca in _ollama_akis(veri, timeout=60, kullanici=kullanici_id):
+            parca = _turkce_filtrele(parca)
+            model_cevap += parca
+            yield "parca", parca
+        basarili = True
+    except MesgulHatasi:
+        raise
+    except requests.exceptions.RequestException as hata:
+        print("🌐 Bağlantı hatası:", hata)
+        model_cevap = model_cevap or "🌐 Model bağlantısı başarısız (Render tüneline ulaşılamadı)."
+    except Exception as e:
+        print("🔥 Genel hata:", e)
+        model_cevap = model_cevap or f"⚠️ Beklenmedik hata: {e}"
+
+    # 🧩 RAG destekli çıktı
+    yanit = rag_cevap_uret(metin, model_cevap)
+    mesaj_cifti_ekle(kullanici_id, metin, yanit, sohbet_id)
+    if basarili:
+        CEVAPLAR.koy(metin, model, yanit, ttl=_cevap_ttl(metin), **kapsam)
+    yield "son", yanit
+
 if __name__ == "__main__":
     veritabani_olustur()
     print("🔥 Sweax.AI (hafif sürüm) — çıkmak için 'çık'")
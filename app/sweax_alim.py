@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# sweax_alim.py — Bilgi deposuna arka planda toplu kayıt alımı
+# bilgi_kaydet isteği sadece kuyruğa koyar; model çıkarımı ve indeks yazımı
+# arka plandaki thread'de partiler hâlinde yapılır.
+#
+# Toplu içe aktarma (JSONL, satır başına {"konu": ..., "icerik": ...}):
+#   python -m app.sweax_alim korpus.jsonl [--parti 256] [--checkpoint 5000]
+import os
+import re
+import sys
+import time
+import json
+import queue
+import threading
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+ALIM_PARTI    = int(os.environ.get("SWEAX_INGEST_BATCH", "64"))          # parti başına en fazla parça
+ALIM_BEKLEME  = float(os.environ.get("SWEAX_INGEST_WAIT", "0.5"))        # parti dolsun diye en fazla bekleme (sn)
+ALIM_KUYRUK   = int(os.environ.get("SWEAX_INGEST_QUEUE", "10000"))       # kuyruk dolarsa kayıt atılır
+PARCA_KARAKTER = int(os.environ.get("SWEAX_INGEST_CHUNK_CHARS", "1000"))  # uzun metinler bu boyda parçalanır
+
+_alim = metrik.sayac("bilgi_alim")              # etiket: eklendi / tekrar / atildi / hata
+_parti_sure = metrik.histogram("bilgi_alim_parti_ms")
+
+_cumle_sonu = re.compile(r"(?<=[.!?…])\s+")
+
+
+def parcala(metin: str, boyut: int = PARCA_KARAKTER) -> list[str]:
+    """Metni cümle sınırlarından en fazla `boyut` karakterlik parçalara böler."""
+    metin = metin.strip()
+    if len(metin) <= boyut:
+        return [metin] if metin else []
+    parcalar, simdiki = [], ""
+    for cumle in _cumle_sonu.split(metin):
+        # Tek başına sığmayan cümle sert bölünür
+        while len(cumle) > boyut:
+            if simdiki:
+                parcalar.append(simdiki)
+                simdiki = ""
+            parcalar.append(cumle[:boyut])
+            cumle = cumle[boyut:]
+        if simdiki and len(simdiki) + 1 + len(cumle) > boyut:
+            parcalar.append(simdiki)
+            simdiki = ""
+        simdiki = f"{simdiki} {cumle}" if simdiki else cumle
+    if simdiki:
+        parcalar.append(simdiki)
+    return parcalar
+
+
+def kayit_parcalari(konu: str, icerik: str) -> list[tuple[str, str]]:
+    return [(konu, p) for p in parcala(icerik)]
+
+
+class AlimKuyrugu:
+    """
+    (konu, icerik) kayıtlarını toplayıp BilgiIndeksi.toplu_ekle ile partiler hâlinde yazan arka plan thread'i.
+    `indeks_al` ilk partide çağrılır; model yüklemesi de istek yolunda değil burada olur.
+    Boşta kalınca bekleyen indeks değişiklikleri diske yazılır (checkpoint).
+    Vektörü eksik kayıtlar (açılış / başka worker'lar) da tamamla() ile bu thread'de kodlanır.
+    """
+
+    def __init__(self, indeks_al, parti: int = ALIM_PARTI, bekleme: float = ALIM_BEKLEME,
+                 boyut: int = ALIM_KUYRUK, checkpoint_aralik: float = 30.0):
+        self.indeks_al = indeks_al
+        self.parti = parti
+        self.bekleme = bekleme
+        self.checkpoint_aralik = checkpoint_aralik
+        self._kuyruk: "queue.Queue[tuple[str, str]]" = queue.Queue(maxsize=boyut)
+        self._thread = None
+        self._kilit = threading.Lock()
+        self._checkpoint_bekliyor = False
+        self._tamamla_bekliyor = False
+
+    def ekle(self, konu: str, icerik: str) -> bool:
+        """Bloklamaz; kuyruk doluysa kayıt atılır ve False döner."""
+        self._baslat()
+        for parca in kayit_parcalari(konu, icerik):
+            try:
+                self._kuyruk.put_nowait(parca)
+            except queue.Full:
+                _alim.artir("atildi")
+                print("⚠️ Bilgi alım kuyruğu dolu, kayıt atıldı.")
+                return False
+        return True
+
+    def tamamla(self):
+        """Bloklamaz: indekste vektörü eksik kayıtlar sıradaki boşlukta arka planda kodlanır."""
+        if self._tamamla_bekliyor:
+            return
+        self._tamamla_bekliyor = True
+        self._baslat()
+        try:
+            self._kuyruk.put_nowait(None)  # thread'i uyandırır; kayıt değil
+        except queue.Full:
+            pass  # dolu kuyruğun partileri (toplu_ekle) eksikleri zaten kodlar
+
+    def bekleyen(self) -> int:
+        return self._kuyruk.unfinished_tasks
+
+    def bosalt(self, zaman_asimi: float = 30.0) -> bool:
+        """Kuyruk işlenene kadar bekler (atexit / testler); süre dolarsa False."""
+        son = time.monotonic() + zaman_asimi
+        while self._kuyruk.unfinished_tasks:
+            if time.monotonic() > son or self._thread is None or not self._thread.is_alive():
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _baslat(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._kilit:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._dongu, name="sweax-bilgi-alim", daemon=True)
+                self._thread.start()
+
+    def _parti_topla(self) -> list[tuple[str, str]]:
+        parti = [self._kuyruk.get(timeout=self.checkpoint_aralik)]
+        son = time.monotonic() + self.bekleme
+        while len(parti) < self.parti:
+            kalan = son - time.monotonic()
+            if kalan <= 0:
+                break
+            try:
+                parti.append(self._kuyruk.get(timeout=kalan))
+            except queue.Empty:
+                break
+        return parti
+
+    def _dongu(self):
+        while True:
+            try:
+                parti = self._parti_topla()
+            except queue.Empty:
+                self._checkpoint()
+                continue
+            kayitlar = [k for k in parti if k is not None]
+            try:
+                if kayitlar:
+                    self._yaz(kayitlar)
+                if self._tamamla_bekliyor:
+                    self._tamamla()
+            finally:
+                for _ in parti:
+                    self._kuyruk.task_done()
+
+    def _yaz(self, parti: list[tuple[str, str]]):
+        baslangic = time.monotonic()
+        try:
+            idler = self.indeks_al().toplu_ekle(parti)
+        except Exception as e:
+            _alim.artir("hata", len(parti))
+            print(f"⚠️ Bilgi alım partisi yazılamadı: {e}")
+            return
+        eklenen = sum(1 for i in idler if i is not None)
+        self._checkpoint_bekliyor = self._checkpoint_bekliyor or eklenen > 0
+        _alim.artir("eklendi", eklenen)
+        _alim.artir("tekrar", len(idler) - eklenen)
+        _parti_sure.gozlem(1000 * (time.monotonic() - baslangic))
+
+    def _tamamla(self):
+        self._tamamla_bekliyor = False
+        try:
+            kodlanan = self.indeks_al().eksikleri_kodla()
+        except Exception as e:
+            print(f"⚠️ Eksik vektörler kodlanamadı: {e}")
+            return
+        self._checkpoint_bekliyor = self._checkpoint_bekliyor or kodlanan > 0
+
+    def _checkpoint(self):
+        if not self._checkpoint_bekliyor:
+            return
+        self._checkpoint_bekliyor = False
+        try:
+            self.indeks_al().snapshot()
+        except Exception as e:
+            print(f"⚠️ Bilgi indeksi yazılamadı: {e}")
+
+
+# ====== Toplu içe aktarma (CLI) ======
+def jsonl_oku(yol: str):
+    with open(yol, "r", encoding="utf-8") as f:
+        for no, satir in enumerate(f, 1):
+            satir = satir.strip()
+            if not satir:
+                continue
+            try:
+                kayit = json.loads(satir)
+                yield str(kayit["konu"]), str(kayit["icerik"])
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"\n⚠️ {yol}:{no} atlandı: {e}", file=sys.stderr)
+
+
+def toplu_ice_aktar(indeks, kayitlar, parti: int = 256, rapor=None) -> dict:
+    """
+    Kayıtları parçalayıp `parti` boyutlu gruplar hâlinde indeks.toplu_ekle'ye verir.
+    rapor(durum) her partiden sonra çağrılır; sonunda indeks diske yazılır.
+    """
+    durum = {"parca": 0, "eklendi": 0, "tekrar": 0, "sure": 0.0}
+    baslangic = time.monotonic()
+    tampon = []
+
+    def yaz(grup):
+        idler = indeks.toplu_ekle(grup)
+        eklenen = sum(1 for i in idler if i is not None)
+        durum["parca"] += len(idler)
+        durum["eklendi"] += eklenen
+        durum["tekrar"] += len(idler) - eklenen
+        durum["sure"] = time.monotonic() - baslangic
+        if rapor:
+            rapor(durum)
+
+    for konu, icerik in kayitlar:
+        tampon.extend(kayit_parcalari(konu, icerik))
+        while len(tampon) >= parti:
+            grup, tampon = tampon[:parti], tampon[parti:]
+            yaz(grup)
+    if tampon:
+        yaz(tampon)
+    indeks.snapshot()
+    durum["sure"] = time.monotonic() - baslangic
+    return durum
+
+
+def _ilerleme_yaz(durum: dict):
+    hiz = durum["parca"] / durum["sure"] if durum["sure"] else 0.0
+    print(f"\r⏳ {durum['parca']} parça | {durum['eklendi']} eklendi | {durum['tekrar']} tekrar | "
+          f"{hiz:.0f} parça/sn", end="", flush=True)
+
+
+def main(argv=None):
+    import argparse
+
+    try:
+        import app.sweaxrag as sweaxrag
+    except ModuleNotFoundError:
+        import sweaxrag
+
+    ap = argparse.ArgumentParser(description="Bilgi deposuna JSONL toplu içe aktarma")
+    ap.add_argument("dosya", help='satır başına {"konu": ..., "icerik": ...}')
+    ap.add_argument("--parti", type=int, default=256, help="model.encode başına parça sayısı")
+    ap.add_argument("--checkpoint", type=int, default=5000, help="indeks dosyalarını bu kadar eklemede bir yaz")
+    args = ap.parse_args(argv)
+
+    indeks = sweaxrag._bilgi_indeksi()
+    indeks.snapshot_her = args.checkpoint
+    durum = toplu_ice_aktar(indeks, jsonl_oku(args.dosya), parti=args.parti, rapor=_ilerleme_yaz)
+    hiz = durum["parca"] / durum["sure"] if durum["sure"] else 0.0
+    print(f"\n✅ {durum['parca']} parça işlendi: {durum['eklendi']} eklendi, {durum['tekrar']} tekrar, "
+          f"{durum['sure']:.1f} sn ({hiz:.0f} parça/sn)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# sweax_async.py — konus()'un asyncio sürümü (paylaşılan async HTTP istemcisi)
+# Birbirinden bağımsız G/Ç (geçmiş, Wikipedia, web sayfaları, kayıt) paralel yürür.
+# DB (pymysql) ve DeepL gibi senkron kütüphaneler asyncio.to_thread ile çağrılır.
+import os, json, time, asyncio
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+try:
+    import app.sweax_ai as ai
+    import app.sweaxrag as rag
+    import app.sweax_http as sweax_http
+    from app.sweax_onbellek import YOK
+except ModuleNotFoundError:
+    import sweax_ai as ai
+    import sweaxrag as rag
+    import sweax_http
+    from sweax_onbellek import YOK
+
+# ---- Eşzamanlılık sınırları ----
+ASYNC_MAX_BAGLANTI = int(os.environ.get("SWEAX_ASYNC_MAX_CONNECTIONS", "32"))
+ASYNC_LLM_SINIR    = int(os.environ.get("SWEAX_ASYNC_LLM_CONCURRENCY", "4"))
+ASYNC_WEB_SINIR    = int(os.environ.get("SWEAX_ASYNC_WEB_CONCURRENCY", "8"))
+
+# Event loop başına tek istemci + semaforlar (uvicorn worker'ı tek loop çalıştırır)
+_durum: dict = {}
+
+def _loop_durumu() -> dict:
+    loop = asyncio.get_running_loop()
+    d = _durum.get(id(loop))
+    if d is None or d["loop"] is not loop:
+        d = {
+            "loop": loop,
+            "istemci": httpx.AsyncClient(
+                headers=rag.HEADERS,
+                limits=httpx.Limits(max_connections=ASYNC_MAX_BAGLANTI,
+                                    max_keepalive_connections=ASYNC_MAX_BAGLANTI),
+                follow_redirects=True,
+            ),
+            "llm": asyncio.Semaphore(ASYNC_LLM_SINIR),
+            "web": asyncio.Semaphore(ASYNC_WEB_SINIR),
+        }
+        _durum[id(loop)] = d
+    return d
+
+async def istemci_kapat():
+    """Uygulama kapanırken (ASGI lifespan) çağrılır."""
+    d = _durum.pop(id(asyncio.get_running_loop()), None)
+    if d:
+        await d["istemci"].aclose()
+
+# ====== Async G/Ç yardımcıları ======
+async def _olculu_istek(yontem: str, url: str, sinir: str, **kw) -> httpx.Response:
+    """Async istek; metrikler senkron istemciyle aynı host sayaçlarına yazılır."""
+    d = _loop_durumu()
+    host = urlsplit(url).hostname or ""
+    async with d[sinir]:
+        baslangic = time.monotonic()
+        try:
+            r = await d["istemci"].request(yontem, url, **kw)
+        except httpx.HTTPError:
+            sweax_http.gozlem_kaydet(host, baslangic, hata=True)
+            raise
+    sweax_http.gozlem_kaydet(host, baslangic, hata=r.status_code >= 500)
+    return r
+
+async def _web_get(url: str, timeout: float, **kw) -> httpx.Response:
+    return await _olculu_istek("GET", url, "web", timeout=timeout, **kw)
+
+async def ollama_akis(mesajlar: list[dict], model: str, timeout: float = 60,
+                      oncelik: int = ai.ONCELIK_SOHBET, kullanici=None):
+    """
+    Ollama'ya stream=True ile istek atar, gelen parçaları (content) sırayla verir.
+    Senkron yolla aynı süreç içi zamanlayıcı (öncelik, adil pay, meşgulse MesgulHatasi);
+    slot akış bitene (ya da istemci kopana) kadar tutulur.
+    """
+    d = _loop_durumu()
+    veri = ai.YERLESIM.istek({"model": model, "messages": mesajlar, "stream": True})
+    host = urlsplit(ai.OLLAMA).hostname or ""
+    async with ai.LLM.izin_async(oncelik, kullanici), d["llm"]:
+        baslangic = time.monotonic()
+        try:
+            async with d["istemci"].stream("POST", ai.OLLAMA, json=veri, timeout=timeout) as r:
+                sweax_http.gozlem_kaydet(host, baslangic, hata=r.status_code >= 500)
+                baslangic = None
+                r.raise_for_status()
+                async for satir in r.aiter_lines():
+                    if not satir:
+                        continue
+                    parca = json.loads(satir)
+                    icerik = parca.get("message", {}).get("content", "")
+                    if icerik:
+                        yield icerik
+                    if parca.get("done"):
+                        ai.YERLESIM.yanit_isle(parca)  # son satırda load_duration var
+                        break
+        except httpx.HTTPError:
+            if baslangic is not None:  # yanıt başlıkları hiç gelmedi
+                sweax_http.gozlem_kaydet(host, baslangic, hata=True)
+            raise
+
+async def _wiki_summary_durumlu(term: str, lang: str) -> tuple[int | None, dict | None]:
+    url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{quote(term)}"
+    try:
+        r = await _web_get(url, timeout=10)
+        return (200, r.json()) if r.status_code == 200 else (r.status_code, None)
+    except Exception:
+        return None, None
+
+async def wiki_ozet_with_meta(konu: str, cumle: int = 6) -> dict | None:
+    """Önbellekte olmayan tr/en özetlerini aynı anda ister; tr varsa onu tercih eder."""
+    temiz = rag._wiki_terim_temizle(konu)
+    anahtarlar = [(temiz, lang, cumle) for lang in ("tr", "en")]
+    sonuclar = [rag._wiki_onbellek.al(a) for a in anahtarlar]
+    if sonuclar[0] is YOK or (not sonuclar[0] and sonuclar[1] is YOK):
+        eksik = [i for i, m in enumerate(sonuclar) if m is YOK]
+        yanitlar = await asyncio.gather(*(_wiki_summary_durumlu(temiz, anahtarlar[i][1]) for i in eksik))
+        for i, (durum, data) in zip(eksik, yanitlar):
+            sonuclar[i] = rag._wiki_sonuc_kaydet(anahtarlar[i], durum, data)
+    return next((m for m in sonuclar if m and m is not YOK), None)
+
+async def rag_cevap_uret(soru: str, model_cevap: str) -> str:
+    # Zenginleştirme (web sayfaları / Wikipedia → bilgi deposu) kalıcı görev kuyruğuna yazılır
+    return await asyncio.to_thread(rag.rag_cevap_uret, soru, model_cevap)
+
+# ====== Ana akış ======
+async def konus_akis_async(metin: str, kullanici_id: int | None = None):
+    """
+    konus_akis()'ın asyncio sürümü: ("parca", metin) olaylarını model ürettikçe, en sonda
+    kaydedilen nihai yanıtla ("son", yanit) olayını verir. Bağımsız G/Ç paralel yürür:
+    sohbet_id çözümü ile hazır cevaplar, geçmiş ile Wikipedia (tr+en) / web sonuçları.
+    """
+    sohbet_gorevi = asyncio.create_task(asyncio.to_thread(ai._sohbet_id_bul, kullanici_id))
+    niyet = ai.NIYETLER.yonlendir(metin)
+    yanit = await asyncio.to_thread(ai._hazir_cevap, metin, niyet)
+    sohbet_id = await sohbet_gorevi
+
+    async def kaydet(cevap: str):
+        await asyncio.to_thread(ai.mesaj_cifti_ekle, kullanici_id, metin, cevap, sohbet_id)
+
+    if yanit is not None:
+        await kaydet(yanit)
+        yield "son", yanit
+        return
+
+    # Geçmişi spekülatif olarak şimdiden çek; kaynaklı (Wikipedia / web) yola düşülürse kullanılmaz.
+    gecmis_gorevi = asyncio.create_task(asyncio.to_thread(ai.sohbet_baglami, sohbet_id, ai.PENCERE_MESAJ))
+
+    kaynakli = None
+    if niyet.ad == "guncel":
+        kaynakli = await asyncio.to_thread(ai._web_hazirla, metin)
+    elif ai._wiki_tetikle_mi(metin, niyet):
+        mode, fmt = ai._format_ayikla(metin)
+        konu = ai._konu_adi_bul(metin, fallback=None)
+        if konu:
+            meta = await wiki_ozet_with_meta(konu, cumle=ai._cumle_ayari(mode))
+            # Sonuç yoksa web sonuçları (senkron Serper/DDG) thread'de alınır
+            kaynakli = await asyncio.to_thread(ai._wiki_meta_isle, metin, meta)
+    if kaynakli:
+        gecmis_gorevi.cancel()
+        if "yanit" in kaynakli:
+            yanit = kaynakli["yanit"]
+        else:
+            oz = ""
+            try:
+                model = await asyncio.to_thread(ai._model_sec, metin, niyet)
+                async for parca in ollama_akis(kaynakli["mesajlar"], model, timeout=30,
+                                               oncelik=ai.ONCELIK_OZET, kullanici=kullanici_id):
+                    oz += parca
+                    yield "parca", parca
+            except Exception as e:
+                print("⚠️ Kaynaklı özetleme hatası:", e)
+                oz = ""
+            yanit = ai._kaynakli_yanit(kaynakli, oz)
+        await kaydet(yanit)
+        yield "son", yanit
+        return
+
+    son = await gecmis_gorevi
+    mesajlar = ai._sohbet_mesajlari(metin, sohbet_id, gecmis=son)
+    model = await asyncio.to_thread(ai._model_sec, metin, niyet)  # /api/ps sorabilir
+    kapsam = ai._cevap_kapsami(mesajlar, kullanici_id, sohbet_id)
+    yanit = await asyncio.to_thread(ai.CEVAPLAR.al, metin, model, **kapsam)
+    if yanit is not None:
+        await kaydet(yanit)
+        yield "son", yanit
+        return
+
+    model_cevap = ""
+    basarili = False
+    try:
+        async for parca in ollama_akis(mesajlar, model, timeout=60, kullanici=kullanici_id):
+            parca = ai._turkce_filtrele(parca)
+            model_cevap += parca
+            yield "parca", parca
+        basarili = True
+    except ai.MesgulHatasi:
+        raise  # route 429 döndürür; mesaj kaydedilmez
+    except httpx.HTTPError as hata:
+        print("🌐 Bağlantı hatası:", hata)
+        model_cevap = model_cevap or "🌐 Model bağlantısı başarısız (Render tüneline ulaşılamadı)."
+    except Exception as e:
+        print("🔥 Genel hata:", e)
+        model_cevap = model_cevap or f"⚠️ Beklenmedik hata: {e}"
+
+    # 🧩 RAG destekli çıktı
+    yanit = await rag_cevap_uret(metin, model_cevap)
+    await kaydet(yanit)
+    if basarili:
+        await asyncio.to_thread(ai.CEVAPLAR.koy, metin, model, yanit, ttl=ai._cevap_ttl(metin), **kapsam)
+    yield "son", yanit
+
+async def konus_async(metin: str, kullanici_id: int | None = None) -> str:
+    """konus() ile aynı sözleşme: akış tüketilir, kaydedilen nihai yanıt döner."""
+    yanit = ""
+    async for tur, icerik in konus_akis_async(metin, kullanici_id):
+        if tur == "son":
+            yanit = icerik
+    return yanit
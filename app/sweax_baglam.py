@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+# sweax_baglam.py — Sohbet bağlamı önbelleği: sohbet başına son N mesaj + kullanıcı başına aktif sohbet
+# Yazma yolu (mesaj_cifti_ekle / yeni_sohbet_olustur) önbelleği günceller; sıcak bir sohbette
+# tur başına MySQL'e okuma sorgusu gitmez.
+#
+# Varsayılan: yalnızca SWEAX_CONTEXT_DB (worker'lar arası paylaşılan SQLite) verilmişse açık.
+# Süreç içi LRU (SWEAX_CONTEXT_CACHE=1, SWEAX_CONTEXT_DB yok) yalnızca tek worker için güvenli:
+# gunicorn -w N altında bir worker'ın önbelleği diğerinin yazdığı turları ve açtığı sohbeti
+# görmez, eski geçmişi sunar ve yeni mesajı yanlış sohbete bağlayabilir.
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+BAGLAM_DB    = os.environ.get("SWEAX_CONTEXT_DB")                        # paylaşılan mod (SQLite dosyası)
+BAGLAM_ACIK  = os.environ.get("SWEAX_CONTEXT_CACHE", "1" if BAGLAM_DB else "0") == "1"
+BAGLAM_N     = int(os.environ.get("SWEAX_CONTEXT_MESSAGES", "20"))      # sohbet başına tutulan son mesaj
+BAGLAM_BOYUT = int(os.environ.get("SWEAX_CONTEXT_CACHE_SIZE", "1000"))  # en fazla sohbet / kullanıcı
+
+_isabet = metrik.sayac("baglam_isabet")  # etiket: aktif / mesaj
+_iska = metrik.sayac("baglam_iska")
+
+
+class _BellekDepo:
+    """
+    Süreç içi, thread-safe; en uzun süre dokunulmayan sohbetler / kullanıcılar atılır.
+    Yalnızca tek worker'lı kurulumlar için (bkz. dosya başı).
+    """
+
+    def __init__(self, boyut: int):
+        self.boyut = boyut
+        self._aktif: "OrderedDict[object, int]" = OrderedDict()
+        self._mesajlar: "OrderedDict[object, list]" = OrderedDict()
+        self._kilit = threading.Lock()
+
+    @staticmethod
+    def _koy(sozluk: OrderedDict, anahtar, deger, boyut: int):
+        sozluk[anahtar] = deger
+        sozluk.move_to_end(anahtar)
+        while len(sozluk) > boyut:
+            sozluk.popitem(last=False)
+
+    def aktif_al(self, kullanici_id):
+        with self._kilit:
+            sohbet_id = self._aktif.get(kullanici_id)
+            if sohbet_id is not None:
+                self._aktif.move_to_end(kullanici_id)
+            return sohbet_id
+
+    def aktif_koy(self, kullanici_id, sohbet_id):
+        with self._kilit:
+            self._koy(self._aktif, kullanici_id, sohbet_id, self.boyut)
+
+    def aktif_sil(self, kullanici_id):
+        with self._kilit:
+            self._aktif.pop(kullanici_id, None)
+
+    def mesajlar_al(self, sohbet_id):
+        with self._kilit:
+            mesajlar = self._mesajlar.get(sohbet_id)
+            if mesajlar is None:
+                return None
+            self._mesajlar.move_to_end(sohbet_id)
+            return list(mesajlar)
+
+    def mesajlar_koy(self, sohbet_id, mesajlar: list, n: int):
+        with self._kilit:
+            self._koy(self._mesajlar, sohbet_id, list(mesajlar[-n:]), self.boyut)
+
+    def mesaj_ekle(self, sohbet_id, yeniler: list, n: int):
+        with self._kilit:
+            mesajlar = self._mesajlar.get(sohbet_id)
+            if mesajlar is None:
+                return  # önbellekte değilse ilk okumada DB'den doldurulur
+            mesajlar.extend(yeniler)
+            del mesajlar[:-n]
+            self._mesajlar.move_to_end(sohbet_id)
+
+    def sohbet_sil(self, sohbet_id):
+        with self._kilit:
+            self._mesajlar.pop(sohbet_id, None)
+            for k in [k for k, v in self._aktif.items() if v == sohbet_id]:
+                del self._aktif[k]
+
+
+class _SqliteDepo:
+    """Worker'lar arası paylaşılan mod; oku-değiştir-yaz adımları BEGIN IMMEDIATE ile atomik."""
+
+    TEMIZLE_HER = 200  # bu kadar yazmada bir, en eski erişilenler boyut sınırına indirilir
+
+    def __init__(self, yol: str, boyut: int):
+        self.yol = yol
+        self.boyut = boyut
+        self._yerel = threading.local()
+        self._yazma = 0
+        conn = self._baglanti()
+        conn.execute("CREATE TABLE IF NOT EXISTS baglam_aktif (kullanici TEXT PRIMARY KEY, sohbet INTEGER, erisim REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS baglam_mesaj (sohbet TEXT PRIMARY KEY, mesajlar TEXT, erisim REAL)")
+
+    def _baglanti(self) -> sqlite3.Connection:
+        # Thread ve süreç (fork) başına ayrı bağlantı
+        conn = getattr(self._yerel, "conn", None)
+        if conn is None or self._yerel.pid != os.getpid():
+            conn = sqlite3.connect(self.yol, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._yerel.conn, self._yerel.pid = conn, os.getpid()
+        return conn
+
+    def _yazildi(self, conn):
+        self._yazma += 1
+        if self._yazma % self.TEMIZLE_HER == 0:
+            for tablo in ("baglam_aktif", "baglam_mesaj"):
+                conn.execute(f"DELETE FROM {tablo} WHERE erisim < (SELECT erisim FROM {tablo} "
+                             f"ORDER BY erisim DESC LIMIT 1 OFFSET ?)", (self.boyut,))
+
+    def aktif_al(self, kullanici_id):
+        row = self._baglanti().execute("SELECT sohbet FROM baglam_aktif WHERE kullanici=?",
+                                       (str(kullanici_id),)).fetchone()
+        return row[0] if row else None
+
+    def aktif_koy(self, kullanici_id, sohbet_id):
+        conn = self._baglanti()
+        conn.execute("INSERT OR REPLACE INTO baglam_aktif VALUES (?, ?, ?)", (str(kullanici_id), sohbet_id, time.time()))
+        self._yazildi(conn)
+
+    def aktif_sil(self, kullanici_id):
+        self._baglanti().execute("DELETE FROM baglam_aktif WHERE kullanici=?", (str(kullanici_id),))
+
+    def mesajlar_al(self, sohbet_id):
+        row = self._baglanti().execute("SELECT mesajlar FROM baglam_mesaj WHERE sohbet=?",
+                                       (str(sohbet_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def mesajlar_koy(self, sohbet_id, mesajlar: list, n: int):
+        conn = self._baglanti()
+        conn.execute("INSERT OR REPLACE INTO baglam_mesaj VALUES (?, ?, ?)",
+                     (str(sohbet_id), json.dumps(mesajlar[-n:], ensure_ascii=False), time.time()))
+        self._yazildi(conn)
+
+    def mesaj_ekle(self, sohbet_id, yeniler: list, n: int):
+        conn = self._baglanti()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT mesajlar FROM baglam_mesaj WHERE sohbet=?", (str(sohbet_id),)).fetchone()
+            if row:
+                mesajlar = (json.loads(row[0]) + yeniler)[-n:]
+                conn.execute("UPDATE baglam_mesaj SET mesajlar=?, erisim=? WHERE sohbet=?",
+                             (json.dumps(mesajlar, ensure_ascii=False), time.time(), str(sohbet_id)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def sohbet_sil(self, sohbet_id):
+        conn = self._baglanti()
+        conn.execute("DELETE FROM baglam_mesaj WHERE sohbet=?", (str(sohbet_id),))
+        conn.execute("DELETE FROM baglam_aktif WHERE sohbet=?", (sohbet_id,))
+
+
+class _KapaliDepo:
+    """SWEAX_CONTEXT_CACHE=0: her okuma ıska, yazmalar yok sayılır."""
+
+    def aktif_al(self, kullanici_id):
+        return None
+
+    def mesajlar_al(self, sohbet_id):
+        return None
+
+    def aktif_koy(self, *args):
+        pass
+
+    aktif_sil = mesajlar_koy = mesaj_ekle = sohbet_sil = aktif_koy
+
+
+class BaglamOnbellegi:
+    """
+    Okuma yolu: aktif_sohbet / son_mesajlar (ıskada None → çağıran DB'den doldurur).
+    Yazma yolu: mesajlar_eklendi / sohbet_acildi / sohbet_gecersiz.
+    Önbellek hatası isteği asla düşürmez: ıska gibi davranılır.
+    """
+
+    def __init__(self, n: int = BAGLAM_N, boyut: int = BAGLAM_BOYUT, sqlite_yolu: str | None = BAGLAM_DB,
+                 acik: bool = BAGLAM_ACIK):
+        self.n = n
+        self._depo = _BellekDepo(boyut) if acik and not sqlite_yolu else _KapaliDepo()
+        if acik and sqlite_yolu:
+            try:
+                self._depo = _SqliteDepo(sqlite_yolu, boyut)
+            except Exception as e:
+                # Süreç içi moda düşülmez: çok worker'da bayat geçmiş sunardı
+                print(f"⚠️ Bağlam önbelleği SQLite açılamadı ({sqlite_yolu}), önbellek kapalı: {e}")
+
+    def _guvenli(self, islem, *args):
+        try:
+            return islem(*args)
+        except Exception as e:
+            print(f"⚠️ Bağlam önbelleği hatası: {e}")
+            return None
+
+    # ---- okuma ----
+    def aktif_sohbet(self, kullanici_id):
+        sohbet_id = self._guvenli(self._depo.aktif_al, kullanici_id)
+        (_isabet if sohbet_id is not None else _iska).artir("aktif")
+        return sohbet_id
+
+    def son_mesajlar(self, sohbet_id, limit: int) -> list | None:
+        """Önbellekte varsa son `limit` mesaj; limit N'den büyükse hep ıska (eksik olabilir)."""
+        mesajlar = self._guvenli(self._depo.mesajlar_al, sohbet_id) if limit <= self.n else None
+        if mesajlar is None:
+            _iska.artir("mesaj")
+            return None
+        _isabet.artir("mesaj")
+        return mesajlar[-limit:] if limit else []
+
+    # ---- doldurma / yazma ----
+    def aktif_ayarla(self, kullanici_id, sohbet_id):
+        self._guvenli(self._depo.aktif_koy, kullanici_id, sohbet_id)
+
+    def mesajlari_doldur(self, sohbet_id, mesajlar: list[dict]):
+        """DB'den okunan son mesajlar (eskiden yeniye) — yalnızca role/content/token_count tutulur."""
+        self._guvenli(self._depo.mesajlar_koy, sohbet_id,
+                      [{"role": m["role"], "content": m["content"], "token_count": m.get("token_count")}
+                       for m in mesajlar], self.n)
+
+    def mesajlar_eklendi(self, kullanici_id, sohbet_id, mesajlar: list[dict]):
+        """Kalıcılık yolu yazdıktan (ya da kuyruğa koyduktan) sonra: sohbet en güncel olur."""
+        self._guvenli(self._depo.mesaj_ekle, sohbet_id, mesajlar, self.n)
+        if kullanici_id:
+            self._guvenli(self._depo.aktif_koy, kullanici_id, sohbet_id)
+
+    def sohbet_acildi(self, kullanici_id, sohbet_id):
+        """Yeni sohbet: boş bağlam ve kullanıcının aktif sohbeti."""
+        self._guvenli(self._depo.mesajlar_koy, sohbet_id, [], self.n)
+        self._guvenli(self._depo.aktif_koy, kullanici_id, sohbet_id)
+
+    def sohbet_gecersiz(self, sohbet_id=None, kullanici_id=None):
+        """Sohbet adı değişti / arşivlendi / silindi: bir sonraki okuma DB'den."""
+        if sohbet_id is not None:
+            self._guvenli(self._depo.sohbet_sil, sohbet_id)
+        if kullanici_id is not None:
+            self._guvenli(self._depo.aktif_sil, kullanici_id)
+
+
+BAGLAM = BaglamOnbellegi()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# sweax_bm25.py — Hafif mod için ters indeks + BM25 (konu + içerik)
+# Sorgu maliyeti derlem boyutuyla değil, sorgu terimlerinin posting listeleriyle ölçeklenir.
+import os
+import re
+import math
+import heapq
+import pickle
+from array import array
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+KONU_AGIRLIK = 2  # konu alanındaki terimler içerikteki terimlerden ağır basar
+
+# Sık geçen, ayırt edici olmayan kelimeler
+DURAK_KELIMELER = {
+    "ve", "veya", "ile", "bir", "bu", "şu", "o", "da", "de", "ki", "mi", "mı", "mu", "mü",
+    "ne", "nedir", "kimdir", "nasıl", "neden", "için", "gibi", "çok", "daha", "en", "olan",
+    "olarak", "ise", "hem", "ama", "fakat", "her", "kadar", "sonra", "önce",
+}
+
+# Uzundan kısaya; kök en az KOK_MIN harf kalacak şekilde en fazla EK_TUR ek atılır
+EKLER = sorted({
+    "lerinden", "larından", "lerinde", "larında", "lerini", "larını", "lerine", "larına",
+    "leri", "ları", "ler", "lar",
+    "nın", "nin", "nun", "nün", "ın", "in", "un", "ün",
+    "dan", "den", "tan", "ten", "nda", "nde", "da", "de", "ta", "te",
+    "yla", "yle", "la", "le", "ya", "ye", "na", "ne",
+    "yı", "yi", "yu", "yü", "ı", "i", "u", "ü", "a", "e",
+    "dır", "dir", "dur", "dür", "tır", "tir", "tur", "tür",
+}, key=len, reverse=True)
+KOK_MIN = 3
+EK_TUR = 3
+
+_kelime = re.compile(r"[0-9a-zçğıöşü]+")
+
+
+def turkce_kucult(metin: str) -> str:
+    """Türkçe büyük/küçük harf: I → ı, İ → i (str.lower 'İ'yi 'i̇' yapar)."""
+    return metin.replace("I", "ı").replace("İ", "i").lower()
+
+
+def kok_bul(kelime: str) -> str:
+    """Basit ek atma: "kedilerin" → "kediler" → "kedi"."""
+    for _ in range(EK_TUR):
+        for ek in EKLER:
+            if kelime.endswith(ek) and len(kelime) - len(ek) >= KOK_MIN:
+                kelime = kelime[:-len(ek)]
+                break
+        else:
+            break
+    return kelime
+
+
+def tokenlara_ayir(metin: str) -> list[str]:
+    # "İstanbul'un" → "istanbul": kesme işaretinden sonrası ektir
+    metin = re.sub(r"['’][a-zçğıöşü]+", "", turkce_kucult(metin))
+    # Klavyeden "Istanbul" / "istanbul" diye yazılanlar eşleşsin: ı → i katlanır
+    return [kok_bul(k).replace("ı", "i") for k in _kelime.findall(metin) if k not in DURAK_KELIMELER]
+
+
+class BM25Indeks:
+    """
+    Artımlı ters indeks. posting: terim → (doc_id array, tf array).
+    doc_id'ler bilgi deposundaki kayıt sırasıdır.
+    """
+
+    SURUM = 1
+
+    def __init__(self, yol: str):
+        self.yol = yol
+        self.sifirla()
+
+    def sifirla(self):
+        self.postings: dict[str, tuple[array, array]] = {}
+        self.uzunluklar = array("I")
+        self.toplam_uzunluk = 0
+
+    def sayi(self) -> int:
+        return len(self.uzunluklar)
+
+    def ekle(self, konu: str, icerik: str):
+        doc_id = len(self.uzunluklar)
+        tf: dict[str, int] = {}
+        for t in tokenlara_ayir(konu):
+            tf[t] = tf.get(t, 0) + KONU_AGIRLIK
+        for t in tokenlara_ayir(icerik):
+            tf[t] = tf.get(t, 0) + 1
+        for t, n in tf.items():
+            p = self.postings.get(t)
+            if p is None:
+                p = self.postings[t] = (array("I"), array("I"))
+            p[0].append(doc_id)
+            p[1].append(n)
+        uzunluk = sum(tf.values())
+        self.uzunluklar.append(uzunluk)
+        self.toplam_uzunluk += uzunluk
+
+    def ara(self, soru: str, top_k: int, min_skor: float = 0.0) -> list[int]:
+        n = self.sayi()
+        if not n:
+            return []
+        ort = self.toplam_uzunluk / n or 1.0
+        skorlar: dict[int, float] = {}
+        for t in set(tokenlara_ayir(soru)):
+            p = self.postings.get(t)
+            if p is None:
+                continue
+            df = len(p[0])
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in zip(p[0], p[1]):
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.uzunluklar[doc_id] / ort)
+                skorlar[doc_id] = skorlar.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        en_iyi = heapq.nlargest(top_k, skorlar.items(), key=lambda x: (x[1], x[0]))
+        return [doc_id for doc_id, skor in en_iyi if skor >= min_skor]
+
+    # ---- kalıcılık ----
+    def yukle(self):
+        if not os.path.exists(self.yol):
+            self.sifirla()
+            return
+        with open(self.yol, "rb") as f:
+            veri = pickle.load(f)
+        if veri.get("surum") != self.SURUM:
+            self.sifirla()
+            return
+        self.postings = veri["postings"]
+        self.uzunluklar = veri["uzunluklar"]
+        self.toplam_uzunluk = sum(self.uzunluklar)
+
+    def yaz(self, yol: str):
+        with open(yol, "wb") as f:
+            pickle.dump({"surum": self.SURUM, "postings": self.postings, "uzunluklar": self.uzunluklar},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
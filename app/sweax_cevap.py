@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# sweax_cevap.py — Genel LLM yolu için cevap önbelleği
+# Aynı (ya da çok benzer) bağımsız soruya tekrar 7B üretimi yapılmaz:
+#   1) normalize soru + model ile tam eşleşme (TTL + LRU, SWEAX_CACHE_DB ile worker'lar arası paylaşılır)
+#   2) opsiyonel (varsayılan kapalı): gömme benzerliği ≥ SWEAX_ANSWER_SIMILARITY olan önceki soru
+#      (model zaten yüklüyse). "Fransa'nın başkenti" ile "Almanya'nın başkenti" gibi neredeyse aynı
+#      cümleler eşiği geçebildiği için sayılar ve özel adlar (varliklar) ayrıca birebir tutmalı.
+#
+# Gizlilik: istemde sohbet geçmişi olan cevaplar yalnızca o sohbete (kapsam) yazılır ve
+# başka kullanıcıya hiç verilmez. Genel önbellek sadece geçmişsiz istemlerin cevaplarını tutar;
+# geçmişi olan bir sohbette ondan okumak için soru da bağlama atıf içermemeli (bagimsiz_mi).
+# Bağlama atıf yapan sorular ("devam et", "daha fazla anlat") geçmişli sohbette hiç önbelleğe
+# girmez; kapsam anahtarı ayrıca istemdeki geçmişin özetini (gecmis_ozeti) içerir.
+import os
+import re
+import json
+import hashlib
+import threading
+import importlib
+from collections import OrderedDict
+
+try:
+    import app.sweax_metrik as metrik
+    from app.sweax_onbellek import Onbellek, YOK
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+    from sweax_onbellek import Onbellek, YOK
+
+CEVAP_ACIK       = os.environ.get("SWEAX_ANSWER_CACHE", "1") == "1"
+CEVAP_TTL        = float(os.environ.get("SWEAX_ANSWER_TTL", "86400"))
+CEVAP_GUNCEL_TTL = float(os.environ.get("SWEAX_ANSWER_CURRENT_TTL", "300"))   # zamana bağlı sorular
+CEVAP_BOYUT      = int(os.environ.get("SWEAX_ANSWER_CACHE_SIZE", "2048"))
+CEVAP_BENZERLIK  = float(os.environ.get("SWEAX_ANSWER_SIMILARITY", "0"))      # 0: kapalı; örn. 0.92 ile açılır
+
+_sonuc = metrik.sayac("cevap_onbellek")  # etiket: tam / benzer / kapsam / iska / yazildi
+
+# Bağlama atıf yapan kelimeler: bunlar varsa soru tek başına anlamlı sayılmaz
+_ATIF = frozenset("""
+bu bunu bunun buna bunda bunlar bunları şu şunu şunun o onu onun ona onda onlar onları
+peki ya devam devamı önceki yukarıdaki aynı başka tekrar daha yine bunlardan hangisi
+""".split())
+_DOLGU = frozenset("acaba lütfen bana söyler misin misiniz söyle".split())
+_kesme = re.compile(r"['’]\w*")          # İstanbul'un → İstanbul
+_noktalama = re.compile(r"[^\w\s]")
+_sayi = re.compile(r"\d+(?:[.,]\d+)*")
+_kelime = re.compile(r"[^\W\d_][\w'’]*")
+
+
+def normalize(metin: str) -> str:
+    """Türkçe küçük harf, kesme ekleri / noktalama / dolgu kelimeleri atılmış soru."""
+    s = metin.replace("I", "ı").replace("İ", "i").lower()
+    s = _noktalama.sub(" ", _kesme.sub("", s))
+    return " ".join(k for k in s.split() if k not in _DOLGU)
+
+
+def varliklar(metin: str) -> frozenset:
+    """Benzer eşleşmede birebir tutması gereken parçalar: sayılar, büyük harfli / kesme ekli kelimeler."""
+    bulunan = set(_sayi.findall(metin))
+    for k in _kelime.findall(metin):
+        if k[0].isupper() or "'" in k or "’" in k:
+            bulunan.add(normalize(k))
+    bulunan.discard("")
+    return frozenset(bulunan)
+
+
+def bagimsiz_mi(metin: str) -> bool:
+    """Soru önceki mesajlara atıf yapmıyor mu (genel önbellekten cevaplanabilir mi)?"""
+    return _ATIF.isdisjoint(normalize(metin).split())
+
+
+def gecmis_ozeti(mesajlar: list[dict]) -> str:
+    """İstemdeki geçmişin (sistem ve yeni mesaj hariç) kısa özeti; kapsam anahtarına girer."""
+    gecmis = [(m["role"], m["content"]) for m in mesajlar[1:-1]]
+    return hashlib.sha1(json.dumps(gecmis, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class _BenzerlikIndeksi:
+    """
+    Model başına normalize soru vektörleri; LRU ile sınırlı, kaba kuvvet kosinüs (birkaç bin satır).
+    Eşiği geçen adaylardan yalnızca varlıkları (sayı / özel ad) aynı olan kabul edilir.
+    """
+
+    def __init__(self, np, boyut: int):
+        self.np = np
+        self.boyut = boyut
+        self._modeller: dict = {}   # model → OrderedDict[soru, (vektör, varlıklar)]
+        self._matrisler: dict = {}  # model → (sorular, varlıklar, matris) — değişince yeniden kurulur
+        self._kilit = threading.Lock()
+
+    def _vektor(self, v):
+        v = self.np.asarray(v, dtype=self.np.float32).reshape(-1)
+        return v / max(float(self.np.linalg.norm(v)), 1e-12)
+
+    def ekle(self, model: str, soru: str, vektor, varlik: frozenset = frozenset()):
+        with self._kilit:
+            sorular = self._modeller.setdefault(model, OrderedDict())
+            sorular[soru] = (self._vektor(vektor), varlik)
+            sorular.move_to_end(soru)
+            while len(sorular) > self.boyut:
+                sorular.popitem(last=False)
+            self._matrisler.pop(model, None)
+
+    def sil(self, model: str, soru: str):
+        with self._kilit:
+            if self._modeller.get(model, {}).pop(soru, None) is not None:
+                self._matrisler.pop(model, None)
+
+    def ara(self, model: str, vektor, esik: float, varlik: frozenset = frozenset()) -> str | None:
+        with self._kilit:
+            sorular = self._modeller.get(model)
+            if not sorular:
+                return None
+            hazir = self._matrisler.get(model)
+            if hazir is None:
+                hazir = self._matrisler[model] = (list(sorular), [v for _, v in sorular.values()],
+                                                  self.np.stack([v for v, _ in sorular.values()]))
+        anahtarlar, varlik_listesi, matris = hazir
+        skor = matris @ self._vektor(vektor)
+        adaylar = self.np.flatnonzero(skor >= esik)
+        for i in adaylar[self.np.argsort(-skor[adaylar])]:
+            if varlik_listesi[i] == varlik:
+                return anahtarlar[i]
+        return None
+
+
+class CevapOnbellegi:
+    """
+    al(...) / koy(...) — `gecmis_var`: istemde sohbet geçmişi var mıydı,
+    `kapsam`: geçmişli cevapların bağlı kaldığı sohbet (örn. (kullanici_id, sohbet_id, gecmis_ozeti)).
+    Bağlama atıf yapan sorular geçmişli istemde ne okunur ne yazılır.
+    `gomme_al()` hazır bir gömme modeli ya da None döndürür (yükleme beklenmez).
+    """
+
+    def __init__(self, gomme_al=None, boyut: int = CEVAP_BOYUT, ttl: float = CEVAP_TTL,
+                 benzerlik: float = CEVAP_BENZERLIK, acik: bool = CEVAP_ACIK, onbellek: Onbellek | None = None):
+        self.gomme_al = gomme_al
+        self.benzerlik = benzerlik
+        self.acik = acik
+        self.onbellek = onbellek or Onbellek("cevap", boyut=boyut, ttl=ttl)
+        self._indeks = None
+        if acik and gomme_al is not None and benzerlik > 0:
+            try:
+                self._indeks = _BenzerlikIndeksi(importlib.import_module("numpy"), boyut)
+            except ImportError:
+                pass
+
+    def _gomme(self, soru: str):
+        if self._indeks is None:
+            return None
+        try:
+            model = self.gomme_al()
+            return model.encode([soru])[0] if model is not None else None
+        except Exception as e:
+            print(f"⚠️ Cevap önbelleği gömme hatası: {e}")
+            return None
+
+    def al(self, metin: str, model: str, gecmis_var: bool = False, kapsam=None) -> str | None:
+        if not self.acik:
+            return None
+        soru = normalize(metin)
+        if not soru:
+            return None
+        if gecmis_var and not bagimsiz_mi(metin):
+            _sonuc.artir("iska")  # "devam et" gibi: aynı cevap sohbeti ilerletmez
+            return None
+        if kapsam is not None:
+            cevap = self.onbellek.al(("kapsam", model, kapsam, soru))
+            if cevap is not YOK:
+                _sonuc.artir("kapsam")
+                return cevap
+
+        cevap = self.onbellek.al(("genel", model, soru))
+        if cevap is not YOK:
+            _sonuc.artir("tam")
+            return cevap
+        vektor = self._gomme(soru)
+        if vektor is not None:
+            benzer = self._indeks.ara(model, vektor, self.benzerlik, varliklar(metin))
+            if benzer is not None:
+                cevap = self.onbellek.al(("genel", model, benzer))
+                if cevap is not YOK:
+                    _sonuc.artir("benzer")
+                    return cevap
+                self._indeks.sil(model, benzer)  # süresi dolmuş / atılmış
+        _sonuc.artir("iska")
+        return None
+
+    def koy(self, metin: str, model: str, cevap: str, gecmis_var: bool = False, kapsam=None,
+            ttl: float | None = None):
+        if not self.acik or not cevap:
+            return
+        soru = normalize(metin)
+        if not soru:
+            return
+        if gecmis_var:
+            # Geçmişe dayanmış olabilir: sadece aynı sohbete, bağlama atıf yapmıyorsa
+            if kapsam is not None and bagimsiz_mi(metin):
+                self.onbellek.koy(("kapsam", model, kapsam, soru), cevap, ttl=ttl)
+                _sonuc.artir("yazildi")
+            return
+        self.onbellek.koy(("genel", model, soru), cevap, ttl=ttl)
+        _sonuc.artir("yazildi")
+        vektor = self._gomme(soru)
+        if vektor is not None:
+            self._indeks.ekle(model, soru, vektor, varliklar(metin))
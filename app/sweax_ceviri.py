@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# sweax_ceviri.py — DeepL çevirisi: süreç başına tek istemci, cümle bazlı önbellek, toplu istek
+# Çok cümleli metinlerde yalnızca önbellekte olmayan cümleler tek translate_text çağrısıyla gönderilir;
+# tekrar eden ifadeler yeniden çevrilip faturalanmaz.
+# SWEAX_TRANSLATOR=yerel → ağa çıkmayan yerel sahte çevirmen (test / geliştirme).
+import os
+import re
+import threading
+
+try:
+    import app.sweax_metrik as metrik
+    from app.sweax_onbellek import Onbellek, YOK
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+    from sweax_onbellek import Onbellek, YOK
+
+CEVIRMEN     = os.environ.get("SWEAX_TRANSLATOR", "deepl")   # deepl | yerel
+CEVIRI_TTL   = float(os.environ.get("SWEAX_TRANSLATE_TTL", str(7 * 86400)))
+CEVIRI_BOYUT = int(os.environ.get("SWEAX_TRANSLATE_CACHE_SIZE", "2048"))
+
+_karakter = metrik.sayac("ceviri_karakter")  # etiket: gonderilen (faturalanan) / onbellek
+_istek = metrik.sayac("ceviri_istek")        # etiket: hedef dil
+
+_cumle_sonu = re.compile(r"(?<=[.!?])\s+")
+
+
+def normalize(metin: str) -> str:
+    return " ".join(metin.split())
+
+
+def cumlelere_bol(metin: str) -> list[str]:
+    return [c for c in _cumle_sonu.split(normalize(metin)) if c]
+
+
+class _Sonuc:
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class YerelCevirmen:
+    """deepl.Translator.translate_text'in ağsız yerine geçeni: metni hedef etiketiyle döndürür."""
+
+    def __init__(self):
+        self.cagri = 0
+
+    def translate_text(self, text, target_lang: str, **kw):
+        self.cagri += 1
+        if isinstance(text, str):
+            return _Sonuc(f"[{target_lang}] {text}")
+        return [_Sonuc(f"[{target_lang}] {t}") for t in text]
+
+
+class Cevirmen:
+    """
+    Cümle başına (normalize metin, hedef dil) anahtarlı TTL + LRU önbellek;
+    eksik cümleler tek translate_text çağrısında liste olarak gönderilir.
+    """
+
+    def __init__(self, istemci_al, onbellek: Onbellek | None = None):
+        self.istemci_al = istemci_al
+        self.onbellek = onbellek or Onbellek("ceviri", boyut=CEVIRI_BOYUT, ttl=CEVIRI_TTL)
+
+    def cevir(self, metin: str, hedef: str) -> str:
+        cumleler = cumlelere_bol(metin)
+        if not cumleler:
+            raise ValueError("çevrilecek metin boş")
+        ceviriler = [self.onbellek.al((c, hedef)) for c in cumleler]
+        eksik = list(dict.fromkeys(c for c, t in zip(cumleler, ceviriler) if t is YOK))
+        _karakter.artir("onbellek", sum(len(c) for c, t in zip(cumleler, ceviriler) if t is not YOK))
+
+        if eksik:
+            _istek.artir(hedef)
+            _karakter.artir("gonderilen", sum(len(c) for c in eksik))
+            sonuclar = self.istemci_al().translate_text(eksik, target_lang=hedef)
+            yeni = {c: s.text for c, s in zip(eksik, sonuclar)}
+            for c, t in yeni.items():
+                self.onbellek.koy((c, hedef), t)
+            ceviriler = [yeni[c] if t is YOK else t for c, t in zip(cumleler, ceviriler)]
+        return " ".join(ceviriler)
+
+
+# Süreç başına tek istemci (deepl.Translator içindeki HTTP oturumu yeniden kullanılır)
+_istemci = None
+_istemci_pid = None
+_kilit = threading.Lock()
+_anahtar = None
+
+
+def ayarla(anahtar: str):
+    """DeepL API anahtarını verir; istemci ilk çeviride kurulur."""
+    global _anahtar
+    _anahtar = anahtar
+
+
+def istemci_ayarla(istemci):
+    """Testlerde / yerel geliştirmede istemciyi elle vermek için."""
+    global _istemci, _istemci_pid
+    with _kilit:
+        _istemci, _istemci_pid = istemci, os.getpid()
+
+
+def _istemci_al():
+    global _istemci, _istemci_pid
+    if _istemci is None or _istemci_pid != os.getpid():
+        with _kilit:
+            if _istemci is None or _istemci_pid != os.getpid():
+                if CEVIRMEN == "yerel":
+                    _istemci = YerelCevirmen()
+                else:
+                    import deepl
+                    _istemci = deepl.Translator(_anahtar)
+                _istemci_pid = os.getpid()
+    return _istemci
+
+
+_cevirmen = Cevirmen(_istemci_al)
+
+
+def cevir(metin: str, hedef: str) -> str:
+    return _cevirmen.cevir(metin, hedef)
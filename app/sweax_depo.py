@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# sweax_depo.py — Bilgi deposu: yerel SQLite tablosu (eski bilgi_deposu.json yerine)
+# Ekleme O(1) tek INSERT; WAL sayesinde çökmeye dayanıklı ve çok süreçli güvenli.
+# Kayıtlar id ile, hepsini belleğe almadan okunur; aynı içerik (özet) ikinci kez eklenmez.
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+# PRAGMA user_version: 1 = JSON'dan taşıma yapıldı, 2 = içerik özeti (tekrar eleme) sütunu,
+# 3 = indeksli normalize konu sütunu (konu_gecenler)
+SURUM = 3
+KONU_MAX_KELIME = 6  # konu_gecenler'de sorudan denenen en uzun kelime dizisi
+
+_kelime = re.compile(r"\w+")
+
+
+def icerik_ozeti(icerik: str) -> str:
+    """Tekrar eleme anahtarı: boşlukları normalize edilmiş içeriğin SHA-1'i."""
+    return hashlib.sha1(" ".join(icerik.split()).encode("utf-8")).hexdigest()
+
+
+def konu_anahtari(metin: str) -> str:
+    """Küçük harf, noktalamasız kelimeler: "Atatürk'ün Hayatı" → "atatürk ün hayatı"."""
+    return " ".join(_kelime.findall(metin.replace("I", "ı").replace("İ", "i").lower()))
+
+
+class BilgiDeposu:
+    def __init__(self, yol: str, json_yolu: str | None = None):
+        self.yol = yol
+        self._yerel = threading.local()
+        conn = self._baglanti()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bilgi (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                konu TEXT NOT NULL,
+                icerik TEXT NOT NULL,
+                eklenme REAL NOT NULL,
+                ozet TEXT,
+                konu_anahtar TEXT
+            )
+        """)
+        self._tasi(json_yolu)
+
+    def _baglanti(self) -> sqlite3.Connection:
+        # Thread ve süreç (fork) başına ayrı bağlantı
+        conn = getattr(self._yerel, "conn", None)
+        if conn is None or self._yerel.pid != os.getpid():
+            conn = sqlite3.connect(self.yol, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._yerel.conn, self._yerel.pid = conn, os.getpid()
+        return conn
+
+    def _tasi(self, json_yolu: str | None):
+        """Tek seferlik şema adımları (worker'lar arası kilitli)."""
+        conn = self._baglanti()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SURUM:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            surum = conn.execute("PRAGMA user_version").fetchone()[0]
+            if surum < 1:
+                self._json_tasi(conn, json_yolu)
+            if surum < 2:
+                # Eski tablolara özet sütunu eklenir, mevcut kayıtlar için hesaplanır
+                if "ozet" not in {r[1] for r in conn.execute("PRAGMA table_info(bilgi)")}:
+                    conn.execute("ALTER TABLE bilgi ADD COLUMN ozet TEXT")
+                conn.executemany(
+                    "UPDATE bilgi SET ozet = ? WHERE id = ?",
+                    [(icerik_ozeti(icerik), id_) for id_, icerik in
+                     conn.execute("SELECT id, icerik FROM bilgi WHERE ozet IS NULL").fetchall()]
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS bilgi_ozet ON bilgi (ozet)")
+            if surum < 3:
+                if "konu_anahtar" not in {r[1] for r in conn.execute("PRAGMA table_info(bilgi)")}:
+                    conn.execute("ALTER TABLE bilgi ADD COLUMN konu_anahtar TEXT")
+                conn.executemany(
+                    "UPDATE bilgi SET konu_anahtar = ? WHERE id = ?",
+                    [(konu_anahtari(konu), id_) for id_, konu in
+                     conn.execute("SELECT id, konu FROM bilgi WHERE konu_anahtar IS NULL").fetchall()]
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS bilgi_konu ON bilgi (konu_anahtar, id)")
+            conn.execute(f"PRAGMA user_version = {SURUM}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _json_tasi(self, conn: sqlite3.Connection, json_yolu: str | None):
+        """Eski bilgi_deposu.json kayıtlarını tabloya aktarır."""
+        if not json_yolu or not os.path.exists(json_yolu):
+            return
+        with open(json_yolu, "r", encoding="utf-8") as f:
+            kayitlar = json.load(f)
+        simdi = time.time()
+        conn.executemany(
+            "INSERT INTO bilgi (konu, icerik, eklenme, ozet, konu_anahtar) VALUES (?, ?, ?, ?, ?)",
+            [(k["konu"], k["icerik"], simdi, icerik_ozeti(k["icerik"]), konu_anahtari(k["konu"]))
+             for k in kayitlar]
+        )
+        if kayitlar:
+            print(f"✅ {len(kayitlar)} kayıt {json_yolu} dosyasından {self.yol} deposuna taşındı.")
+
+    # ---- dış API ----
+    def ekle(self, konu: str, icerik: str) -> int | None:
+        """Tek kayıt ekler; aynı içerik zaten varsa None."""
+        return self.toplu_ekle([(konu, icerik)])[0]
+
+    def toplu_ekle(self, kayitlar: list[tuple[str, str]]) -> list[int | None]:
+        """
+        (konu, icerik) kayıtlarını tek transaction'da ekler.
+        Depoda ya da parti içinde aynı içerikli kayıt varsa o konum için None döner.
+        """
+        ozetler = [icerik_ozeti(icerik) for _, icerik in kayitlar]
+        conn = self._baglanti()
+        conn.execute("BEGIN IMMEDIATE")  # kontrol + ekleme arası başka worker araya girmesin
+        try:
+            gorulen = self._mevcut_ozetler(conn, ozetler)
+            simdi = time.time()
+            idler = []
+            for (konu, icerik), ozet in zip(kayitlar, ozetler):
+                if ozet in gorulen:
+                    idler.append(None)
+                    continue
+                gorulen.add(ozet)
+                idler.append(conn.execute(
+                    "INSERT INTO bilgi (konu, icerik, eklenme, ozet, konu_anahtar) VALUES (?, ?, ?, ?, ?)",
+                    (konu, icerik, simdi, ozet, konu_anahtari(konu))
+                ).lastrowid)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return idler
+
+    def mevcut_ozetler(self, ozetler: list[str]) -> set[str]:
+        """Verilen içerik özetlerinden depoda olanlar."""
+        return self._mevcut_ozetler(self._baglanti(), ozetler)
+
+    @staticmethod
+    def _mevcut_ozetler(conn: sqlite3.Connection, ozetler: list[str]) -> set[str]:
+        mevcut = set()
+        ozetler = list(set(ozetler))
+        for i in range(0, len(ozetler), 500):
+            parca = ozetler[i:i + 500]
+            mevcut.update(r[0] for r in conn.execute(
+                f"SELECT ozet FROM bilgi WHERE ozet IN ({','.join('?' * len(parca))})", parca
+            ))
+        return mevcut
+
+    def getir(self, idler) -> list[dict]:
+        """Verilen id'lerin kayıtlarını aynı sırayla döndürür."""
+        idler = list(idler)
+        if not idler:
+            return []
+        kayitlar = {}
+        conn = self._baglanti()
+        for i in range(0, len(idler), 500):  # SQLite parametre sınırı
+            parca = idler[i:i + 500]
+            for id_, konu, icerik in conn.execute(
+                f"SELECT id, konu, icerik FROM bilgi WHERE id IN ({','.join('?' * len(parca))})", parca
+            ):
+                kayitlar[id_] = {"id": id_, "konu": konu, "icerik": icerik}
+        return [kayitlar[i] for i in idler if i in kayitlar]
+
+    def yeni_idler(self, son_id: int) -> list[int]:
+        """son_id'den sonra (başka worker'lar dahil) eklenen kayıtların id'leri."""
+        return [r[0] for r in self._baglanti().execute("SELECT id FROM bilgi WHERE id > ? ORDER BY id", (son_id,))]
+
+    def konu_gecenler(self, soru: str, top_k: int) -> list[dict]:
+        """
+        En hafif fallback: konusu sorunun içinde (kelime sınırlarıyla) geçen son kayıtlar.
+        Tabloyu taramaz: sorunun en fazla KONU_MAX_KELIME kelimelik dizileri konu_anahtar
+        indeksinde aranır (soru başına birkaç düzine indeks araması).
+        """
+        kelimeler = konu_anahtari(soru).split()[:80]  # ≤ 480 parametre (SQLite sınırı)
+        diziler = list({" ".join(kelimeler[i:j]) for i in range(len(kelimeler))
+                        for j in range(i + 1, min(len(kelimeler), i + KONU_MAX_KELIME) + 1)})
+        if not diziler:
+            return []
+        return [
+            {"id": id_, "konu": konu, "icerik": icerik}
+            for id_, konu, icerik in self._baglanti().execute(
+                f"SELECT id, konu, icerik FROM bilgi WHERE konu_anahtar IN ({','.join('?' * len(diziler))}) "
+                "ORDER BY id DESC LIMIT ?",
+                (*diziler, top_k)
+            )
+        ]
+
+    def sayi(self) -> int:
+        return self._baglanti().execute("SELECT COUNT(*) FROM bilgi").fetchone()[0]
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# sweax_gomme.py — Paylaşılan embedding (gömme) servisi
+# Model tek bir yerel süreçte bir kez yüklenir; gunicorn worker'ları ona HTTP ile bağlanır
+# (her worker'ın kendi ~500 MB model kopyası yerine). Eşzamanlı istekler kısa bir pencerede
+# toplanıp tek model.encode çağrısıyla kodlanır.
+#
+# Servis:  python -m app.sweax_gomme [--port 8765]
+# Worker:  SWEAX_EMBED_URL=http://127.0.0.1:8765  (sweaxrag._get_model bunu kullanır)
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import app.sweax_http as sweax_http
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_http
+    import sweax_metrik as metrik
+
+GOMME_MODEL   = os.environ.get("SWEAX_EMBED_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+GOMME_URL     = os.environ.get("SWEAX_EMBED_URL", "")                     # boşsa model worker içinde yüklenir
+GOMME_PORT    = int(os.environ.get("SWEAX_EMBED_PORT", "8765"))
+GOMME_PENCERE = float(os.environ.get("SWEAX_EMBED_BATCH_WINDOW", "0.005"))  # sn; istekleri toplama penceresi
+GOMME_PARTI   = int(os.environ.get("SWEAX_EMBED_MAX_BATCH", "256"))         # tek encode'da en fazla metin
+GOMME_TIMEOUT = float(os.environ.get("SWEAX_EMBED_TIMEOUT", "60"))
+
+_parti_boyu = metrik.histogram("gomme_parti_metin")
+_kodlama_sure = metrik.histogram("gomme_kodlama_ms")
+
+
+# ====== İstemci (worker tarafı) ======
+class UzakModel:
+    """SentenceTransformer.encode ile aynı şekilde kullanılır; kodlamayı gömme servisine yaptırır."""
+
+    def __init__(self, url: str = GOMME_URL, timeout: float = GOMME_TIMEOUT):
+        import numpy as np
+        self.np = np
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def hazir_mi(self) -> bool:
+        try:
+            r = sweax_http.get(f"{self.url}/saglik", timeout=2)
+            return r.status_code == 200 and r.json().get("hazir", False)
+        except Exception:
+            return False
+
+    def bekle(self, sure: float) -> bool:
+        """Servis açılıyorsa (model yükleniyorsa) en fazla `sure` sn hazır olmasını bekler."""
+        son = time.monotonic() + sure
+        while not self.hazir_mi():
+            if time.monotonic() > son:
+                return False
+            time.sleep(0.5)
+        return True
+
+    def encode(self, metinler, batch_size=None, **kw):
+        metinler = list(metinler)
+        r = sweax_http.post(f"{self.url}/kodla", json={"metinler": metinler}, timeout=self.timeout)
+        r.raise_for_status()
+        satir, boyut = int(r.headers["X-Satir"]), int(r.headers["X-Boyut"])
+        return self.np.frombuffer(r.content, dtype=self.np.float32).reshape(satir, boyut)
+
+
+# ====== Servis ======
+class _Is:
+    __slots__ = ("metinler", "olay", "sonuc", "hata")
+
+    def __init__(self, metinler):
+        self.metinler = metinler
+        self.olay = threading.Event()
+        self.sonuc = None
+        self.hata = None
+
+
+class Toplayici:
+    """Eşzamanlı kodlama isteklerini GOMME_PENCERE içinde birleştirip tek partide kodlar."""
+
+    def __init__(self, model, pencere: float = GOMME_PENCERE, en_fazla: int = GOMME_PARTI):
+        import numpy as np
+        self.np = np
+        self.model = model
+        self.pencere = pencere
+        self.en_fazla = en_fazla
+        self._kuyruk: "queue.Queue[_Is]" = queue.Queue()
+        threading.Thread(target=self._dongu, name="sweax-gomme", daemon=True).start()
+
+    def kodla(self, metinler: list[str]):
+        is_ = _Is(metinler)
+        self._kuyruk.put(is_)
+        is_.olay.wait()
+        if is_.hata is not None:
+            raise is_.hata
+        return is_.sonuc
+
+    def _topla(self) -> list[_Is]:
+        isler = [self._kuyruk.get()]
+        adet = len(isler[0].metinler)
+        son = time.monotonic() + self.pencere
+        while adet < self.en_fazla:
+            kalan = son - time.monotonic()
+            if kalan <= 0:
+                break
+            try:
+                isler.append(self._kuyruk.get(timeout=kalan))
+            except queue.Empty:
+                break
+            adet += len(isler[-1].metinler)
+        return isler
+
+    def _dongu(self):
+        while True:
+            isler = self._topla()
+            metinler = [m for is_ in isler for m in is_.metinler]
+            baslangic = time.monotonic()
+            try:
+                vektorler = self.np.asarray(
+                    self.model.encode(metinler, batch_size=min(len(metinler), 64) or 1), dtype=self.np.float32
+                )
+            except Exception as e:
+                for is_ in isler:
+                    is_.hata = e
+                    is_.olay.set()
+                continue
+            _kodlama_sure.gozlem(1000 * (time.monotonic() - baslangic))
+            _parti_boyu.gozlem(len(metinler))
+            i = 0
+            for is_ in isler:
+                is_.sonuc = vektorler[i:i + len(is_.metinler)]
+                i += len(is_.metinler)
+                is_.olay.set()
+
+
+def _isleyici(toplayici: Toplayici, model_adi: str):
+    class Isleyici(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # worker'ların keep-alive bağlantıları açık kalsın
+
+        def _json(self, kod: int, veri: dict):
+            govde = json.dumps(veri, ensure_ascii=False).encode("utf-8")
+            self.send_response(kod)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(govde)))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def do_GET(self):
+            if self.path == "/saglik":
+                self._json(200, {"hazir": True, "model": model_adi})
+            elif self.path == "/metrikler":
+                self._json(200, metrik.ozet())
+            else:
+                self._json(404, {"error": "bulunamadı"})
+
+        def do_POST(self):
+            if self.path != "/kodla":
+                self._json(404, {"error": "bulunamadı"})
+                return
+            try:
+                uzunluk = int(self.headers.get("Content-Length", 0))
+                metinler = json.loads(self.rfile.read(uzunluk))["metinler"]
+                if not isinstance(metinler, list) or not all(isinstance(m, str) for m in metinler):
+                    raise ValueError("metinler bir metin listesi olmalı")
+            except (ValueError, KeyError, TypeError) as e:
+                self._json(400, {"error": str(e)})
+                return
+            try:
+                vektorler = toplayici.kodla(metinler)
+            except Exception as e:
+                self._json(500, {"error": str(e)})
+                return
+            govde = vektorler.tobytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(govde)))
+            self.send_header("X-Satir", str(vektorler.shape[0]))
+            self.send_header("X-Boyut", str(vektorler.shape[1] if vektorler.ndim == 2 else 0))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def log_message(self, *args):
+            pass
+
+    return Isleyici
+
+
+def sunucu_olustur(model, host: str = "127.0.0.1", port: int = GOMME_PORT, model_adi: str = GOMME_MODEL):
+    """Isınmış modelle servis nesnesini kurar (serve_forever çağıran tarafa kalır)."""
+    sunucu = ThreadingHTTPServer((host, port), _isleyici(Toplayici(model), model_adi))
+    sunucu.daemon_threads = True
+    return sunucu
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Sweax paylaşılan embedding servisi")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=GOMME_PORT)
+    ap.add_argument("--model", default=GOMME_MODEL)
+    args = ap.parse_args(argv)
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("❌ sentence-transformers kurulu değil.", file=sys.stderr)
+        sys.exit(1)
+    baslangic = time.monotonic()
+    model = SentenceTransformer(args.model)
+    model.encode(["ısınma"])  # ilk çağrının gecikmesi (lazy init) kullanıcıya yansımasın
+    print(f"✅ {args.model} {time.monotonic() - baslangic:.1f} sn'de yüklendi; "
+          f"http://{args.host}:{args.port} dinleniyor.")
+    sunucu_olustur(model, args.host, args.port, args.model).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
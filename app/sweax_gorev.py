@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# sweax_gorev.py — Kalıcı (SQLite) arka plan görev kuyruğu
+# İstek yolu cevabı döndürdükten sonra yapılacak işler (web sayfası çekip bilgi deposuna
+# ekleme, Wikipedia'dan eksik bilgiyi tamamlama…) buraya görev olarak yazılır ve
+# worker süreçlerindeki arka plan thread'leri tarafından işlenir.
+#
+# - Kuyruk dosyada: süreç çökse / yeniden başlasa da bekleyen görevler kaybolmaz.
+# - Birden çok worker aynı dosyayı paylaşır; görev alma BEGIN IMMEDIATE ile atomik.
+# - Çalışırken sahibi ölen görev `kira` süresi dolunca yeniden kuyruğa döner.
+# - Aynı (tür, anahtar) için bekleyen görev varsa yenisi eklenmez.
+# - Hata veren görev artan beklemeyle `max_deneme` kez yeniden denenir, sonra "hata" olarak kalır.
+import os
+import json
+import time
+import sqlite3
+import threading
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+GOREV_ACIK      = os.environ.get("SWEAX_JOBS", "1") == "1"        # 0: görevler istek içinde çalışır (eski davranış)
+GOREV_DB        = os.environ.get("SWEAX_JOBS_DB", "sweax_gorev.db")
+GOREV_THREAD    = int(os.environ.get("SWEAX_JOBS_THREADS", "1"))  # süreç başına worker thread
+GOREV_KIRA      = float(os.environ.get("SWEAX_JOBS_LEASE", "300"))  # sn; bu kadar süren görev sahipsiz sayılır
+GOREV_MAX_DENEME = int(os.environ.get("SWEAX_JOBS_MAX_ATTEMPTS", "3"))
+GOREV_YOKLAMA   = 1.0  # sn; başka süreçlerin eklediği / zamanı gelen görevler için
+
+_gorev = metrik.sayac("gorev")                     # etiket: eklendi / tekrar / tamam / yeniden / hata / kurtarildi
+_gorev_sure = metrik.histogram("gorev_ms")         # etiket: görev türü (çalışma süresi)
+_gorev_bekleme = metrik.histogram("gorev_bekleme_ms")  # etiket: görev türü (kuyrukta bekleme)
+
+
+class GorevKuyrugu:
+    """
+    kuyruk.kaydet("tur", fonksiyon)  →  kuyruk.ekle("tur", {...}, anahtar="...")
+    Fonksiyon veri sözlüğünü alır; istisna fırlatırsa görev yeniden denenir.
+    """
+
+    def __init__(self, yol: str = GOREV_DB, thread_sayisi: int = GOREV_THREAD, kira: float = GOREV_KIRA,
+                 max_deneme: int = GOREV_MAX_DENEME):
+        self.yol = yol
+        self.thread_sayisi = max(1, thread_sayisi)
+        self.kira = kira
+        self.max_deneme = max_deneme
+        self._isleyiciler: dict = {}
+        self._yerel = threading.local()
+        self._uyan = threading.Event()
+        self._kilit = threading.Lock()
+        self._threadler: list[threading.Thread] = []
+        self._tablolari_kur()
+
+    # ---- bağlantı / şema ----
+    def _baglanti(self) -> sqlite3.Connection:
+        # Thread ve süreç (fork) başına ayrı bağlantı
+        conn = getattr(self._yerel, "conn", None)
+        if conn is None or self._yerel.pid != os.getpid():
+            conn = sqlite3.connect(self.yol, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._yerel.conn, self._yerel.pid = conn, os.getpid()
+        return conn
+
+    def _tablolari_kur(self):
+        conn = self._baglanti()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS gorev (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tur TEXT NOT NULL,
+                anahtar TEXT,
+                veri TEXT NOT NULL,
+                durum TEXT NOT NULL DEFAULT 'bekliyor',   -- bekliyor / calisiyor / hata
+                deneme INTEGER NOT NULL DEFAULT 0,
+                eklenme REAL NOT NULL,
+                zaman REAL NOT NULL,                      -- bekliyor: en erken başlama, calisiyor: kira bitişi
+                hata TEXT
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS gorev_sira ON gorev (durum, zaman)")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS gorev_tekil ON gorev (tur, anahtar) "
+                     "WHERE durum = 'bekliyor' AND anahtar IS NOT NULL")
+
+    # ---- dış API ----
+    def kaydet(self, tur: str, isleyici):
+        self._isleyiciler[tur] = isleyici
+
+    def ekle(self, tur: str, veri: dict, anahtar: str | None = None) -> bool:
+        """Görevi kuyruğa yazar (bloklamaz, ~ms); aynı anahtarlı bekleyen görev varsa False."""
+        simdi = time.time()
+        imlec = self._baglanti().execute(
+            "INSERT OR IGNORE INTO gorev (tur, anahtar, veri, eklenme, zaman) VALUES (?, ?, ?, ?, ?)",
+            (tur, anahtar, json.dumps(veri, ensure_ascii=False), simdi, simdi))
+        if imlec.rowcount == 0:
+            _gorev.artir("tekrar")
+            return False
+        _gorev.artir("eklendi")
+        self.baslat()
+        self._uyan.set()
+        return True
+
+    def istatistik(self) -> dict:
+        """Kuyruk derinliği (duruma göre) ve en eski bekleyen görevin yaşı."""
+        conn = self._baglanti()
+        durumlar = dict(conn.execute("SELECT durum, COUNT(*) FROM gorev GROUP BY durum").fetchall())
+        en_eski = conn.execute("SELECT MIN(eklenme) FROM gorev WHERE durum = 'bekliyor'").fetchone()[0]
+        return {
+            "bekliyor": durumlar.get("bekliyor", 0),
+            "calisiyor": durumlar.get("calisiyor", 0),
+            "hata": durumlar.get("hata", 0),
+            "en_eski_sn": round(time.time() - en_eski, 1) if en_eski else 0.0,
+        }
+
+    def bekleyen(self) -> int:
+        return self._baglanti().execute(
+            "SELECT COUNT(*) FROM gorev WHERE durum IN ('bekliyor', 'calisiyor')").fetchone()[0]
+
+    def bosalt(self, zaman_asimi: float = 30.0) -> bool:
+        """Kuyruk boşalana kadar bekler (testler / CLI); süre dolarsa False."""
+        son = time.monotonic() + zaman_asimi
+        while self.bekleyen():
+            if time.monotonic() > son:
+                return False
+            self._uyan.set()
+            time.sleep(0.05)
+        return True
+
+    def baslat(self):
+        if self._threadler and all(t.is_alive() for t in self._threadler):
+            return
+        with self._kilit:
+            self._threadler = [t for t in self._threadler if t.is_alive()]
+            while len(self._threadler) < self.thread_sayisi:
+                t = threading.Thread(target=self._dongu, name=f"sweax-gorev-{len(self._threadler)}", daemon=True)
+                t.start()
+                self._threadler.append(t)
+
+    # ---- worker ----
+    def _al(self):
+        """Sırası gelen bir görevi kiralar; yoksa None. Süresi dolmuş kiralar önce geri alınır."""
+        conn = self._baglanti()
+        simdi = time.time()
+        # Boşta yazma kilidi alınmasın: önce salt okunur kontrol
+        if conn.execute("SELECT 1 FROM gorev WHERE durum IN ('bekliyor', 'calisiyor') AND zaman <= ? LIMIT 1",
+                        (simdi,)).fetchone() is None:
+            return None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Aynı anahtarlı yenisi zaten bekliyorsa (OR IGNORE ile atlanan) eskisi silinir
+            kurtarilan = conn.execute(
+                "UPDATE OR IGNORE gorev SET durum = 'bekliyor', zaman = ? WHERE durum = 'calisiyor' AND zaman < ?",
+                (simdi, simdi)).rowcount
+            conn.execute("DELETE FROM gorev WHERE durum = 'calisiyor' AND zaman < ?", (simdi,))
+            row = conn.execute(
+                "SELECT id, tur, veri, deneme, eklenme FROM gorev WHERE durum = 'bekliyor' AND zaman <= ? "
+                "ORDER BY zaman, id LIMIT 1", (simdi,)).fetchone()
+            if row:
+                conn.execute("UPDATE gorev SET durum = 'calisiyor', deneme = deneme + 1, zaman = ? WHERE id = ?",
+                             (simdi + self.kira, row[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if kurtarilan:
+            _gorev.artir("kurtarildi", kurtarilan)
+        return row
+
+    def _bitir(self, gorev_id: int, deneme: int, hata: Exception | None):
+        conn = self._baglanti()
+        if hata is None:
+            conn.execute("DELETE FROM gorev WHERE id = ?", (gorev_id,))
+            _gorev.artir("tamam")
+        elif deneme < self.max_deneme:
+            # 5 sn, 25 sn, 125 sn… sonra yeniden dene
+            guncellenen = conn.execute(
+                "UPDATE OR IGNORE gorev SET durum = 'bekliyor', zaman = ?, hata = ? WHERE id = ?",
+                (time.time() + 5 ** deneme, str(hata)[:500], gorev_id)).rowcount
+            if not guncellenen:  # aynı anahtarlı yeni görev zaten bekliyor
+                conn.execute("DELETE FROM gorev WHERE id = ?", (gorev_id,))
+            _gorev.artir("yeniden")
+        else:
+            conn.execute("UPDATE gorev SET durum = 'hata', hata = ? WHERE id = ?", (str(hata)[:500], gorev_id))
+            _gorev.artir("hata")
+
+    def _calistir(self, row):
+        gorev_id, tur, veri, deneme, eklenme = row
+        _gorev_bekleme.gozlem(1000 * (time.time() - eklenme), tur)
+        baslangic = time.monotonic()
+        hata = None
+        try:
+            isleyici = self._isleyiciler.get(tur)
+            if isleyici is None:
+                raise LookupError(f"bilinmeyen görev türü: {tur}")
+            isleyici(json.loads(veri))
+        except Exception as e:
+            hata = e
+            print(f"⚠️ Görev hatası ({tur} #{gorev_id}, deneme {deneme + 1}): {e}")
+        _gorev_sure.gozlem(1000 * (time.monotonic() - baslangic), tur)
+        self._bitir(gorev_id, deneme + 1, hata)
+
+    def _dongu(self):
+        while True:
+            try:
+                row = self._al()
+            except Exception as e:
+                print(f"⚠️ Görev kuyruğu okunamadı: {e}")
+                row = None
+            if row is None:
+                self._uyan.wait(GOREV_YOKLAMA)
+                self._uyan.clear()
+                continue
+            self._calistir(row)
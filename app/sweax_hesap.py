@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# sweax_hesap.py — eval() yerine güvenli aritmetik değerlendirici
+# İfade AST'ye ayrıştırılıp yalnızca sayı ve + - * / // ** işlemleri derlenir.
+# Sayı büyüklüğü, üs, iç içe derinlik ve süre sınırlıdır: "9**9**9" gibi girdiler
+# worker'ı kilitlemek yerine anında hata döndürür. Derlenmiş ifadeler önbellekte tutulur.
+import os
+import ast
+import math
+import time
+import operator
+from functools import lru_cache
+
+HESAP_MAX_UZUNLUK = int(os.environ.get("SWEAX_CALC_MAX_LEN", "200"))      # karakter
+HESAP_MAX_BIT     = int(os.environ.get("SWEAX_CALC_MAX_BITS", "4096"))    # tam sayı sonucu en fazla (~1200 basamak)
+HESAP_MAX_DERINLIK = int(os.environ.get("SWEAX_CALC_MAX_DEPTH", "40"))    # parantez / ardışık işaret derinliği
+HESAP_SURE_MS     = float(os.environ.get("SWEAX_CALC_TIME_BUDGET_MS", "50"))
+
+
+class HesapHatasi(ValueError):
+    """İfade geçersiz ya da sınırları aşıyor; mesaj kullanıcıya gösterilebilir."""
+
+
+class SozdizimiHatasi(HesapHatasi):
+    pass
+
+
+def _sinirla(deger):
+    if isinstance(deger, int) and deger.bit_length() > HESAP_MAX_BIT:
+        raise HesapHatasi("Sonuç çok büyük.")
+    if isinstance(deger, float) and not math.isfinite(deger):
+        raise HesapHatasi("Sonuç çok büyük.")
+    if isinstance(deger, complex):
+        raise HesapHatasi("Sonuç gerçel sayı değil.")
+    return deger
+
+
+def _carp(a, b):
+    # Çarpımın bit uzunluğu en fazla toplamları kadar: hesaplamadan önce reddedilir
+    if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > HESAP_MAX_BIT + 1:
+        raise HesapHatasi("Sonuç çok büyük.")
+    return _sinirla(a * b)
+
+
+def _bol(a, b):
+    if b == 0:
+        raise HesapHatasi("Sıfıra bölünemez.")
+    return _sinirla(a / b)
+
+
+def _tam_bol(a, b):
+    if b == 0:
+        raise HesapHatasi("Sıfıra bölünemez.")
+    return _sinirla(a // b)
+
+
+def _us(a, b):
+    # |a| >= 2^(bit-1) olduğundan sonuç en az b*(bit-1) bit: büyük üsler hesaplanmadan reddedilir
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and b * (abs(a).bit_length() - 1) > HESAP_MAX_BIT:
+        raise HesapHatasi("Üs çok büyük.")
+    if a == 0 and b < 0:
+        raise HesapHatasi("Sıfıra bölünemez.")
+    return _sinirla(a ** b)
+
+
+_IKILI = {
+    ast.Add: lambda a, b: _sinirla(a + b),
+    ast.Sub: lambda a, b: _sinirla(a - b),
+    ast.Mult: _carp,
+    ast.Div: _bol,
+    ast.FloorDiv: _tam_bol,
+    ast.Pow: _us,
+}
+_TEKLI = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _zaman_kontrol(son):
+    if time.monotonic() > son:
+        raise HesapHatasi("İşlem zaman sınırını aştı.")
+
+
+def _derle_dugum(dugum):
+    """
+    AST düğümünü `fn(son_zaman)` kapanışına çevirir; izin verilmeyen her şey reddedilir.
+    Parantezsiz zincirler (1+2-3+…, 2**3**2) özyinelemesiz yürünür: derinlik yalnızca
+    parantez / işaret iç içeliğinden gelir ve onu _derle'deki ön tarama sınırlar.
+    """
+    if isinstance(dugum, ast.Constant) and type(dugum.value) in (int, float):
+        deger = _sinirla(dugum.value)
+        return lambda son: deger
+    if isinstance(dugum, ast.UnaryOp) and type(dugum.op) in _TEKLI:
+        islem, ic = _TEKLI[type(dugum.op)], _derle_dugum(dugum.operand)
+        return lambda son: islem(ic(son))
+    if isinstance(dugum, ast.BinOp) and isinstance(dugum.op, ast.Pow):
+        # Sağdan birleşir: 2**3**2 = 2**(3**2)
+        tabanlar = []
+        while isinstance(dugum, ast.BinOp) and isinstance(dugum.op, ast.Pow):
+            tabanlar.append(_derle_dugum(dugum.left))
+            dugum = dugum.right
+        ust = _derle_dugum(dugum)
+        tabanlar.reverse()
+
+        def us_zinciri(son):
+            deger = ust(son)
+            for taban in tabanlar:
+                _zaman_kontrol(son)
+                deger = _us(taban(son), deger)
+            return deger
+        return us_zinciri
+    if isinstance(dugum, ast.BinOp) and type(dugum.op) in _IKILI:
+        # Soldan birleşir: ((a op b) op c) op …
+        adimlar = []
+        while (isinstance(dugum, ast.BinOp) and type(dugum.op) in _IKILI
+               and not isinstance(dugum.op, ast.Pow)):
+            adimlar.append((_IKILI[type(dugum.op)], _derle_dugum(dugum.right)))
+            dugum = dugum.left
+        ilk = _derle_dugum(dugum)
+        adimlar.reverse()
+
+        def zincir(son):
+            deger = ilk(son)
+            for islem, sag in adimlar:
+                _zaman_kontrol(son)
+                deger = islem(deger, sag(son))
+            return deger
+        return zincir
+    raise SozdizimiHatasi("Sadece sayılar ve + - * / ** işlemleri desteklenir.")
+
+
+@lru_cache(maxsize=1024)
+def _derle(ifade: str):
+    """(fonksiyon, None) ya da (None, hata); hatalı girdiler de önbelleğe girer."""
+    if len(ifade) > HESAP_MAX_UZUNLUK:
+        return None, HesapHatasi("İfade çok uzun.")
+    derinlik = isaret = 0
+    for harf in ifade:  # ayrıştırıcının kendisi de derin parantezde / işaret dizisinde yorulmasın
+        derinlik += (harf == "(") - (harf == ")")
+        if harf in "+-":
+            isaret += 1  # "- - -1": her işaret bir tekli işlem seviyesi
+        elif not harf.isspace():
+            isaret = 0
+        if derinlik > HESAP_MAX_DERINLIK or isaret > HESAP_MAX_DERINLIK:
+            return None, HesapHatasi("İfade çok iç içe.")
+    try:
+        agac = ast.parse(ifade.strip(), mode="eval")
+    except (SyntaxError, ValueError, MemoryError, RecursionError):
+        return None, SozdizimiHatasi("İfade anlaşılamadı.")
+    try:
+        return _derle_dugum(agac.body), None
+    except HesapHatasi as e:
+        return None, e
+
+
+def hesapla(ifade: str, sure_ms: float = HESAP_SURE_MS):
+    """İfadeyi değerlendirir (int / float); geçersiz ya da sınır dışıysa HesapHatasi."""
+    fn, hata = _derle(ifade)
+    if hata is not None:
+        # Önbellekteki örnek yeniden fırlatılmaz (traceback'i her seferinde uzardı)
+        raise type(hata)(str(hata))
+    try:
+        return fn(time.monotonic() + sure_ms / 1000)
+    except (ArithmeticError, RecursionError) as e:
+        raise HesapHatasi("Sonuç hesaplanamadı.") from e
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# sweax_http.py — Tüm dış HTTP çağrıları için ortak keep-alive istemci
+# Host başına bağlantı havuzu, retry/backoff, host başına timeout ve metrikler.
+# Wikipedia → Ollama gibi ardışık çağrılar sıcak bağlantıları yeniden kullanır.
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+HTTP_HAVUZ_BOYUT = int(os.environ.get("SWEAX_HTTP_POOL_SIZE", "10"))  # host başına keep-alive bağlantı
+
+# Host son ekine göre ayarlar: timeout (sn) ve GET için tekrar sayısı.
+# POST'lar (Ollama, Serper) tekrar edilmez: pahalı ve idempotent değil.
+HOST_AYARLARI = {
+    "wikipedia.org":     {"timeout": 10, "retry": 2},
+    "duckduckgo.com":    {"timeout": 10, "retry": 1},
+    "google.serper.dev": {"timeout": 10, "retry": 0},
+}
+VARSAYILAN_AYAR = {"timeout": 10, "retry": 1}
+
+_http_sure = metrik.histogram("http_sure_ms")
+_http_hata = metrik.sayac("http_hata")
+_http_istek = metrik.sayac("http_istek")
+
+_oturumlar: dict = {}
+_kilit = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+def _ayar(host: str) -> dict:
+    for son_ek, ayar in HOST_AYARLARI.items():
+        if host == son_ek or host.endswith("." + son_ek):
+            return ayar
+    return VARSAYILAN_AYAR
+
+
+def _oturum_olustur(retry: int) -> requests.Session:
+    oturum = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_HAVUZ_BOYUT,
+        pool_maxsize=HTTP_HAVUZ_BOYUT,
+        max_retries=Retry(
+            total=retry,
+            backoff_factor=0.3,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        ),
+    )
+    oturum.mount("http://", adapter)
+    oturum.mount("https://", adapter)
+    return oturum
+
+
+def _oturum(retry: int) -> requests.Session:
+    """Süreç başına, retry politikası başına tek Session (gunicorn fork sonrası yeniden kurulur)."""
+    anahtar = (os.getpid(), retry)
+    oturum = _oturumlar.get(anahtar)
+    if oturum is None:
+        with _kilit:
+            oturum = _oturumlar.get(anahtar)
+            if oturum is None:
+                oturum = _oturumlar[anahtar] = _oturum_olustur(retry)
+    return oturum
+
+
+def gozlem_kaydet(host: str, baslangic: float, hata: bool = False):
+    """Metrik kaydı; async istemci de aynı sayaçları kullanır."""
+    _http_istek.artir(host)
+    _http_sure.gozlem(1000 * (time.monotonic() - baslangic), host)
+    if hata:
+        _http_hata.artir(host)
+
+
+def istek(yontem: str, url: str, **kw) -> requests.Response:
+    """
+    requests.request ile aynı imza; timeout verilmezse host ayarından gelir.
+    stream=True'da süre, başlıklar gelene kadar ölçülür.
+    """
+    host = _host(url)
+    ayar = _ayar(host)
+    kw.setdefault("timeout", ayar["timeout"])
+    baslangic = time.monotonic()
+    try:
+        r = _oturum(ayar["retry"]).request(yontem, url, **kw)
+    except requests.exceptions.RequestException:
+        gozlem_kaydet(host, baslangic, hata=True)
+        raise
+    gozlem_kaydet(host, baslangic, hata=r.status_code >= 500)
+    return r
+
+
+def get(url: str, **kw) -> requests.Response:
+    return istek("GET", url, **kw)
+
+
+def post(url: str, **kw) -> requests.Response:
+    return istek("POST", url, **kw)
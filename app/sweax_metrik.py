@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# sweax_metrik.py — Süreç içi basit metrikler (sayaç + gecikme histogramı + anlık gösterge)
+# Bağımlılık yok; /api/metrikler bu kayıttan özet döndürür.
+import bisect
+import threading
+
+# ms cinsinden histogram kova sınırları
+VARSAYILAN_KOVALAR = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_kilit = threading.Lock()
+_kayit: dict = {}
+
+
+class Sayac:
+    """Etiket başına artan sayaç (örn. host başına hata sayısı)."""
+
+    def __init__(self):
+        self._degerler: dict = {}
+        self._kilit = threading.Lock()
+
+    def artir(self, etiket: str = "", miktar: float = 1):
+        with self._kilit:
+            self._degerler[etiket] = self._degerler.get(etiket, 0) + miktar
+
+    def deger(self, etiket: str = "") -> float:
+        with self._kilit:
+            return self._degerler.get(etiket, 0)
+
+    def ozet(self) -> dict:
+        with self._kilit:
+            return dict(self._degerler)
+
+
+class Histogram:
+    """Etiket başına gecikme histogramı (ms); kovalar kümülatif değil."""
+
+    def __init__(self, kovalar=VARSAYILAN_KOVALAR):
+        self.kovalar = tuple(kovalar)
+        self._veriler: dict = {}
+        self._kilit = threading.Lock()
+
+    def gozlem(self, deger_ms: float, etiket: str = ""):
+        i = bisect.bisect_left(self.kovalar, deger_ms)
+        with self._kilit:
+            v = self._veriler.get(etiket)
+            if v is None:
+                v = self._veriler[etiket] = {"sayi": 0, "toplam": 0.0, "max": 0.0,
+                                             "kovalar": [0] * (len(self.kovalar) + 1)}
+            v["sayi"] += 1
+            v["toplam"] += deger_ms
+            v["max"] = max(v["max"], deger_ms)
+            v["kovalar"][i] += 1
+
+    def ozet(self) -> dict:
+        etiketler = [f"<={k}" for k in self.kovalar] + [f">{self.kovalar[-1]}"]
+        with self._kilit:
+            return {
+                etiket: {
+                    "sayi": v["sayi"],
+                    "ort_ms": round(v["toplam"] / v["sayi"], 2),
+                    "max_ms": round(v["max"], 2),
+                    "kovalar": {e: n for e, n in zip(etiketler, v["kovalar"]) if n},
+                }
+                for etiket, v in self._veriler.items()
+            }
+
+
+class Gosterge:
+    """Anlık değer (örn. kuyruk derinliği); özet alınırken `olc()` çağrılır."""
+
+    def __init__(self, olc):
+        self.olc = olc
+
+    def ozet(self):
+        try:
+            return self.olc()
+        except Exception as e:
+            return {"hata": str(e)}
+
+
+def sayac(ad: str) -> Sayac:
+    with _kilit:
+        if ad not in _kayit:
+            _kayit[ad] = Sayac()
+        return _kayit[ad]
+
+
+def histogram(ad: str, kovalar=VARSAYILAN_KOVALAR) -> Histogram:
+    with _kilit:
+        if ad not in _kayit:
+            _kayit[ad] = Histogram(kovalar)
+        return _kayit[ad]
+
+
+def gosterge(ad: str, olc) -> Gosterge:
+    """Aynı adla yeniden kaydedilirse son ölçüm fonksiyonu geçerli olur."""
+    with _kilit:
+        _kayit[ad] = Gosterge(olc)
+        return _kayit[ad]
+
+
+def ozet() -> dict:
+    """Kayıtlı tüm metriklerin anlık görüntüsü."""
+    with _kilit:
+        kayit = dict(_kayit)
+    return {ad: m.ozet() for ad, m in sorted(kayit.items())}
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# sweax_model.py — Ollama model yerleşimi (hangi 7B model bellekte?)
+# Küçük bir Ollama sunucusu aynı anda tek 7B model tutabiliyorsa her model değişimi
+# diğerini boşaltıp yeniden yükler (tur başına birkaç saniye). Bu modül:
+#   - her isteğe keep_alive ekler (model boşta da bellekte kalır)
+#   - açılışta yapılandırılmış modelleri ısıtır (ilk kullanıcı yüklemeyi beklemez)
+#   - hangi modellerin yüklü olduğunu /api/ps'den (kısa TTL ile) ve cevaplardaki
+#     load_duration'dan izler
+#   - tercih edilen model yüklü değilken yedeği yüklüyse yedeğe yönlendirir
+#     (yalnızca SWEAX_MODEL_FALLBACK ile izin verilen kalite takasları)
+#   - soğuk yükleme sayısını ve süresini metriklere yazar
+# Sahte sunucu ile denemek için: python -m app.sweax_sahte_ollama (bkz. o dosya)
+import os
+import time
+import threading
+from collections import OrderedDict
+
+try:
+    import app.sweax_http as sweax_http
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_http
+    import sweax_metrik as metrik
+
+VARSAYILAN_MODEL = os.environ.get("LLM_DEFAULT_MODEL", "qwen2.5:7b-instruct")
+MATEMATIK_MODEL  = os.environ.get("LLM_MATH_MODEL", "deepseek-r1:7b")
+
+OLLAMA_TABAN      = os.environ.get("OLLAMA_URL", "http://localhost:11434/api/chat").rsplit("/api/", 1)[0]
+OLLAMA_KEEP_ALIVE = os.environ.get("SWEAX_OLLAMA_KEEP_ALIVE", "30m")   # "-1": hiç boşaltma, "": Ollama varsayılanı
+OLLAMA_MAX_YUKLU  = int(os.environ.get("SWEAX_OLLAMA_MAX_LOADED", "1"))  # sunucunun aynı anda tuttuğu model
+OLLAMA_ON_YUKLE   = [m.strip() for m in os.environ.get("SWEAX_OLLAMA_PRELOAD", "").split(",") if m.strip()]
+OLLAMA_PS_TTL     = float(os.environ.get("SWEAX_OLLAMA_PS_TTL", "5"))   # sn; /api/ps sonucu bu kadar geçerli
+SOGUK_ESIK_MS     = 500  # load_duration bunu aşarsa soğuk yükleme sayılır
+
+# "tercih=yedek" çiftleri: tercih yüklü değil ama yedek yüklüyse yedek kullanılır.
+# Varsayılan kapalı ("0"): genel model keep_alive ile hep yüklü kaldığından takas açıkken
+# matematik / "neden" yönlendirmesi hiç çalışmaz. Tek modellik sunucuda isteğe bağlı örnek:
+#   SWEAX_MODEL_FALLBACK="deepseek-r1:7b=qwen2.5:7b-instruct"  (tersi önerilmez — <think> çıktısı)
+_yedek_ayari = os.environ.get("SWEAX_MODEL_FALLBACK", "0")
+MODEL_YEDEK = {} if _yedek_ayari == "0" else dict(
+    (c.split("=", 1)[0].strip(), c.split("=", 1)[1].strip()) for c in _yedek_ayari.split(",") if "=" in c)
+
+_secim = metrik.sayac("model_secim")             # etiket: tercih / yedek / soguk (takas izinli modeller)
+_soguk = metrik.sayac("model_soguk_yukleme")     # etiket: model
+_yukleme = metrik.histogram("model_yukleme_ms")  # etiket: model (soğuk yüklemeler + ön yükleme)
+
+
+def _ad(model: str) -> str:
+    """Ollama etiketsiz adı ':latest' ile listeler."""
+    return model if ":" in model else model + ":latest"
+
+
+class ModelYerlesimi:
+    """
+    veri = YERLESIM.istek({...})       → keep_alive eklenmiş istek gövdesi
+    model = YERLESIM.sec(tercih)       → yüklü olanı tercih eden yönlendirme
+    YERLESIM.yanit_isle(cevap_json)    → load_duration ölçümü + yüklü model bilgisi
+    """
+
+    def __init__(self, taban: str = OLLAMA_TABAN, keep_alive: str = OLLAMA_KEEP_ALIVE,
+                 max_yuklu: int = OLLAMA_MAX_YUKLU, yedekler: dict | None = None, ps_ttl: float = OLLAMA_PS_TTL):
+        self.taban = taban
+        self.keep_alive = keep_alive
+        self.max_yuklu = max(1, max_yuklu)
+        self.yedekler = {_ad(k): v for k, v in (MODEL_YEDEK if yedekler is None else yedekler).items()}
+        self.ps_ttl = ps_ttl
+        self._yuklu: "OrderedDict[str, float]" = OrderedDict()  # model → son kullanım (eskiden yeniye)
+        self._ps_zaman = 0.0
+        self._kilit = threading.Lock()
+
+    # ---- yüklü modeller ----
+    def _yuklendi(self, model: str):
+        with self._kilit:
+            self._yuklu[_ad(model)] = time.monotonic()
+            self._yuklu.move_to_end(_ad(model))
+            while len(self._yuklu) > self.max_yuklu:
+                self._yuklu.popitem(last=False)  # sunucu da en eskisini boşaltır
+
+    def yuklu(self) -> list[str]:
+        """Yüklü modeller; /api/ps en fazla ps_ttl sn'de bir sorulur (diğer worker'ların yüklemeleri için)."""
+        with self._kilit:
+            sor = time.monotonic() - self._ps_zaman > self.ps_ttl
+            if sor:
+                self._ps_zaman = time.monotonic()  # aynı anda tek sorgu; hata olsa da TTL boyunca tekrar sorulmaz
+        if sor:
+            try:
+                r = sweax_http.get(self.taban + "/api/ps", timeout=1)
+                r.raise_for_status()
+                modeller = [_ad(m.get("name") or m.get("model", "")) for m in r.json().get("models", [])]
+                with self._kilit:
+                    eski = self._yuklu
+                    self._yuklu = OrderedDict(sorted(((m, eski.get(m, 0.0)) for m in modeller),
+                                                     key=lambda kv: kv[1]))
+            except Exception as e:
+                print(f"⚠️ Ollama /api/ps okunamadı, yerel bilgi kullanılıyor: {e}")
+        with self._kilit:
+            return list(self._yuklu)
+
+    # ---- istek / cevap ----
+    def istek(self, veri: dict) -> dict:
+        if self.keep_alive and "keep_alive" not in veri:
+            return {**veri, "keep_alive": self.keep_alive}
+        return veri
+
+    def sec(self, tercih: str) -> str:
+        """Tercih yüklüyse o; değilse izinli yedek yüklüyse yedek; ikisi de değilse tercih (soğuk)."""
+        yedek = self.yedekler.get(_ad(tercih))
+        if yedek is None:
+            return tercih  # takas izni yok: /api/ps sorgusuna gerek yok
+        yuklu = self.yuklu()
+        if _ad(tercih) in yuklu:
+            _secim.artir("tercih")
+            return tercih
+        if _ad(yedek) in yuklu:
+            _secim.artir("yedek")
+            return yedek
+        _secim.artir("soguk")
+        return tercih
+
+    def yanit_isle(self, cevap: dict):
+        """Ollama cevabı (ya da akışın done satırı): load_duration ns cinsinden."""
+        model = cevap.get("model")
+        if not model:
+            return
+        yukleme_ms = (cevap.get("load_duration") or 0) / 1e6
+        if yukleme_ms > SOGUK_ESIK_MS:
+            _soguk.artir(model)
+            _yukleme.gozlem(yukleme_ms, model)
+            print(f"ℹ️ Ollama modeli soğuk yüklendi: {model} ({yukleme_ms / 1000:.1f} sn)")
+        self._yuklendi(model)
+
+    # ---- ısıtma ----
+    def on_yukle(self, modeller: list[str] | None = None):
+        """
+        Açılışta çağrılır: modelleri (en fazla max_yuklu tane) boş bir sohbet isteğiyle yükletir.
+        Boş messages ile /api/chat üretim yapmaz, sadece modeli belleğe alır.
+        """
+        modeller = modeller or OLLAMA_ON_YUKLE or [VARSAYILAN_MODEL, MATEMATIK_MODEL]
+        for model in modeller[:self.max_yuklu]:
+            baslangic = time.monotonic()
+            try:
+                r = sweax_http.post(self.taban + "/api/chat", json=self.istek({"model": model, "messages": []}),
+                                    timeout=300)
+                r.raise_for_status()
+                sure_ms = 1000 * (time.monotonic() - baslangic)
+                _yukleme.gozlem(sure_ms, model)
+                self._yuklendi(model)
+                print(f"✅ Ollama modeli hazır: {model} ({sure_ms / 1000:.1f} sn)")
+            except Exception as e:
+                print(f"⚠️ Ollama modeli ön yüklenemedi ({model}): {e}")
+
+    def istatistik(self) -> dict:
+        with self._kilit:
+            return {"yuklu": list(self._yuklu), "max_yuklu": self.max_yuklu, "keep_alive": self.keep_alive,
+                    "yedekler": dict(self.yedekler)}
+
+
+YERLESIM = ModelYerlesimi()
+metrik.gosterge("ollama_modeller", YERLESIM.istatistik)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# sweax_niyet.py — konus() için tek geçişli niyet (intent) yönlendirici
+# Tüm anahtar kelimeler tek bir otomata derlenir; mesaj bir kez küçültülüp bir kez taranır,
+# kurallar (niyetler.json) bulunan kelime kümesi üzerinden sırayla değerlendirilir.
+#
+# Ölçüm:  python -m app.sweax_niyet [--tekrar 20000]
+import os
+import re
+import json
+import time
+
+VARSAYILAN_NIYET = "sohbet"  # hiçbir kural tutmazsa (LLM'e gider)
+
+
+class KelimeOtomati:
+    """
+    Aho-Corasick tarzı çoklu kelime arama: kelimeler bir trie'ye, trie tek bir derlenmiş
+    regex'e dönüştürülür. `(?=(...))` her konumda o konumdan başlayan en uzun kelimeyi verir;
+    aynı konumdan başlayan daha kısa kelimeler (önekler) önceden hesaplanmış kümeden eklenir.
+    Böylece çakışan eşleşmeler dahil ("şu an saat" → "şu an", "şu an saat") hepsi tek geçişte bulunur.
+    """
+
+    def __init__(self, kelimeler):
+        kelimeler = sorted({k for k in kelimeler if k})
+        kume = set(kelimeler)
+        trie: dict = {}
+        for k in kelimeler:
+            dugum = trie
+            for harf in k:
+                dugum = dugum.setdefault(harf, {})
+            dugum[""] = True
+        self._desen = re.compile(f"(?=({self._derle(trie)}))") if kelimeler else None
+        self._onekler = {
+            k: frozenset(k[:i] for i in range(1, len(k) + 1) if k[:i] in kume) for k in kelimeler
+        }
+
+    @classmethod
+    def _derle(cls, dugum: dict) -> str:
+        dallar = [re.escape(harf) + cls._derle(alt) for harf, alt in sorted(dugum.items()) if harf]
+        if not dallar:
+            return ""
+        govde = dallar[0] if len(dallar) == 1 else "(?:" + "|".join(dallar) + ")"
+        # Kelime burada bitiyorsa devamı opsiyonel (açgözlü: önce uzun olan denenir)
+        return f"(?:{govde})?" if "" in dugum else govde
+
+    def tara(self, metin: str) -> set[str]:
+        bulunan: set[str] = set()
+        if self._desen is not None:
+            for m in self._desen.finditer(metin):
+                bulunan |= self._onekler[m.group(1)]
+        return bulunan
+
+
+class Niyet:
+    """Yönlendirme sonucu: niyet adı, kuraldan çıkan argümanlar ve açık bayraklar."""
+
+    __slots__ = ("ad", "argumanlar", "bayraklar")
+
+    def __init__(self, ad: str, argumanlar: dict | None = None, bayraklar: frozenset = frozenset()):
+        self.ad = ad
+        self.argumanlar = argumanlar or {}
+        self.bayraklar = bayraklar
+
+    def __repr__(self):
+        return f"Niyet({self.ad!r}, {self.argumanlar!r}, {set(self.bayraklar)!r})"
+
+
+class _Kural:
+    """
+    Bir niyet kuralı. Eşleşme: `haric` kelimelerinden hiçbiri yok VE
+    (`kelimeler`den biri var YA DA `regex` tutuyor YA DA `soru_isareti` ve metin "?" ile bitiyor).
+    `on_kelimeler` verilirse regex yalnızca onlardan biri geçiyorsa çalıştırılır.
+    """
+
+    __slots__ = ("ad", "kelimeler", "haric", "on_kelimeler", "regex", "tam", "soru_isareti", "sabit", "secenekler")
+
+    def __init__(self, ayar: dict, gruplar: dict):
+        self.ad = ayar["ad"]
+        self.kelimeler = frozenset(ayar.get("kelimeler", ()))
+        self.haric = frozenset(ayar.get("haric", ()))
+        self.on_kelimeler = frozenset(ayar.get("on_kelimeler", ()))
+        self.regex = re.compile(ayar["regex"]) if ayar.get("regex") else None
+        self.tam = ayar.get("tam", False)
+        self.soru_isareti = ayar.get("soru_isareti", False)
+        self.sabit = ayar.get("sabit", {})
+        self.secenekler = {arg: gruplar[grup] for arg, grup in ayar.get("secenekler", {}).items()}
+
+    def tum_kelimeler(self):
+        yield from self.kelimeler
+        yield from self.haric
+        yield from self.on_kelimeler
+        for grup in self.secenekler.values():
+            yield from grup
+
+    def eslesir(self, metin: str, s: str, bulunan: set[str]) -> dict | None:
+        if self.haric and not self.haric.isdisjoint(bulunan):
+            return None
+        argumanlar = dict(self.sabit)
+        tamam = not self.kelimeler.isdisjoint(bulunan)
+        if not tamam and self.soru_isareti:
+            tamam = s.strip().endswith("?")
+        if not tamam and self.regex is not None and (not self.on_kelimeler or not self.on_kelimeler.isdisjoint(bulunan)):
+            m = self.regex.fullmatch(metin) if self.tam else self.regex.search(s)
+            if m:
+                tamam = True
+                argumanlar.update({k: v for k, v in m.groupdict().items() if v is not None})
+        if not tamam:
+            return None
+        for arg, grup in self.secenekler.items():
+            # Grup sırası önceliktir (metindeki konum değil)
+            argumanlar[arg] = next((deger for kelime, deger in grup.items() if kelime in bulunan), None)
+        return argumanlar
+
+
+def _grup(deger) -> dict:
+    """Liste → {kelime: kelime}; sözlük olduğu gibi (kelime → argüman değeri)."""
+    return dict(deger) if isinstance(deger, dict) else {k: k for k in deger}
+
+
+class NiyetYonlendirici:
+    """
+    Kurallar sırayla denenir; ilk tutan niyet döner, hiçbiri tutmazsa VARSAYILAN_NIYET.
+    Bayraklar (örn. "matematik" → model seçimi) niyetten bağımsız hep hesaplanır.
+    Hepsi aynı tek kelime taramasını kullanır.
+    """
+
+    def __init__(self, ayar: dict, gruplar: dict | None = None):
+        self.gruplar = {ad: _grup(g) for ad, g in {**ayar.get("gruplar", {}), **(gruplar or {})}.items()}
+        self.kurallar = [_Kural(k, self.gruplar) for k in ayar.get("niyetler", [])]
+        self.bayraklar = {ad: _Kural({"ad": ad, **b}, self.gruplar) for ad, b in ayar.get("bayraklar", {}).items()}
+        self._otomat = KelimeOtomati(
+            k for kural in [*self.kurallar, *self.bayraklar.values()] for k in kural.tum_kelimeler()
+        )
+
+    @classmethod
+    def dosyadan(cls, yol: str, gruplar: dict | None = None) -> "NiyetYonlendirici":
+        with open(yol, "r", encoding="utf-8") as f:
+            return cls(json.load(f), gruplar)
+
+    def yonlendir(self, metin: str, sadece=None) -> Niyet:
+        """`sadece` verilirse yalnızca o adlardaki kurallar denenir (tek bir dedektörün yerine)."""
+        s = metin.lower()
+        bulunan = self._otomat.tara(s)
+        bayraklar = frozenset(ad for ad, b in self.bayraklar.items() if b.eslesir(metin, s, bulunan) is not None)
+        for kural in self.kurallar:
+            if sadece is not None and kural.ad not in sadece:
+                continue
+            argumanlar = kural.eslesir(metin, s, bulunan)
+            if argumanlar is not None:
+                return Niyet(kural.ad, argumanlar, bayraklar)
+        return Niyet(VARSAYILAN_NIYET, {}, bayraklar)
+
+
+# ====== Mikro ölçüm ======
+ORNEK_MESAJLAR = [
+    "sen kimsin", "merhaba nasılsın bugün", "bunu ingilizceye çevir: günaydın", "saat kaç",
+    "5 yıl sonra hangi yıl", "12*(3+4)", "menemen tarifi", "istanbul'da en iyi restoran hangisi",
+    "Atatürk kimdir?", "bana kısa bir hikaye yaz", "pisagor teoremini kanıtla",
+    "Python'da liste ile demet arasındaki fark nedir ve hangisini ne zaman kullanmalıyım?",
+]
+
+
+def _basit_tarama(yonlendirici: NiyetYonlendirici, metin: str):
+    """Karşılaştırma için eski yöntem: her kural için ayrı `in` taraması ve regex."""
+    s = metin.lower()
+    for kural in [*yonlendirici.bayraklar.values(), *yonlendirici.kurallar]:
+        bulunan = {k for k in kural.tum_kelimeler() if k in s}
+        kural.eslesir(metin, s, bulunan)
+
+
+def main(argv=None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Niyet yönlendirici mesaj başı maliyet ölçümü")
+    ap.add_argument("--dosya", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "niyetler.json"))
+    ap.add_argument("--tekrar", type=int, default=20000)
+    args = ap.parse_args(argv)
+
+    yonlendirici = NiyetYonlendirici.dosyadan(args.dosya, gruplar={"tarifler": ["menemen", "pilav", "kuru fasulye"]})
+    for m in ORNEK_MESAJLAR:
+        print(f"  {m[:40]:42} → {yonlendirici.yonlendir(m)}")
+
+    for ad, fn in (("otomat", yonlendirici.yonlendir), ("kural başı tarama", lambda m: _basit_tarama(yonlendirici, m))):
+        baslangic = time.perf_counter()
+        for _ in range(args.tekrar):
+            for m in ORNEK_MESAJLAR:
+                fn(m)
+        us = 1e6 * (time.perf_counter() - baslangic) / (args.tekrar * len(ORNEK_MESAJLAR))
+        print(f"⏱️ {ad}: {us:.2f} µs/mesaj")
+
+
+if __name__ == "__main__":
+    main()
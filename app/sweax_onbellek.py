@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# sweax_onbellek.py — TTL + LRU önbellek (süreç içi), opsiyonel SQLite paylaşımlı katman
+# SQLite yolu verilirse gunicorn worker'ları aynı dosya üzerinden isabetleri paylaşır.
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+ONBELLEK_DB = os.environ.get("SWEAX_CACHE_DB")  # örn. "sweax_onbellek.db"; yoksa sadece RAM
+
+YOK = object()  # "önbellekte yok" işareti (None değeri de saklanabilsin diye)
+
+_isabet = metrik.sayac("onbellek_isabet")
+_iska = metrik.sayac("onbellek_iska")
+
+
+class _SqliteKatman:
+    """Worker'lar arası paylaşılan basit anahtar/değer tablosu (JSON değer + bitiş zamanı)."""
+
+    TEMIZLE_HER = 200  # bu kadar yazmada bir süresi dolanları sil
+
+    def __init__(self, yol: str):
+        self.yol = yol
+        self._yerel = threading.local()
+        self._yazma = 0
+        with self._baglanti() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS onbellek (
+                    ad TEXT NOT NULL,
+                    anahtar TEXT NOT NULL,
+                    deger TEXT NOT NULL,
+                    bitis REAL NOT NULL,
+                    PRIMARY KEY (ad, anahtar)
+                )
+            """)
+
+    def _baglanti(self) -> sqlite3.Connection:
+        # Thread ve süreç (fork) başına ayrı bağlantı
+        conn = getattr(self._yerel, "conn", None)
+        if conn is None or self._yerel.pid != os.getpid():
+            conn = sqlite3.connect(self.yol, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._yerel.conn, self._yerel.pid = conn, os.getpid()
+        return conn
+
+    def al(self, ad: str, anahtar: str):
+        row = self._baglanti().execute(
+            "SELECT deger, bitis FROM onbellek WHERE ad=? AND anahtar=?", (ad, anahtar)
+        ).fetchone()
+        if not row or row[1] < time.time():
+            return YOK, 0.0
+        return json.loads(row[0]), row[1]
+
+    def koy(self, ad: str, anahtar: str, deger, bitis: float):
+        conn = self._baglanti()
+        conn.execute(
+            "INSERT OR REPLACE INTO onbellek (ad, anahtar, deger, bitis) VALUES (?, ?, ?, ?)",
+            (ad, anahtar, json.dumps(deger, ensure_ascii=False), bitis)
+        )
+        self._yazma += 1
+        if self._yazma % self.TEMIZLE_HER == 0:
+            conn.execute("DELETE FROM onbellek WHERE bitis < ?", (time.time(),))
+
+    def sil(self, ad: str, anahtar: str):
+        self._baglanti().execute("DELETE FROM onbellek WHERE ad=? AND anahtar=?", (ad, anahtar))
+
+
+_sqlite_katmanlari: dict = {}
+_sqlite_kilit = threading.Lock()
+
+def _sqlite_katmani(yol: str) -> _SqliteKatman:
+    with _sqlite_kilit:
+        if yol not in _sqlite_katmanlari:
+            _sqlite_katmanlari[yol] = _SqliteKatman(yol)
+        return _sqlite_katmanlari[yol]
+
+
+class Onbellek:
+    """
+    Sınırlı, thread-safe TTL + LRU önbellek.
+    Anahtarlar tuple/str olabilir; SQLite katmanı kullanılıyorsa değerler JSON'a çevrilebilir olmalı.
+    İsabet/ıska sayıları sweax_metrik'te `ad` etiketiyle tutulur.
+    """
+
+    def __init__(self, ad: str, boyut: int = 512, ttl: float = 3600, sqlite_yolu: str | None = ONBELLEK_DB):
+        self.ad = ad
+        self.boyut = boyut
+        self.ttl = ttl
+        self._veri: "OrderedDict[object, tuple[object, float]]" = OrderedDict()
+        self._kilit = threading.Lock()
+        self._sqlite = None
+        if sqlite_yolu:
+            try:
+                self._sqlite = _sqlite_katmani(sqlite_yolu)
+            except Exception as e:
+                print(f"⚠️ Önbellek SQLite katmanı açılamadı ({sqlite_yolu}): {e}")
+
+    @staticmethod
+    def _anahtar_metni(anahtar) -> str:
+        return json.dumps(anahtar, ensure_ascii=False)
+
+    def al(self, anahtar, varsayilan=YOK):
+        simdi = time.time()
+        with self._kilit:
+            kayit = self._veri.get(anahtar)
+            if kayit is not None:
+                if kayit[1] >= simdi:
+                    self._veri.move_to_end(anahtar)
+                    _isabet.artir(self.ad)
+                    return kayit[0]
+                del self._veri[anahtar]
+
+        if self._sqlite is not None:
+            try:
+                deger, bitis = self._sqlite.al(self.ad, self._anahtar_metni(anahtar))
+            except Exception:
+                deger = YOK
+            if deger is not YOK:
+                self._bellege_koy(anahtar, deger, bitis)
+                _isabet.artir(self.ad)
+                return deger
+
+        _iska.artir(self.ad)
+        return varsayilan
+
+    def koy(self, anahtar, deger, ttl: float | None = None):
+        bitis = time.time() + (self.ttl if ttl is None else ttl)
+        self._bellege_koy(anahtar, deger, bitis)
+        if self._sqlite is not None:
+            try:
+                self._sqlite.koy(self.ad, self._anahtar_metni(anahtar), deger, bitis)
+            except Exception as e:
+                print(f"⚠️ Önbellek yazma hatası ({self.ad}): {e}")
+
+    def sil(self, anahtar):
+        with self._kilit:
+            self._veri.pop(anahtar, None)
+        if self._sqlite is not None:
+            try:
+                self._sqlite.sil(self.ad, self._anahtar_metni(anahtar))
+            except Exception:
+                pass
+
+    def temizle(self):
+        with self._kilit:
+            self._veri.clear()
+
+    def __len__(self):
+        return len(self._veri)
+
+    def _bellege_koy(self, anahtar, deger, bitis: float):
+        with self._kilit:
+            self._veri[anahtar] = (deger, bitis)
+            self._veri.move_to_end(anahtar)
+            while len(self._veri) > self.boyut:
+                self._veri.popitem(last=False)  # en az yakın zamanda kullanılan
+
+
+_birlesen = metrik.sayac("tek_ucus_bekleyen")
+
+
+class _Ucus:
+    __slots__ = ("olay", "sonuc", "hata")
+
+    def __init__(self):
+        self.olay = threading.Event()
+        self.sonuc = None
+        self.hata = None
+
+
+class TekUcus:
+    """
+    Single-flight: aynı anahtarla eşzamanlı gelen N çağrıdan yalnızca biri
+    (lider) asıl işi yapar, diğerleri onun sonucunu bekler.
+    Bekleyen sayısı sweax_metrik'te `ad` etiketiyle tutulur.
+    """
+
+    def __init__(self, ad: str):
+        self.ad = ad
+        self._kilit = threading.Lock()
+        self._aktif: dict = {}
+
+    def yap(self, anahtar, fn, *args, **kwargs):
+        with self._kilit:
+            ucus = self._aktif.get(anahtar)
+            lider = ucus is None
+            if lider:
+                ucus = self._aktif[anahtar] = _Ucus()
+
+        if not lider:
+            _birlesen.artir(self.ad)
+            ucus.olay.wait()
+            if ucus.hata is not None:
+                raise ucus.hata
+            return ucus.sonuc
+
+        try:
+            ucus.sonuc = fn(*args, **kwargs)
+            return ucus.sonuc
+        except BaseException as e:
+            ucus.hata = e
+            raise
+        finally:
+            with self._kilit:
+                self._aktif.pop(anahtar, None)
+            ucus.olay.set()
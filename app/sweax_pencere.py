@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# sweax_pencere.py — Ollama istemi için token bütçeli bağlam penceresi
+# Sistem istemi + yeni mesaj her zaman girer; kalan bütçe en yeni turlardan geriye doğru doldurulur.
+# Bütçeye sığmayan ilk (eski) mesaj kırpılır, daha eskileri atılır. Prompt-eval süresi bütçeyle sınırlanır.
+#
+# Token sayısı hızlı bir yaklaşımdır (kelime parçaları + noktalama); mesajlar yazılırken
+# messages.token_count sütununa kaydedilir, bütçeleme sırasında yeniden sayılmaz.
+import os
+import re
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+PENCERE_TOKEN     = int(os.environ.get("SWEAX_CONTEXT_TOKENS", "2048"))       # sistem + geçmiş + yeni mesaj
+PENCERE_MESAJ     = int(os.environ.get("SWEAX_CONTEXT_MESSAGES", "20"))       # bakılan en fazla geçmiş mesaj (= bağlam önbelleği N)
+MESAJ_MAX_TOKEN   = int(os.environ.get("SWEAX_CONTEXT_MSG_TOKENS", "512"))    # tek bir geçmiş mesajın payı
+KIRPMA_MIN_TOKEN  = 32   # bundan az yer kaldıysa mesaj kırpılmaz, atılır
+KELIME_PARCASI    = 4    # uzun kelimeler ~4 karakterlik alt parçalara bölünür (BPE yaklaşımı)
+KIRPMA_ISARETI    = " […]"
+
+_parca = re.compile(r"\w+|[^\w\s]")
+_pencere_token = metrik.sayac("baglam_token")      # etiket: istem (adet) / gecmis / toplam (token)
+_kirpilan = metrik.sayac("baglam_kirpilan")        # etiket: kirpildi / atildi / girdi
+
+
+def token_say(metin: str) -> int:
+    """Yaklaşık token sayısı: her kelime 1 + (uzunluk-1)//4, her noktalama 1."""
+    toplam = 0
+    for m in _parca.finditer(metin or ""):
+        toplam += 1 + (len(m.group()) - 1) // KELIME_PARCASI
+    return toplam
+
+
+def _kesim(metin: str, butce: int, sondan: bool) -> int:
+    """Baştan (ya da sondan) yaklaşık `butce` token'ın bittiği karakter konumu."""
+    sayac = 0
+    parcalar = list(_parca.finditer(metin))
+    for m in (reversed(parcalar) if sondan else parcalar):
+        sayac += 1 + (len(m.group()) - 1) // KELIME_PARCASI
+        if sayac > butce:
+            return m.end() if sondan else m.start()
+    return 0 if sondan else len(metin)
+
+
+def kirp(metin: str, butce: int) -> str:
+    """Metni yaklaşık `butce` token'a indirir (başı korunur)."""
+    kesim = _kesim(metin, max(butce, 0), sondan=False)
+    return metin if kesim >= len(metin) else metin[:kesim].rstrip() + KIRPMA_ISARETI
+
+
+def bas_son_kirp(metin: str, butce: int) -> str:
+    """Uzun girdi: baştan ve sondan yarım bütçe korunur, ortası atılır."""
+    bas, son = _kesim(metin, butce // 2, sondan=False), _kesim(metin, butce - butce // 2, sondan=True)
+    if bas >= son:
+        return metin
+    return metin[:bas].rstrip() + KIRPMA_ISARETI + " " + metin[son:].lstrip()
+
+
+def _mesaj_tokeni(mesaj: dict) -> int:
+    sayi = mesaj.get("token_count")
+    return sayi if sayi is not None else token_say(mesaj["content"])
+
+
+def pencere_olustur(sistem: str, gecmis: list[dict], metin: str, butce: int = PENCERE_TOKEN,
+                    mesaj_max: int = MESAJ_MAX_TOKEN) -> list[dict]:
+    """
+    [system, ...geçmiş (eskiden yeniye)..., user] listesi; toplam yaklaşık `butce` token'ı geçmez.
+    `gecmis` elemanlarında token_count varsa kullanılır (DB / bağlam önbelleği), yoksa sayılır.
+    """
+    kalan = butce - token_say(sistem)
+    girdi_token = token_say(metin)
+    if girdi_token > kalan:
+        metin = bas_son_kirp(metin, max(kalan, KIRPMA_MIN_TOKEN))
+        girdi_token = token_say(metin)
+        _kirpilan.artir("girdi")
+    kalan -= girdi_token
+
+    secilen = []
+    gecmis_token = 0
+    for mesaj in reversed(gecmis[-PENCERE_MESAJ:]):
+        if kalan <= 0:
+            _kirpilan.artir("atildi")
+            continue
+        icerik, sayi = mesaj["content"], _mesaj_tokeni(mesaj)
+        sinir = min(kalan, mesaj_max)
+        if sayi > sinir:
+            if sinir < KIRPMA_MIN_TOKEN:
+                _kirpilan.artir("atildi")
+                kalan = 0
+                continue
+            icerik = kirp(icerik, sinir)
+            sayi = token_say(icerik)
+            _kirpilan.artir("kirpildi")
+        secilen.append({"role": mesaj["role"], "content": icerik})
+        kalan -= sayi
+        gecmis_token += sayi
+
+    _pencere_token.artir("istem")
+    _pencere_token.artir("gecmis", gecmis_token)
+    _pencere_token.artir("toplam", butce - kalan)
+    secilen.reverse()
+    return [{"role": "system", "content": sistem}, *secilen, {"role": "user", "content": metin}]
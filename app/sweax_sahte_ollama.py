@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# sweax_sahte_ollama.py — Yerel deneme için sahte Ollama sunucusu (model yükleme gecikmeli)
+# Gerçek GPU olmadan model yerleşimi / keep_alive / soğuk yükleme davranışını görmek için:
+#
+#   python -m app.sweax_sahte_ollama --port 11435 --yukleme 3 --max-yuklu 1
+#   OLLAMA_URL=http://localhost:11435/api/chat python app/app.py
+#
+# Desteklenen uçlar: POST /api/chat (stream / stream=False, boş messages = sadece yükle),
+# GET /api/ps, GET /api/tags. Yüklü olmayan model istenirse `--yukleme` sn beklenir ve
+# en eski model boşaltılır; cevaplarda load_duration (ns) gerçek Ollama gibi döner.
+import re
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_SURE = re.compile(r"^(-?\d+(?:\.\d+)?)([smh]?)$")
+
+
+def keep_alive_sn(deger, varsayilan: float = 300.0) -> float | None:
+    """"30m" / "10s" / 300 / "-1" → saniye; negatif: süresiz (None)."""
+    if deger is None or deger == "":
+        return varsayilan
+    m = _SURE.match(str(deger).strip())
+    if not m:
+        return varsayilan
+    sayi = float(m.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[m.group(2)]
+    return None if sayi < 0 else sayi
+
+
+class SahteOllama:
+    """Yüklü modeller (LRU) + keep_alive bitişleri; yüklemeler sırayla yapılır (tek GPU gibi)."""
+
+    def __init__(self, yukleme_sn: float = 3.0, uretim_sn: float = 0.5, max_yuklu: int = 1):
+        self.yukleme_sn = yukleme_sn
+        self.uretim_sn = uretim_sn
+        self.max_yuklu = max(1, max_yuklu)
+        self._yuklu: "OrderedDict[str, float | None]" = OrderedDict()  # model → bitiş (monotonic) / None
+        self._kilit = threading.Lock()
+        self._yukleme_kilidi = threading.Lock()
+        self.yukleme_sayisi = 0
+
+    def _temizle(self):
+        simdi = time.monotonic()
+        for model in [m for m, bitis in self._yuklu.items() if bitis is not None and bitis <= simdi]:
+            del self._yuklu[model]
+
+    def hazirla(self, model: str, keep_alive) -> int:
+        """Modeli yükler (gerekirse bekleyerek); load_duration'ı ns olarak döndürür."""
+        sure = keep_alive_sn(keep_alive)
+        baslangic = time.monotonic()
+        with self._yukleme_kilidi:
+            with self._kilit:
+                self._temizle()
+                yuklu = model in self._yuklu
+            if not yuklu:
+                time.sleep(self.yukleme_sn)
+                self.yukleme_sayisi += 1
+            with self._kilit:
+                self._yuklu[model] = None if sure is None else time.monotonic() + sure
+                self._yuklu.move_to_end(model)
+                while len(self._yuklu) > self.max_yuklu:
+                    self._yuklu.popitem(last=False)
+                if sure == 0:
+                    del self._yuklu[model]
+        return int((time.monotonic() - baslangic) * 1e9) if not yuklu else 1_000_000
+
+    def ps(self) -> list[dict]:
+        with self._kilit:
+            self._temizle()
+            simdi = time.monotonic()
+            return [{"name": m, "model": m, "size_vram": 0,
+                     "expires_at": (datetime.now(timezone.utc) + timedelta(
+                         seconds=(bitis - simdi) if bitis is not None else 10 ** 6)).isoformat()}
+                    for m, bitis in self._yuklu.items()]
+
+
+def _isleyici(sunucu: SahteOllama):
+    class Isleyici(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, bicim, *args):
+            pass
+
+        def _json(self, veri: dict, durum: int = 200):
+            govde = json.dumps(veri, ensure_ascii=False).encode("utf-8")
+            self.send_response(durum)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(govde)))
+            self.end_headers()
+            self.wfile.write(govde)
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                self._json({"models": sunucu.ps()})
+            elif self.path == "/api/tags":
+                self._json({"models": [{"name": m["name"]} for m in sunucu.ps()]})
+            else:
+                self._json({"error": "bulunamadı"}, 404)
+
+        def do_POST(self):
+            if self.path != "/api/chat":
+                return self._json({"error": "bulunamadı"}, 404)
+            istek = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            model = istek.get("model") or ""
+            baslangic = time.monotonic()
+            load_ns = sunucu.hazirla(model, istek.get("keep_alive"))
+            zaman = datetime.now(timezone.utc).isoformat()
+            mesajlar = istek.get("messages") or []
+            if not mesajlar:
+                return self._json({"model": model, "created_at": zaman, "done": True, "done_reason": "load",
+                                   "message": {"role": "assistant", "content": ""}})
+
+            son = next((m.get("content", "") for m in reversed(mesajlar) if m.get("role") == "user"), "")
+            parcalar = f"[{model}] {son[:80]}".split(" ")
+            bitis = {"model": model, "created_at": zaman, "done": True, "done_reason": "stop",
+                     "load_duration": load_ns, "eval_count": len(parcalar)}
+            if istek.get("stream", True) is False:
+                time.sleep(sunucu.uretim_sn)
+                bitis["total_duration"] = int((time.monotonic() - baslangic) * 1e9)
+                return self._json({**bitis, "message": {"role": "assistant", "content": " ".join(parcalar)}})
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def yaz(veri: dict):
+                satir = (json.dumps(veri, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(satir):X}\r\n".encode() + satir + b"\r\n")
+
+            for i, parca in enumerate(parcalar):
+                time.sleep(sunucu.uretim_sn / len(parcalar))
+                yaz({"model": model, "created_at": zaman, "done": False,
+                     "message": {"role": "assistant", "content": parca if i == 0 else " " + parca}})
+            bitis["total_duration"] = int((time.monotonic() - baslangic) * 1e9)
+            yaz({**bitis, "message": {"role": "assistant", "content": ""}})
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Isleyici
+
+
+def calistir(port: int = 11435, yukleme_sn: float = 3.0, uretim_sn: float = 0.5, max_yuklu: int = 1,
+             arka_planda: bool = False) -> ThreadingHTTPServer:
+    """Sunucuyu başlatır; arka_planda=True ise daemon thread'de çalışır ve sunucu döner."""
+    sahte = SahteOllama(yukleme_sn, uretim_sn, max_yuklu)
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), _isleyici(sahte))
+    httpd.daemon_threads = True
+    httpd.sahte = sahte
+    if arka_planda:
+        threading.Thread(target=httpd.serve_forever, name="sahte-ollama", daemon=True).start()
+    else:
+        print(f"🧪 Sahte Ollama: http://127.0.0.1:{port}/api/chat (yükleme {yukleme_sn} sn, en fazla {max_yuklu} model)")
+        httpd.serve_forever()
+    return httpd
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Yükleme gecikmeli sahte Ollama sunucusu")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--yukleme", type=float, default=3.0, help="model yükleme süresi (sn)")
+    ap.add_argument("--uretim", type=float, default=0.5, help="cevap üretim süresi (sn)")
+    ap.add_argument("--max-yuklu", type=int, default=1, help="aynı anda bellekte tutulan model sayısı")
+    a = ap.parse_args()
+    calistir(a.port, a.yukleme, a.uretim, a.max_yuklu)
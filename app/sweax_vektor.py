@@ -0,0 +1,641 @@
+# -*- coding: utf-8 -*-
+# sweax_vektor.py — Süreç başına bellekte kalıcı bilgi indeksi (vektörler + BM25)
+# bilgi_bul artık her sorguda FAISS dosyasını ve depoyu yeniden okumuyor;
+# diğer worker'ların yazdıkları dosya sürümü (mtime/boyut) değişince yeniden yüklenir.
+import os
+import time
+import threading
+from array import array
+
+try:
+    from app.sweax_depo import icerik_ozeti
+except ModuleNotFoundError:
+    from sweax_depo import icerik_ozeti
+
+SNAPSHOT_HER    = int(os.environ.get("SWEAX_INDEX_SNAPSHOT_EVERY", "20"))       # bu kadar eklemede bir diske yaz
+SNAPSHOT_ARALIK = float(os.environ.get("SWEAX_INDEX_SNAPSHOT_INTERVAL", "60"))  # sn
+EKSIK_BEKLEME   = float(os.environ.get("SWEAX_INDEX_MISSING_WAIT", "120"))      # sn; bkz. BilgiIndeksi._eksik_kontrol
+KODLAMA_PARTI   = int(os.environ.get("SWEAX_EMBED_BATCH", "64"))                # model.encode batch_size
+
+
+def _dosya_surumu(yol: str):
+    try:
+        st = os.stat(yol)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
+
+
+def _atomik_yaz(yol: str, yazici):
+    """Önce geçici dosyaya yazar, sonra os.replace ile yerine koyar (yarım dosya görünmez)."""
+    gecici = f"{yol}.{os.getpid()}.tmp"
+    try:
+        yazici(gecici)
+        os.replace(gecici, yol)
+    finally:
+        if os.path.exists(gecici):
+            os.remove(gecici)
+
+
+def _bastan_at(bloklar: list, adet: int) -> list:
+    """Satır bloklarının ilk `adet` satırını atar (diske yazılmış bekleyen satırlar)."""
+    kalan = []
+    for blok in bloklar:
+        if adet >= len(blok):
+            adet -= len(blok)
+        else:
+            kalan.append(blok[adet:])
+            adet = 0
+    return kalan
+
+
+class FaissArka:
+    """faiss.IndexFlatL2 üzerinde vektör deposu."""
+
+    def __init__(self, faiss, yol: str):
+        self.faiss = faiss
+        self.yol = yol
+        self.index = None
+        self._diskte = 0
+
+    def yukle(self):
+        self.index = self.faiss.read_index(self.yol) if os.path.exists(self.yol) else None
+        self._diskte = self.sayi()
+
+    def yeniden_yukle(self) -> bool:
+        """Başka sürecin yazdığı dosya; bizdekinden kısaysa (eski snapshot) yok sayılır."""
+        if not os.path.exists(self.yol):
+            return False
+        index = self.faiss.read_index(self.yol)
+        if index.ntotal < self.sayi():
+            return False
+        self.index, self._diskte = index, index.ntotal
+        return True
+
+    def sifirla(self):
+        self.index, self._diskte = None, 0
+
+    def sayi(self) -> int:
+        return self.index.ntotal if self.index is not None else 0
+
+    def diskte(self) -> int:
+        return self._diskte
+
+    def ekle(self, vektorler):
+        if self.index is None:
+            self.index = self.faiss.IndexFlatL2(vektorler.shape[1])
+        self.index.add(vektorler)
+
+    def ara(self, sorgu, top_k: int) -> list[int]:
+        if not self.sayi():
+            return []
+        _, idx = self.index.search(sorgu, top_k)
+        return [int(i) for i in idx[0] if i >= 0]
+
+    def kaydet(self):
+        if self.index is not None:
+            _atomik_yaz(self.yol, lambda gecici: self.faiss.write_index(self.index, gecici))
+            self._diskte = self.sayi()
+
+
+class NumpyArka:
+    """
+    faiss olmadan vektör arama: normalize float32 matris (.npy, diskten mmap),
+    kosinüs benzerliği = toplu dot product, top-k = argpartition.
+    Yeni eklenenler snapshot'a kadar ayrı bir bellek bloğunda tutulur.
+    """
+
+    def __init__(self, np, yol: str):
+        self.np = np
+        self.yol = yol
+        self.matris = None     # diskteki (mmap) kısım
+        self.yeni = []         # henüz yazılmamış satır blokları
+
+    def yukle(self):
+        self.yeni = []
+        self.matris = self.np.load(self.yol, mmap_mode="r") if os.path.exists(self.yol) else None
+
+    def yeniden_yukle(self) -> bool:
+        """
+        Başka sürecin yazdığı dosyayı alır; bekleyen satırlardan diskte olmayanlar korunur
+        (kodlanmış vektörler atılıp yeniden kodlanmaz). Dosya bizdekinden eskiyse yok sayılır.
+        """
+        if not os.path.exists(self.yol):
+            return False
+        matris = self.np.load(self.yol, mmap_mode="r")
+        if len(matris) < self.diskte():
+            return False
+        self.yeni = _bastan_at(self.yeni, len(matris) - self.diskte())
+        self.matris = matris
+        return True
+
+    def sifirla(self):
+        self.matris, self.yeni = None, []
+
+    def diskte(self) -> int:
+        return len(self.matris) if self.matris is not None else 0
+
+    def sayi(self) -> int:
+        return self.diskte() + sum(len(b) for b in self.yeni)
+
+    def _normalize(self, v):
+        v = self.np.ascontiguousarray(v, dtype=self.np.float32)
+        norm = self.np.linalg.norm(v, axis=1, keepdims=True)
+        return v / self.np.maximum(norm, 1e-12)
+
+    def ekle(self, vektorler):
+        self.yeni.append(self._normalize(vektorler))
+
+    def ara(self, sorgu, top_k: int) -> list[int]:
+        if not self.sayi():
+            return []
+        q = self._normalize(sorgu)[0]
+        parcalar = ([self.matris @ q] if self.matris is not None else []) + [b @ q for b in self.yeni]
+        skor = parcalar[0] if len(parcalar) == 1 else self.np.concatenate(parcalar)
+        k = min(top_k, len(skor))
+        aday = self.np.argpartition(-skor, k - 1)[:k]
+        return [int(i) for i in aday[self.np.argsort(-skor[aday])]]
+
+    def kaydet(self):
+        if not self.yeni:
+            return
+        bloklar = ([self.np.asarray(self.matris)] if self.matris is not None else []) + self.yeni
+        tum = self.np.ascontiguousarray(self.np.vstack(bloklar), dtype=self.np.float32)
+
+        def yaz(gecici):
+            with open(gecici, "wb") as f:
+                self.np.save(f, tum)
+
+        _atomik_yaz(self.yol, yaz)
+        self.yukle()
+
+
+def _npy_parcali_yaz(np, yol: str, bloklar, boyut: int, dtype, parca: int = 8192):
+    """
+    Blokları tek .npy dosyasına parça parça kopyalar (open_memmap);
+    mmap'li eski dosya + yeni satırlar birleştirilirken tamamı belleğe alınmaz.
+    """
+    satir = sum(len(b) for b in bloklar)
+    hedef = np.lib.format.open_memmap(yol, mode="w+", dtype=dtype, shape=(satir, boyut))
+    i = 0
+    for blok in bloklar:
+        for j in range(0, len(blok), parca):
+            parca_blok = blok[j:j + parca]
+            hedef[i:i + len(parca_blok)] = parca_blok
+            i += len(parca_blok)
+    hedef.flush()
+    del hedef
+
+
+class NicemArka:
+    """
+    Sıkıştırılmış vektör deposu (NumpyArka'nın 2–4 kat küçük hâli):
+    normalize vektörler int8 (satır başına ölçekli) ya da float16 kodlanır.
+    Arama kodlar üzerinde parça parça yapılır; ilk top_k * yeniden_skor aday tam hassasiyetli
+    kopyayla yeniden sıralanır. Dosyalar (hepsi mmap):
+      yol            — kodlar (int8 / float16); sürüm kontrolü bu dosyaya bakar
+      yol.olcek.npy  — int8 satır ölçekleri (float32)
+      yol.tam.npy    — float32 vektörler; sadece adayların satırları okunur
+    """
+
+    TARAMA_PARCA = 8192  # int8 → float32 dönüşümü bu kadar satırlık parçalarla
+
+    def __init__(self, np, yol: str, tur: str = "int8", yeniden_skor: int = 4):
+        if tur not in ("int8", "float16"):
+            raise ValueError(f"desteklenmeyen nicemleme: {tur}")
+        self.np = np
+        self.yol = yol
+        self.tur = tur
+        self.yeniden_skor = max(1, yeniden_skor)
+        self.sifirla()
+
+    @property
+    def _olcek_yolu(self) -> str:
+        return f"{self.yol}.olcek.npy"
+
+    @property
+    def _tam_yolu(self) -> str:
+        return f"{self.yol}.tam.npy"
+
+    def _oku(self):
+        """(kodlar, ölçekler, tam) mmap'leri; dosyalar yoksa None."""
+        if not os.path.exists(self.yol) or not os.path.exists(self._tam_yolu):
+            return None
+        kodlar = self.np.load(self.yol, mmap_mode="r")
+        tam = self.np.load(self._tam_yolu, mmap_mode="r")
+        olcek = self.np.load(self._olcek_yolu, mmap_mode="r") if self.tur == "int8" else None
+        # Dosyalar sırayla yazılır ve hep sona eklenir: yazım ortasında okunursa ortak önek tutarlıdır
+        n = min(len(kodlar), len(tam), len(olcek) if olcek is not None else len(kodlar))
+        return kodlar[:n], olcek[:n] if olcek is not None else None, tam[:n]
+
+    def yukle(self):
+        self.sifirla()
+        okunan = self._oku()
+        if okunan is not None:
+            self.kodlar, self.olcek, self.tam = okunan
+
+    def yeniden_yukle(self) -> bool:
+        """NumpyArka.yeniden_yukle gibi: diskte olmayan bekleyen satırlar korunur."""
+        okunan = self._oku()
+        if okunan is None or len(okunan[0]) < self.diskte():
+            return False
+        self.yeni = _bastan_at(self.yeni, len(okunan[0]) - self.diskte())
+        self.kodlar, self.olcek, self.tam = okunan
+        return True
+
+    def sifirla(self):
+        self.kodlar, self.olcek, self.tam, self.yeni = None, None, None, []
+
+    def diskte(self) -> int:
+        return len(self.kodlar) if self.kodlar is not None else 0
+
+    def sayi(self) -> int:
+        return self.diskte() + sum(len(b) for b in self.yeni)
+
+    def _normalize(self, v):
+        v = self.np.ascontiguousarray(v, dtype=self.np.float32)
+        norm = self.np.linalg.norm(v, axis=1, keepdims=True)
+        return v / self.np.maximum(norm, 1e-12)
+
+    def _nicemle(self, v):
+        """float32 → (kodlar, ölçekler); float16'da ölçek yok."""
+        if self.tur == "float16":
+            return v.astype(self.np.float16), None
+        olcek = self.np.maximum(self.np.abs(v).max(axis=1), 1e-12) / 127.0
+        kod = self.np.clip(self.np.rint(v / olcek[:, None]), -127, 127).astype(self.np.int8)
+        return kod, olcek.astype(self.np.float32)
+
+    def ekle(self, vektorler):
+        # Snapshot'a kadar tam hassasiyetle bellekte; kodlama kaydet()'te
+        self.yeni.append(self._normalize(vektorler))
+
+    def _kaba_skor(self, q):
+        np = self.np
+        n = len(self.kodlar)
+        skor = np.empty(n, dtype=np.float32)
+        for i in range(0, n, self.TARAMA_PARCA):
+            blok = self.kodlar[i:i + self.TARAMA_PARCA].astype(np.float32) @ q
+            if self.olcek is not None:
+                blok *= self.olcek[i:i + self.TARAMA_PARCA]
+            skor[i:i + len(blok)] = blok
+        return skor
+
+    def ara(self, sorgu, top_k: int) -> list[int]:
+        toplam = self.sayi()
+        if not toplam:
+            return []
+        np = self.np
+        q = self._normalize(sorgu)[0]
+        n_disk = len(self.kodlar) if self.kodlar is not None else 0
+        parcalar = ([self._kaba_skor(q)] if n_disk else []) + [b @ q for b in self.yeni]
+        skor = parcalar[0] if len(parcalar) == 1 else np.concatenate(parcalar)
+
+        m = min(top_k * self.yeniden_skor, toplam)
+        aday = np.argpartition(-skor, m - 1)[:m]
+        # Diskteki adaylar tam hassasiyetle yeniden skorlanır (yeniler zaten tam)
+        diskte = aday[aday < n_disk]
+        if len(diskte):
+            sira = np.sort(diskte)  # mmap'te sıralı okuma
+            skor[sira] = np.asarray(self.tam[sira], dtype=np.float32) @ q
+        k = min(top_k, m)
+        en_iyi = aday[np.argsort(-skor[aday])][:k]
+        return [int(i) for i in en_iyi]
+
+    def kaydet(self):
+        if not self.yeni:
+            return
+        np = self.np
+        yeni = np.vstack(self.yeni)
+        kod, olcek = self._nicemle(yeni)
+        boyut = yeni.shape[1]
+        eski = self.kodlar is not None and len(self.kodlar)
+
+        # Sıra önemli: sürüm dosyası (kodlar) en son yazılır
+        _atomik_yaz(self._tam_yolu, lambda g: _npy_parcali_yaz(
+            np, g, ([self.tam] if eski else []) + [yeni], boyut, np.float32))
+        if olcek is not None:
+            tum_olcek = np.concatenate(([np.asarray(self.olcek)] if eski else []) + [olcek])
+
+            def olcek_yaz(gecici):
+                with open(gecici, "wb") as f:
+                    np.save(f, tum_olcek)
+
+            _atomik_yaz(self._olcek_yolu, olcek_yaz)
+        _atomik_yaz(self.yol, lambda g: _npy_parcali_yaz(
+            np, g, ([self.kodlar] if eski else []) + [kod], boyut, kod.dtype))
+        self.yukle()
+
+    def bellek_bayt(self) -> int:
+        """Aramada taranan (RAM'de tutulması gereken) veri: kodlar + ölçekler."""
+        n = self.kodlar.nbytes if self.kodlar is not None else 0
+        return n + (self.olcek.nbytes if self.olcek is not None else 0)
+
+
+class BilgiIndeksi:
+    """
+    Bilgi deposu (sweax_depo.BilgiDeposu) üzerindeki arama indekslerinin süreç içi kopyası.
+    - Vektörler / BM25 bir kez yüklenir; sorgu bellekte aranır. İndeksteki i. konum `idler[i]` kaydıdır.
+    - Ekleme artımlıdır; indeks dosyaları her SNAPSHOT_HER eklemede / SNAPSHOT_ARALIK sn'de atomik yazılır.
+    - Başka worker'ların eklediği kayıtlar (id > son id) ve yazdığı indeks dosyaları (mtime/boyut)
+      bir sonraki erişimde alınır. Okuma yolu (ara) hiç kodlama yapmaz: vektörü olmayan kayıtlar
+      onları ekleyen worker'ın snapshot'ıyla gelir; gelmezse alım thread'inde (eksik_bildir →
+      eksikleri_kodla) kodlanır.
+    Model veya vektör arka ucu yoksa (SWEAX_LIGHT) arama `sozluk` (BM25 ters indeksi)
+    ile yapılır; o da yoksa konu alt-dize taramasına düşülür.
+    """
+
+    def __init__(self, depo, arka=None, model=None, sozluk=None, sozluk_min_skor: float = 0.0,
+                 eksik_bildir=None):
+        self.depo = depo
+        self.arka = arka if model is not None else None
+        self.model = model
+        self.sozluk = sozluk
+        self.sozluk_min_skor = sozluk_min_skor
+        self.idler = array("q")
+        self._kilit = threading.RLock()
+        self.eksik_bildir = eksik_bildir  # vektörü eksik kayıtlar uzun süre kalırsa çağrılır (bloklamamalı)
+        self._vektor_surum = None
+        self._sozluk_surum = None
+        self._eksik_zaman = None
+        self._sozluk_kirli = 0
+        self._son_snapshot = time.monotonic()
+        self.snapshot_her = SNAPSHOT_HER  # toplu yüklemede büyütülür (her checkpoint tüm dosyayı yazar)
+        with self._kilit:
+            self.idler.extend(self.depo.yeni_idler(0))
+            self._vektor_yukle()
+            self._sozluk_yukle()
+
+    # ---- yükleme / senkron ----
+    def _vektor_yukle(self):
+        if self.arka is None:
+            return
+        try:
+            self.arka.yukle()
+        except Exception as e:
+            print(f"⚠️ Vektör indeksi okunamadı, yeniden kurulacak: {e}")
+            self.arka.sifirla()
+        self._vektor_surum = _dosya_surumu(self.arka.yol)
+
+    def _vektor_yenile(self):
+        """Başka worker'ın snapshot'ı: bekleyen (henüz yazılmamış) vektörler korunarak alınır."""
+        try:
+            self.arka.yeniden_yukle()
+        except Exception as e:
+            print(f"⚠️ Vektör indeksi yeniden okunamadı, bellekteki kullanılıyor: {e}")
+        self._vektor_surum = _dosya_surumu(self.arka.yol)
+        if self.arka.sayi() > len(self.idler):
+            # Snapshot, bizim gördüğümüzden yeni kayıtları içeriyor
+            self.idler.extend(self.depo.yeni_idler(self.idler[-1] if self.idler else 0))
+
+    def _sozluk_yukle(self):
+        if self.sozluk is None:
+            return
+        try:
+            self.sozluk.yukle()
+        except Exception as e:
+            print(f"⚠️ BM25 indeksi okunamadı, yeniden kurulacak: {e}")
+            self.sozluk.sifirla()
+        self._sozluk_surum = _dosya_surumu(self.sozluk.yol)
+        self._sozluk_eksikleri()
+
+    def _kayit_parcalari(self, baslangic: int, parca: int = 1000):
+        """idler[baslangic:] kayıtlarını depodan parça parça getirir."""
+        for i in range(baslangic, len(self.idler), parca):
+            yield self.depo.getir(self.idler[i:i + parca])
+
+    def _sozluk_eksikleri(self):
+        n = self.sozluk.sayi()
+        if n > len(self.idler):
+            self.sozluk.sifirla()
+            n = 0
+        for kayitlar in self._kayit_parcalari(n):
+            for k in kayitlar:
+                self.sozluk.ekle(k["konu"], k["icerik"])
+        self._sozluk_kirli += len(self.idler) - n
+
+    def _kodla(self, metinler: list[str]):
+        return self.model.encode(metinler, batch_size=KODLAMA_PARTI).astype("float32")
+
+    def _eksikleri_kodla(self, hazir: dict | None = None):
+        """
+        İndeks kayıtlardan gerideyse kuyruğu kodlar; ilerideyse (depo küçüldü) baştan kurar.
+        `hazir`: {id: vektör} — kilit dışında önceden kodlanmış kayıtlar yeniden kodlanmaz.
+        Yalnızca yazma yolunda (toplu_ekle) çağrılır.
+        """
+        n = self.arka.sayi()
+        if n > len(self.idler):
+            self.arka.sifirla()
+            n = 0
+        hazir = hazir or {}
+        for i in range(n, len(self.idler), 1000):
+            parca = list(self.idler[i:i + 1000])
+            kodlanacak = self.depo.getir(j for j in parca if j not in hazir)
+            kodlar = dict(hazir)
+            if kodlanacak:
+                kodlar.update(zip((k["id"] for k in kodlanacak), self._kodla([k["icerik"] for k in kodlanacak])))
+            self.arka.ekle(self._satirlari_birlestir([kodlar[j] for j in parca]))
+
+    @staticmethod
+    def _satirlari_birlestir(satirlar):
+        import numpy as np
+        return np.ascontiguousarray(np.vstack(satirlar), dtype=np.float32)
+
+    def _vektor_kirli(self) -> int:
+        return self.arka.sayi() - self.arka.diskte() if self.arka is not None else 0
+
+    def _eksik_kontrol(self) -> bool:
+        """
+        Okuma yolu: vektörü olmayan kayıtlar EKSIK_BEKLEME sn'den uzun süredir bekliyorsa True
+        (ekleyen worker'ın snapshot'ı gelmedi; kodlama alım thread'ine bırakılır).
+        """
+        if self.arka.sayi() >= len(self.idler):
+            self._eksik_zaman = None
+            return False
+        simdi = time.monotonic()
+        if self._eksik_zaman is None:
+            self._eksik_zaman = simdi
+            return False
+        if simdi - self._eksik_zaman < EKSIK_BEKLEME:
+            return False
+        self._eksik_zaman = simdi  # bir sonraki bildirim yine EKSIK_BEKLEME sonra
+        return True
+
+    def guncel_tut(self, hazir: dict | None = None, kodla: bool = False) -> list[int]:
+        """
+        Diğer süreçlerin eklediği kayıtları / yazdığı indeks dosyalarını alır (ucuz: bir PK sorgusu + os.stat).
+        kodla=True yalnızca yazma yolunda: vektörü eksik kayıtlar hemen kodlanır.
+        """
+        with self._kilit:
+            yeni = self.depo.yeni_idler(self.idler[-1] if self.idler else 0)
+            self.idler.extend(yeni)
+            if self.arka is not None:
+                if _dosya_surumu(self.arka.yol) != self._vektor_surum:
+                    self._vektor_yenile()
+                if kodla:
+                    self._eksikleri_kodla(hazir)
+            if self.sozluk is not None:
+                if _dosya_surumu(self.sozluk.yol) != self._sozluk_surum:
+                    self._sozluk_yukle()
+                elif yeni:
+                    self._sozluk_eksikleri()
+            return yeni
+
+    # ---- dış API ----
+    def ekle(self, konu: str, icerik: str) -> int | None:
+        return self.toplu_ekle([(konu, icerik)])[0]
+
+    def toplu_ekle(self, kayitlar: list[tuple[str, str]]) -> list[int | None]:
+        """
+        Kayıtları tek partide ekler: depoda zaten olan içerikler kodlanmadan elenir,
+        kalanlar tek model.encode çağrısıyla kodlanıp indekse toplu eklenir.
+        Dönüş: kayıt başına yeni id (tekrarsa None).
+        """
+        ozetler = [icerik_ozeti(i) for _, i in kayitlar]
+        gorulen = self.depo.mevcut_ozetler(ozetler)
+        adaylar, aday_ozetleri = [], []
+        for kayit, ozet in zip(kayitlar, ozetler):
+            if ozet not in gorulen:
+                gorulen.add(ozet)
+                adaylar.append(kayit)
+                aday_ozetleri.append(ozet)
+        # Model çıkarımı kilit dışında
+        vektorler = self._kodla([i for _, i in adaylar]) if self.arka is not None and adaylar else None
+        aday_idler = self.depo.toplu_ekle(adaylar) if adaylar else []
+        hazir = None
+        if vektorler is not None:
+            hazir = {id_: v for id_, v in zip(aday_idler, vektorler) if id_ is not None}
+        with self._kilit:
+            # Araya başka worker'ların kayıtları girmiş olabilir; hepsi id sırasıyla eklenir
+            self.guncel_tut(hazir=hazir, kodla=True)
+            self._belki_snapshot()
+        yeni = dict(zip(aday_ozetleri, aday_idler))
+        return [yeni.pop(ozet, None) for ozet in ozetler]
+
+    def eksikleri_kodla(self, parca: int = 1000) -> int:
+        """
+        Vektörü olmayan kayıtları (açılışta ya da ekleyen worker'ın snapshot'ı gelmediğinde)
+        parça parça kodlar; model çıkarımı kilit dışında. Alım thread'inden çağrılır.
+        Dönüş: kodlanan kayıt sayısı.
+        """
+        if self.arka is None:
+            return 0
+        kodlanan = 0
+        while True:
+            with self._kilit:
+                self.guncel_tut()
+                n = self.arka.sayi()
+                idler = list(self.idler[n:n + parca])
+            if not idler:
+                return kodlanan
+            kayitlar = self.depo.getir(idler)
+            kodlar = dict(zip((k["id"] for k in kayitlar), self._kodla([k["icerik"] for k in kayitlar])))
+            with self._kilit:
+                # Bu arada gelen bir snapshot aynı satırları getirdiyse eklenmez
+                if self.arka.sayi() == n:
+                    self.arka.ekle(self._satirlari_birlestir([kodlar[j] for j in idler]))
+                    kodlanan += len(idler)
+                self._belki_snapshot()
+
+    def ara(self, soru: str, top_k: int = 2) -> list[dict]:
+        self.guncel_tut()
+        if self.arka is not None and self.eksik_bildir is not None:
+            with self._kilit:
+                bildir = self._eksik_kontrol()
+            if bildir:
+                self.eksik_bildir()
+        if self.arka is None or not self.arka.sayi():
+            if self.sozluk is None:
+                # en hafif fallback: konu kelimesi geçen son kayıtlar
+                return self.depo.konu_gecenler(soru, top_k)
+            with self._kilit:
+                konumlar = self.sozluk.ara(soru, top_k, min_skor=self.sozluk_min_skor)
+                idler = [self.idler[i] for i in konumlar if i < len(self.idler)]
+        else:
+            q = self._kodla([soru])
+            with self._kilit:
+                idler = [self.idler[i] for i in self.arka.ara(q, top_k) if i < len(self.idler)]
+        return self.depo.getir(idler)
+
+    def snapshot(self):
+        """Bekleyen vektörleri / BM25 indeksini diske yazar (atexit'te de çağrılır)."""
+        with self._kilit:
+            if self.arka is not None and self._vektor_kirli():
+                self.arka.kaydet()
+                self._vektor_surum = _dosya_surumu(self.arka.yol)
+            if self.sozluk is not None and self._sozluk_kirli:
+                _atomik_yaz(self.sozluk.yol, self.sozluk.yaz)
+                self._sozluk_surum = _dosya_surumu(self.sozluk.yol)
+                self._sozluk_kirli = 0
+            self._son_snapshot = time.monotonic()
+
+    # ---- iç yardımcılar ----
+    def _belki_snapshot(self):
+        kirli = max(self._vektor_kirli(), self._sozluk_kirli)
+        if kirli >= self.snapshot_her or (kirli and time.monotonic() - self._son_snapshot > SNAPSHOT_ARALIK):
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"⚠️ Bilgi indeksi yazılamadı: {e}")
+
+
+# ====== Nicemleme karşılaştırması ======
+def nicem_olc(np, vektorler, sorgular, k: int = 10, tur: str = "int8", yeniden_skor: int = 4) -> dict:
+    """NicemArka'yı tam (float32) kaba kuvvet aramaya karşı ölçer: recall@k, bellek, sorgu süresi."""
+    import tempfile
+
+    tam = vektorler / np.maximum(np.linalg.norm(vektorler, axis=1, keepdims=True), 1e-12)
+    with tempfile.TemporaryDirectory() as dizin:
+        arka = NicemArka(np, os.path.join(dizin, "v.npy"), tur=tur, yeniden_skor=yeniden_skor)
+        arka.ekle(vektorler)
+        arka.kaydet()
+        isabet, sure = 0, 0.0
+        for q in sorgular:
+            q = q[None, :].astype(np.float32)
+            qn = q[0] / max(np.linalg.norm(q[0]), 1e-12)
+            dogru = set(np.argpartition(-(tam @ qn), k - 1)[:k].tolist())
+            baslangic = time.perf_counter()
+            bulunan = arka.ara(q, k)
+            sure += time.perf_counter() - baslangic
+            isabet += len(dogru & set(bulunan))
+        return {
+            "tur": tur,
+            "yeniden_skor": yeniden_skor,
+            f"recall@{k}": isabet / (k * len(sorgular)),
+            "bellek_mb": arka.bellek_bayt() / 2**20,
+            "float32_mb": tam.nbytes / 2**20,
+            "sorgu_ms": 1000 * sure / len(sorgular),
+        }
+
+
+def main(argv=None):
+    import argparse
+    import numpy as np
+
+    ap = argparse.ArgumentParser(description="int8 / float16 vektör deposunun tam indekse göre recall@k ölçümü")
+    ap.add_argument("--npy", help="gerçek vektörler (örn. bilgi_index.npy); yoksa sentetik kümeli veri")
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--boyut", type=int, default=384)
+    ap.add_argument("--sorgu", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    if args.npy:
+        vektorler = np.load(args.npy).astype(np.float32)
+    else:
+        merkezler = rng.normal(size=(max(1, args.n // 50), args.boyut))
+        vektorler = (merkezler[rng.integers(len(merkezler), size=args.n)]
+                     + 0.5 * rng.normal(size=(args.n, args.boyut))).astype(np.float32)
+    sorgular = vektorler[rng.integers(len(vektorler), size=args.sorgu)] + \
+        0.1 * rng.normal(size=(args.sorgu, vektorler.shape[1])).astype(np.float32)
+
+    print(f"📊 {len(vektorler)} vektör × {vektorler.shape[1]} boyut, {args.sorgu} sorgu")
+    for tur in ("int8", "float16"):
+        for yeniden_skor in (1, 4):
+            r = nicem_olc(np, vektorler, sorgular, args.k, tur, yeniden_skor)
+            print(f"  {tur:8} yeniden_skor={yeniden_skor}: recall@{args.k}={r[f'recall@{args.k}']:.3f}  "
+                  f"bellek={r['bellek_mb']:.1f} MB (float32 {r['float32_mb']:.1f} MB)  {r['sorgu_ms']:.2f} ms/sorgu")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# sweax_zamanlayici.py — Ollama çağrıları için kabul kontrolü + öncelikli kuyruk
+# Aynı anda en fazla SWEAX_LLM_CONCURRENCY üretim; fazlası kuyrukta bekler.
+#   - Öncelik: sohbet (kullanıcı bekliyor) > kaynaklı özet (Wikipedia / web) > arka plan işleri
+#   - Aynı öncelikte o an en az slot tutan kullanıcı önce (adil pay), sonra geliş sırası
+#   - Öndeki kuyruğun tahmini süresi bütçeyi aşacaksa istek kuyruğa hiç girmez: MesgulHatasi (HTTP 429)
+#     (çalışan üretimlerin kalan süresi bilinmez; onlar için bütçe kadar beklenir)
+# Süreç başınadır: gunicorn -w N ile toplam eşzamanlılık N × SWEAX_LLM_CONCURRENCY olur.
+import os
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+try:
+    import app.sweax_metrik as metrik
+except ModuleNotFoundError:
+    import sweax_metrik as metrik
+
+LLM_ESZAMANLI = int(os.environ.get("SWEAX_LLM_CONCURRENCY", "2"))
+LLM_KUYRUK    = int(os.environ.get("SWEAX_LLM_QUEUE", "32"))           # en fazla bekleyen istek
+LLM_BUTCE     = float(os.environ.get("SWEAX_LLM_QUEUE_BUDGET", "20"))  # sn; sohbet için en fazla kuyruk bekleme
+LLM_ORT_SURE  = float(os.environ.get("SWEAX_LLM_EXPECTED_S", "8"))     # sn; ölçüm gelene kadar üretim süresi tahmini
+
+ONCELIK_SOHBET = 0   # ana sohbet cevabı
+ONCELIK_OZET   = 1   # Wikipedia / web sonuçlarına dayalı cevap (meşgulse ham kaynak döner)
+ONCELIK_ARKA   = 2   # ertelenebilir arka plan üretimleri (meşgulse atlanır)
+_ONCELIK_ADI = {ONCELIK_SOHBET: "sohbet", ONCELIK_OZET: "ozet", ONCELIK_ARKA: "arka"}
+# Önceliğe göre kuyruk bekleme bütçesi (sn); yedeği olan işler kısa bekler
+_BUTCE = {
+    ONCELIK_SOHBET: LLM_BUTCE,
+    ONCELIK_OZET: float(os.environ.get("SWEAX_LLM_SUMMARY_BUDGET", "5")),
+    ONCELIK_ARKA: float(os.environ.get("SWEAX_LLM_BACKGROUND_BUDGET", "2")),
+}
+
+_kabul = metrik.sayac("llm_kabul")                     # etiket: hemen / kuyruk / reddedildi / zaman_asimi
+_bekleme = metrik.histogram("llm_kuyruk_bekleme_ms")   # etiket: öncelik
+_sure = metrik.histogram("llm_slot_ms")                # etiket: öncelik (slot tutma süresi)
+
+
+class MesgulHatasi(RuntimeError):
+    """Kuyruk dolu ya da tahmini bekleme bütçeyi aşıyor; `bekleme` sn sonra tekrar denenebilir."""
+
+    def __init__(self, bekleme: float):
+        super().__init__("Model şu an çok yoğun, lütfen biraz sonra tekrar deneyin.")
+        self.bekleme = bekleme
+
+
+class _Bekleyen:
+    __slots__ = ("oncelik", "kullanici", "sira", "geldi", "verildi", "bildir")
+
+    def __init__(self, oncelik: int, kullanici, sira: int, bildir):
+        self.oncelik = oncelik
+        self.kullanici = kullanici
+        self.sira = sira
+        self.geldi = time.monotonic()
+        self.verildi = None  # slot verildiği an
+        self.bildir = bildir
+
+
+class LLMZamanlayici:
+    """
+    Sınırlı eşzamanlılık + öncelik + kullanıcı başına adil pay.
+    Senkron:  with LLM.izin(ONCELIK_SOHBET, kullanici_id): ...
+    Async:    async with LLM.izin_async(ONCELIK_SOHBET, kullanici_id): ...
+    """
+
+    def __init__(self, eszamanli: int = LLM_ESZAMANLI, kuyruk: int = LLM_KUYRUK, butce: float = LLM_BUTCE,
+                 ort_sure: float = LLM_ORT_SURE):
+        self.eszamanli = max(1, eszamanli)
+        self.kuyruk = kuyruk
+        self.butce = {**_BUTCE, ONCELIK_SOHBET: butce}
+        self.ort_sure = ort_sure  # slot tutma süresinin üstel hareketli ortalaması
+        self._kilit = threading.Lock()
+        self._bekleyenler: list[_Bekleyen] = []
+        self._aktif = 0
+        self._kullanici_aktif: dict = {}
+        self._sira = 0
+
+    # ---- iç işleyiş (hepsi _kilit altında) ----
+    def _tahmini_bekleme(self, oncelik: int) -> float:
+        """Öndeki kuyruğun süresi; boş kuyrukta 0 (yalnızca slotlar doluysa bütçe kadar beklenir)."""
+        onde = sum(1 for b in self._bekleyenler if b.oncelik <= oncelik)
+        return onde // self.eszamanli * self.ort_sure
+
+    def _ver(self, b: _Bekleyen):
+        self._aktif += 1
+        self._kullanici_aktif[b.kullanici] = self._kullanici_aktif.get(b.kullanici, 0) + 1
+        b.verildi = time.monotonic()
+
+    def _dagit(self):
+        while self._aktif < self.eszamanli and self._bekleyenler:
+            secilen = min(self._bekleyenler,
+                          key=lambda b: (b.oncelik, self._kullanici_aktif.get(b.kullanici, 0), b.sira))
+            self._bekleyenler.remove(secilen)
+            self._ver(secilen)
+            secilen.bildir()
+
+    def _kaydol(self, oncelik: int, kullanici, butce: float, bildir) -> _Bekleyen:
+        """Hemen slot verir ya da kuyruğa koyar; sığmıyorsa MesgulHatasi."""
+        with self._kilit:
+            self._sira += 1
+            b = _Bekleyen(oncelik, kullanici, self._sira, bildir)
+            if self._aktif < self.eszamanli and not self._bekleyenler:
+                self._ver(b)
+                _kabul.artir("hemen")
+                return b
+            tahmin = self._tahmini_bekleme(oncelik)
+            if len(self._bekleyenler) >= self.kuyruk or tahmin > butce:
+                _kabul.artir("reddedildi")
+                raise MesgulHatasi(tahmin + self.ort_sure)
+            self._bekleyenler.append(b)
+            _kabul.artir("kuyruk")
+            return b
+
+    def _vazgec(self, b: _Bekleyen) -> bool:
+        """Bekleme bitti / iptal: slot bu arada verildiyse True (çağıran kullanıp bırakır)."""
+        with self._kilit:
+            if b.verildi is not None:
+                return True
+            self._bekleyenler.remove(b)
+            return False
+
+    def _birak(self, b: _Bekleyen):
+        tutma = time.monotonic() - b.verildi
+        with self._kilit:
+            self._aktif -= 1
+            kalan = self._kullanici_aktif.get(b.kullanici, 1) - 1
+            if kalan:
+                self._kullanici_aktif[b.kullanici] = kalan
+            else:
+                self._kullanici_aktif.pop(b.kullanici, None)
+            self.ort_sure = 0.8 * self.ort_sure + 0.2 * tutma
+            self._dagit()
+        _sure.gozlem(1000 * tutma, _ONCELIK_ADI.get(b.oncelik, str(b.oncelik)))
+
+    def _bekleme_kaydet(self, b: _Bekleyen):
+        _bekleme.gozlem(1000 * (b.verildi - b.geldi), _ONCELIK_ADI.get(b.oncelik, str(b.oncelik)))
+
+    # ---- dış API ----
+    @contextmanager
+    def izin(self, oncelik: int = ONCELIK_SOHBET, kullanici=None, butce: float | None = None):
+        butce = self.butce.get(oncelik, self.butce[ONCELIK_SOHBET]) if butce is None else butce
+        olay = threading.Event()
+        b = self._kaydol(oncelik, kullanici, butce, olay.set)
+        if b.verildi is None and not olay.wait(butce) and not self._vazgec(b):
+            _kabul.artir("zaman_asimi")
+            raise MesgulHatasi(self.ort_sure)
+        self._bekleme_kaydet(b)
+        try:
+            yield
+        finally:
+            self._birak(b)
+
+    @asynccontextmanager
+    async def izin_async(self, oncelik: int = ONCELIK_SOHBET, kullanici=None, butce: float | None = None):
+        butce = self.butce.get(oncelik, self.butce[ONCELIK_SOHBET]) if butce is None else butce
+        loop = asyncio.get_running_loop()
+        hazir = loop.create_future()
+
+        def bildir():
+            loop.call_soon_threadsafe(lambda: hazir.done() or hazir.set_result(True))
+
+        b = self._kaydol(oncelik, kullanici, butce, bildir)
+        if b.verildi is None:
+            try:
+                await asyncio.wait_for(asyncio.shield(hazir), butce)
+            except asyncio.TimeoutError:
+                if not self._vazgec(b):
+                    _kabul.artir("zaman_asimi")
+                    raise MesgulHatasi(self.ort_sure)
+            except asyncio.CancelledError:
+                if self._vazgec(b):
+                    self._birak(b)
+                raise
+        self._bekleme_kaydet(b)
+        try:
+            yield
+        finally:
+            self._birak(b)
+
+    def istatistik(self) -> dict:
+        with self._kilit:
+            bekleyen: dict = {}
+            for b in self._bekleyenler:
+                ad = _ONCELIK_ADI.get(b.oncelik, str(b.oncelik))
+                bekleyen[ad] = bekleyen.get(ad, 0) + 1
+            # Sınırlar bu worker'a aittir: gunicorn -w N ile gerçek eşzamanlılık N × eszamanli
+            return {"kapsam": "worker", "pid": os.getpid(), "eszamanli": self.eszamanli,
+                    "aktif": self._aktif, "bekleyen": bekleyen, "ort_sure_sn": round(self.ort_sure, 2)}
+
+
+LLM = LLMZamanlayici()
+metrik.gosterge("llm_zamanlayici", LLM.istatistik)
@@ -1,29 +1,53 @@
 # -*- coding: utf-8 -*-
 # sweaxrag.py — Hafif RAM sürümü (Render 512 MB dostu)
 
-import os, json, re, importlib
-import requests
+import os, re, importlib, threading, atexit
 from urllib.parse import quote
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from bs4 import BeautifulSoup
+
+try:
+    import app.sweax_http as sweax_http
+    from app.sweax_onbellek import Onbellek, TekUcus, YOK
+    from app.sweax_vektor import BilgiIndeksi, FaissArka, NumpyArka, NicemArka
+    from app.sweax_bm25 import BM25Indeks
+    from app.sweax_depo import BilgiDeposu
+    from app.sweax_alim import AlimKuyrugu
+    from app.sweax_gomme import GOMME_MODEL, GOMME_URL, UzakModel
+    from app.sweax_gorev import GorevKuyrugu, GOREV_ACIK
+    import app.sweax_metrik as sweax_metrik
+except ModuleNotFoundError:
+    import sweax_http
+    from sweax_onbellek import Onbellek, TekUcus, YOK
+    from sweax_vektor import BilgiIndeksi, FaissArka, NumpyArka, NicemArka
+    from sweax_bm25 import BM25Indeks
+    from sweax_depo import BilgiDeposu
+    from sweax_alim import AlimKuyrugu
+    from sweax_gomme import GOMME_MODEL, GOMME_URL, UzakModel
+    from sweax_gorev import GorevKuyrugu, GOREV_ACIK
+    import sweax_metrik
 # ---- Konfig / modüler bayraklar ----
 SWEAX_LIGHT = os.environ.get("SWEAX_LIGHT", "1") == "1"  # 1: en hafif mod
 HEADERS = {"User-Agent": "SweaxAI-lite/1.0 (+educational use)"}
 
-DATA_JSON  = "bilgi_deposu.json"
+DATA_JSON  = "bilgi_deposu.json"   # eski depo; ilk açılışta BILGI_DB'ye taşınır
+BILGI_DB   = os.environ.get("SWEAX_KNOWLEDGE_DB", "bilgi_deposu.db")
 FAISS_FILE = "bilgi_index.faiss"
+NUMPY_FILE = "bilgi_index.npy"
+BM25_FILE  = "bilgi_bm25.idx"
+BM25_MIN_SKOR = float(os.environ.get("SWEAX_BM25_MIN_SCORE", "1.0"))
+# faiss | numpy | auto (faiss varsa faiss, yoksa saf NumPy)
+VECTOR_BACKEND = os.environ.get("SWEAX_VECTOR_BACKEND", "auto")
+# int8 | float16: sıkıştırılmış NumPy deposu (aynı RAM'de 2–4 kat fazla kayıt); boşsa float32
+VECTOR_QUANT = os.environ.get("SWEAX_VECTOR_QUANT", "")
+VECTOR_RESCORE = int(os.environ.get("SWEAX_VECTOR_RESCORE", "4"))  # tam hassasiyetle yeniden skorlanan aday katı
 
 
 ALLOWED_DOMAINS = [
     "reuters.com", "bbc.com", "bbc.co.uk", "aa.com.tr", "dw.com", "tr.euronews.com", "euronews.com"
 ]
 
-# JSON dosyası yoksa oluştur
-if not os.path.exists(DATA_JSON):
-    with open(DATA_JSON, "w", encoding="utf-8") as f:
-        json.dump([], f, ensure_ascii=False, indent=2)
-
 # ====== Lazy helpers ======
 def _lazy_import(name: str):
     try:
@@ -40,7 +64,7 @@ def _lazy_sentence_model():
         return None
     try:
         # küçük ve çok dilli model (ilk kullanımda yüklenir)
-        return st.SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+        return st.SentenceTransformer(GOMME_MODEL)
     except Exception:
         return None
 
@@ -68,41 +92,73 @@ def _limit_by_sentences(text: str, sentence_count: int) -> str:
     return out
 
 # ====== Wikipedia REST summary ======
-def _wiki_summary_for_term(term: str, lang: str = "tr") -> dict | None:
+# (normalize terim, dil, cümle sayısı) → meta; 404'ler de (None olarak) kısa süre saklanır
+WIKI_TTL         = float(os.environ.get("SWEAX_WIKI_TTL", "86400"))
+WIKI_NEGATIF_TTL = float(os.environ.get("SWEAX_WIKI_NEGATIVE_TTL", "3600"))
+_wiki_onbellek = Onbellek("wiki", boyut=int(os.environ.get("SWEAX_WIKI_CACHE_SIZE", "1024")), ttl=WIKI_TTL)
+
+def _wiki_summary_durumlu(term: str, lang: str = "tr") -> tuple[int | None, dict | None]:
+    """(HTTP durum kodu, JSON) döndürür; ağ hatasında (None, None)."""
     url = f"https://{lang}.wikipedia.org/api/rest_v1/page/summary/{quote(term)}"
     try:
-        r = requests.get(url, headers=HEADERS, timeout=10)
+        r = sweax_http.get(url, headers=HEADERS)
         if r.status_code != 200:
-            return None
-        return r.json()
+            return r.status_code, None
+        return 200, r.json()
     except Exception:
-        return None
+        return None, None
 
-def wiki_ozet_with_meta(konu: str, cumle: int = 6) -> dict | None:
+def _wiki_summary_for_term(term: str, lang: str = "tr") -> dict | None:
+    return _wiki_summary_durumlu(term, lang)[1]
+
+def _wiki_terim_temizle(konu: str) -> str:
     temiz = konu.lower()
     for k in ["kimdir","nedir","hayatı","hayatını","biyografisi","tarihi","anlamı","özeti","özetle","anlat","hikayesi","kim","kimdi","kimmiş","kimin","hakkında","bilgi ver"]:
         temiz = temiz.replace(k, "")
-    temiz = temiz.strip()
+    # "Atatürk kimdir?" ile "atatürk  kimdir" aynı anahtara düşsün
+    return re.sub(r"\s+", " ", temiz).strip(" ?!.,")
+
+def _wiki_sonuc_kaydet(anahtar: tuple, durum: int | None, data: dict | None) -> dict | None:
+    """Yanıtı meta'ya çevirip önbelleğe koyar; ağ hatalarını (durum=None) saklamaz."""
+    temiz, lang, cumle = anahtar
+    meta = _wiki_meta_olustur(data, lang, cumle)
+    if meta:
+        _wiki_onbellek.koy(anahtar, meta)
+    elif durum is not None and durum < 500:
+        _wiki_onbellek.koy(anahtar, None, ttl=WIKI_NEGATIF_TTL)
+    return meta
+
+def _wiki_meta_olustur(data: dict | None, lang: str, cumle: int) -> dict | None:
+    """REST summary yanıtını {"text","url","title","lang","type"} sözlüğüne çevirir."""
+    if not data or "extract" not in data:
+        return None
+    extract = _clean_text(data.get("extract") or "")
+    if not extract:
+        return None
+    tp = data.get("type") or "standard"
+    text = _limit_by_sentences(extract, cumle)
+    cu = data.get("content_urls") or {}
+    desktop = cu.get("desktop") or {}
+    page_url = desktop.get("page")
+    return {
+        "text": text.strip(),
+        "url": page_url or f"https://{lang}.wikipedia.org/",
+        "title": data.get("title") or "",
+        "lang": lang,
+        "type": tp
+    }
+
+def wiki_ozet_with_meta(konu: str, cumle: int = 6) -> dict | None:
+    temiz = _wiki_terim_temizle(konu)
 
     for lang in ("tr", "en"):
-        data = _wiki_summary_for_term(temiz, lang=lang)
-        if not data or "extract" not in data:
-            continue
-        extract = _clean_text(data.get("extract") or "")
-        if not extract:
-            continue
-        tp = data.get("type") or "standard"
-        text = _limit_by_sentences(extract, cumle)
-        cu = data.get("content_urls") or {}
-        desktop = cu.get("desktop") or {}
-        page_url = desktop.get("page")
-        return {
-            "text": text.strip(),
-            "url": page_url or f"https://{lang}.wikipedia.org/",
-            "title": data.get("title") or "",
-            "lang": lang,
-            "type": tp
-        }
+        anahtar = (temiz, lang, cumle)
+        meta = _wiki_onbellek.al(anahtar)
+        if meta is YOK:
+            durum, data = _wiki_summary_durumlu(temiz, lang=lang)
+            meta = _wiki_sonuc_kaydet(anahtar, durum, data)
+        if meta:
+            return meta
     return None
 
 
@@ -110,69 +166,122 @@ def wiki_ozet(konu: str, cumle: int = 6) -> str | None:
     meta = wiki_ozet_with_meta(konu, cumle=cumle)
     return meta["text"] if meta else None
 
-# ====== JSON depolama ======
-def _json_oku() -> list:
-    with open(DATA_JSON, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def _json_yaz(veriler: list):
-    """JSON’a geri yazar."""
-    with open(DATA_JSON, "w", encoding="utf-8") as f:
-        json.dump(veriler, f, ensure_ascii=False, indent=2)
-
 # ====== FAISS + Embeddings (opsiyonel) ======
 _model_cache = None
-def _get_model():
+_model_kilit = threading.Lock()
+
+def _uzak_model(bekle: float):
+    """SWEAX_EMBED_URL'deki paylaşılan gömme servisi; ulaşılamazsa None (BM25'e düşülür)."""
+    if _lazy_import("numpy") is None:
+        return None
+    model = UzakModel(GOMME_URL)
+    if model.bekle(bekle):
+        return model
+    print(f"⚠️ Gömme servisine ulaşılamadı ({GOMME_URL}); vektör araması kapalı.")
+    return None
+
+def _get_model(bekle: float = 2.0):
     global _model_cache
     if _model_cache is None:
-        if SWEAX_LIGHT:
-            return None  # en hafif modda hiç açma
-        _model_cache = _lazy_sentence_model()
+        with _model_kilit:
+            if _model_cache is None:
+                if GOMME_URL:
+                    # Model ayrı süreçte; worker'da bellek maliyeti yok, hafif modda da kullanılır
+                    _model_cache = _uzak_model(bekle)
+                elif SWEAX_LIGHT:
+                    return None  # en hafif modda hiç açma
+                else:
+                    _model_cache = _lazy_sentence_model()
     return _model_cache
 
-def bilgi_kaydet(konu: str, metin: str):
-    # JSON'a yaz
-    veriler = _json_oku()
-    veriler.append({"konu": konu, "icerik": metin})
-    _json_yaz(veriler)
-
-    # Embedding/FAISS yoksa sessizce pas geç
-    model = _get_model()
-    faiss = _lazy_faiss()
-    if not (model and faiss):
-        return
+def gomme_modeli_hazir():
+    """Yüklenmiş gömme modeli ya da None; yükleme tetiklemez / beklemez (istek yolu için)."""
+    return _model_cache
 
+def model_on_yukle(bekle: float = 30.0):
+    """
+    Uygulama açılışında çağrılır: modeli (ya da gömme servisini) ısıtır ve bilgi indeksini kurar,
+    böylece ilk kullanıcı model yüklemesini beklemez.
+    """
     try:
-        v = model.encode([metin]).astype("float32")
-        if os.path.exists(FAISS_FILE):
-            index = faiss.read_index(FAISS_FILE)
-        else:
-            index = faiss.IndexFlatL2(v.shape[1])
-        index.add(v)
-        faiss.write_index(index, FAISS_FILE)
-    except Exception:
-        pass  # RAM/bağımlılık sorunlarında sessiz geç
+        model = _get_model(bekle=bekle)
+        if model is not None:
+            model.encode(["ısınma"])
+        if _bilgi_indeksi().arka is not None:
+            _alim().tamamla()  # vektörü olmayan kayıtlar (ilk kurulum / yeni kayıtlar) arka planda kodlanır
+        if GOREV_ACIK:
+            _gorevler().baslat()  # önceki çalışmadan kalan görevler de işlenir
+    except Exception as e:
+        print(f"⚠️ Model ön yükleme hatası: {e}")
+
+def _vektor_arka():
+    """Ayara göre vektör arka ucunu seçer; hiçbiri yoksa None (sadece kayıtlar)."""
+    if VECTOR_QUANT:
+        np = _lazy_import("numpy")
+        if np:
+            return NicemArka(np, f"bilgi_index_{VECTOR_QUANT}.npy", tur=VECTOR_QUANT, yeniden_skor=VECTOR_RESCORE)
+    faiss = _lazy_faiss() if VECTOR_BACKEND in ("auto", "faiss") else None
+    if faiss:
+        return FaissArka(faiss, FAISS_FILE)
+    np = _lazy_import("numpy")
+    if np and VECTOR_BACKEND in ("auto", "numpy"):
+        return NumpyArka(np, NUMPY_FILE)
+    return None
 
-def bilgi_bul(soru: str, top_k: int = 2) -> list[dict]:
-    # FAISS yoksa sadece JSON içinden son kayıtları döndürme stratejisi
-    model = _get_model()
-    faiss = _lazy_faiss()
-    if not (model and faiss and os.path.exists(FAISS_FILE)):
-        # hafif fallback: konu kelimesi geçen son kayıtlar
-        veriler = _json_oku()
-        s = soru.lower()
-        return [v for v in reversed(veriler) if v["konu"].lower() in s][:top_k]
+# Süreç başına tek indeks; gunicorn fork'u sonrası her worker kendi kopyasını kurar
+_indeks = None
+_indeks_pid = None
+_indeks_kilit = threading.Lock()
+
+def _bilgi_indeksi() -> BilgiIndeksi:
+    global _indeks, _indeks_pid
+    if _indeks is None or _indeks_pid != os.getpid():
+        with _indeks_kilit:
+            if _indeks is None or _indeks_pid != os.getpid():
+                model = _get_model()
+                arka = _vektor_arka() if model else None
+                # Vektör araması yoksa (hafif mod) BM25 ters indeksi
+                sozluk = None if arka else BM25Indeks(BM25_FILE)
+                _indeks = BilgiIndeksi(BilgiDeposu(BILGI_DB, json_yolu=DATA_JSON), arka=arka, model=model,
+                                       sozluk=sozluk, sozluk_min_skor=BM25_MIN_SKOR,
+                                       eksik_bildir=lambda: _alim().tamamla())
+                _indeks_pid = os.getpid()
+    return _indeks
+
+# Yazma yolu: istek sadece kuyruğa koyar, kodlama/indeksleme arka planda partiler hâlinde
+_alim_kuyrugu = None
+_alim_pid = None
+
+def _alim() -> AlimKuyrugu:
+    global _alim_kuyrugu, _alim_pid
+    if _alim_kuyrugu is None or _alim_pid != os.getpid():
+        with _indeks_kilit:
+            if _alim_kuyrugu is None or _alim_pid != os.getpid():
+                _alim_kuyrugu = AlimKuyrugu(_bilgi_indeksi)
+                _alim_pid = os.getpid()
+    return _alim_kuyrugu
+
+def _indeks_snapshot():
+    if _alim_kuyrugu is not None and _alim_pid == os.getpid():
+        _alim_kuyrugu.bosalt(zaman_asimi=10)
+    if _indeks is not None and _indeks_pid == os.getpid():
+        try:
+            _indeks.snapshot()
+        except Exception:
+            pass
+
+atexit.register(_indeks_snapshot)
+
+def bilgi_kaydet(konu: str, metin: str):
+    try:
+        _alim().ekle(konu, metin)
+    except Exception as e:
+        print(f"⚠️ bilgi_kaydet hata: {e}")  # RAM/bağımlılık sorunlarında isteği düşürme
 
+def bilgi_bul(soru: str, top_k: int = 2) -> list[dict]:
+    # Embedding yoksa indeks BM25 ters indeksiyle arar
     try:
-        index = faiss.read_index(FAISS_FILE)
-        veriler = _json_oku()
-        q = model.encode([soru]).astype("float32")
-        _, idx = index.search(q, top_k)
-        out = []
-        for i in idx[0]:
-            if 0 <= i < len(veriler):
-                out.append(veriler[i])
-        return out
+        return _bilgi_indeksi().ara(soru, top_k)
     except Exception:
         return []
 
@@ -203,56 +312,92 @@ def soru_guncel_mi(soru: str) -> bool:
 def _domain_izinli_mi(url: str) -> bool:
     return any(d in url for d in ALLOWED_DOMAINS)
 
+def _ddg_linkleri_ayikla(html: str, max_results: int) -> list[dict]:
+    bs4 = _lazy_bs4()
+    if not bs4:
+        return []
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    links = []
+    for a in soup.select("a"):
+        href = a.get("href") or ""
+        title = (a.text or "").strip()
+        if href.startswith("http") and _domain_izinli_mi(href):
+            links.append({"title": title[:120], "url": href})
+        if len(links) >= max_results:
+            break
+    return links
+
 def web_ara_ddg(query: str, max_results: int = 2) -> list[dict]:
     url = "https://duckduckgo.com/lite/"
     try:
-        html = requests.get(url, params={"q": query}, timeout=8, headers=HEADERS).text
-        bs4 = _lazy_bs4()
-        if not bs4:
-            return []
-        soup = bs4.BeautifulSoup(html, "html.parser")
-        links = []
-        for a in soup.select("a"):
-            href = a.get("href") or ""
-            title = (a.text or "").strip()
-            if href.startswith("http") and _domain_izinli_mi(href):
-                links.append({"title": title[:120], "url": href})
-            if len(links) >= max_results:
-                break
-        return links
+        html = sweax_http.get(url, params={"q": query}, headers=HEADERS).text
+        return _ddg_linkleri_ayikla(html, max_results)
     except Exception:
         return []
 
+def _sayfa_metni_ayikla(html: str, max_chars: int) -> str | None:
+    bs4 = _lazy_bs4()
+    if not bs4:
+        return None
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    texts = []
+    for tag in soup.find_all(["h1","h2","p"]):
+        t = (tag.get_text(" ", strip=True) or "")
+        if t: texts.append(t)
+    full = " ".join(texts)
+    return full[:max_chars] if full else None
+
 def sayfa_icerik_al(url: str, max_chars: int = 1600) -> str | None:
     try:
-        r = requests.get(url, timeout=8, headers=HEADERS)
-        bs4 = _lazy_bs4()
-        if not bs4:
-            return None
-        soup = bs4.BeautifulSoup(r.text, "html.parser")
-        texts = []
-        for tag in soup.find_all(["h1","h2","p"]):
-            t = (tag.get_text(" ", strip=True) or "")
-            if t: texts.append(t)
-        full = " ".join(texts)
-        return full[:max_chars] if full else None
+        r = sweax_http.get(url, timeout=8, headers=HEADERS)
+        return _sayfa_metni_ayikla(r.text, max_chars)
     except Exception:
         return None
 
-# ====== Ana RAG cevabı ======
-def rag_cevap_uret(soru: str, model_cevap: str) -> str:
-    # Güncel ise kısa web özetini gizlice çek — ama RAM’e yük bindirme
-    if soru_guncel_mi(soru):
-        for l in web_ara_ddg(soru, max_results=2):
-            _ = sayfa_icerik_al(l["url"])  # ileride iç bağlama eklenebilir
-        return model_cevap
-
-    # FAISS/JSON ile destek
-    kaynaklar = bilgi_bul(soru)
-    if not kaynaklar:
+# ====== Arka plan zenginleştirme görevleri ======
+# Cevap hazır olduktan sonra yapılan işler istek yolunda değil, kalıcı görev kuyruğunda çalışır.
+def web_zenginlestir(soru: str, max_results: int = 2):
+    """Güncel soru: bulunan sayfaların metni atılmak yerine bilgi deposuna eklenir."""
+    for l in web_ara_ddg(soru, max_results=max_results):
+        metin = sayfa_icerik_al(l["url"])
+        if metin:
+            bilgi_kaydet(l.get("title") or soru, metin)
+
+def bilgi_zenginlestir(soru: str):
+    """Depoda karşılığı olmayan soru için Wikipedia özeti eklenir."""
+    if not bilgi_bul(soru):
         yeni = wiki_ozet(soru, cumle=5)
         if yeni:
             bilgi_kaydet(soru, yeni)
+
+_gorev_kuyrugu = None
+_gorev_pid = None
+
+def _gorevler() -> GorevKuyrugu:
+    global _gorev_kuyrugu, _gorev_pid
+    if _gorev_kuyrugu is None or _gorev_pid != os.getpid():
+        with _indeks_kilit:
+            if _gorev_kuyrugu is None or _gorev_pid != os.getpid():
+                kuyruk = GorevKuyrugu()
+                kuyruk.kaydet("web_zenginlestir", lambda v: web_zenginlestir(v["soru"]))
+                kuyruk.kaydet("bilgi_zenginlestir", lambda v: bilgi_zenginlestir(v["soru"]))
+                sweax_metrik.gosterge("gorev_kuyrugu", kuyruk.istatistik)
+                _gorev_kuyrugu, _gorev_pid = kuyruk, os.getpid()
+    return _gorev_kuyrugu
+
+def _gorev_ekle(tur: str, soru: str):
+    if not GOREV_ACIK:
+        (web_zenginlestir if tur == "web_zenginlestir" else bilgi_zenginlestir)(soru)
+        return
+    try:
+        _gorevler().ekle(tur, {"soru": soru}, anahtar=" ".join(soru.lower().split()))
+    except Exception as e:
+        print(f"⚠️ Görev kuyruğa eklenemedi ({tur}): {e}")  # zenginleştirme isteği düşürmesin
+
+# ====== Ana RAG cevabı ======
+def rag_cevap_uret(soru: str, model_cevap: str) -> str:
+    # Cevap zaten hazır: bilgi zenginleştirme arka planda yapılır, istek beklemez
+    _gorev_ekle("web_zenginlestir" if soru_guncel_mi(soru) else "bilgi_zenginlestir", soru)
     return model_cevap
 
 # WEBDE ARAMA
@@ -262,9 +407,6 @@ def web_ara_genel(soru: str, max_results: int = 3) -> str | None:
     """
     DuckDuckGo HTML arama (GET versiyonu) – Render uyumlu, daha dayanıklı sürüm
     """
-    import requests
-    from bs4 import BeautifulSoup
-
     try:
         url = "https://duckduckgo.com/html/"
         headers = {
@@ -274,7 +416,7 @@ def web_ara_genel(soru: str, max_results: int = 3) -> str | None:
         }
 
         # GET kullanıyoruz çünkü POST bazen boş döndürüyor
-        resp = requests.get(url, params={"q": soru}, headers=headers, timeout=10)
+        resp = sweax_http.get(url, params={"q": soru}, headers=headers)
         html = resp.text
         soup = BeautifulSoup(html, "html.parser")
 
@@ -298,58 +440,66 @@ def web_ara_genel(soru: str, max_results: int = 3) -> str | None:
         return f"⚠️ Web arama hatası: {e}"
 
 
+def _serper_sonuclari(soru: str, max_results: int = 3) -> list[dict] | None:
+    """Serper organik sonuçları (title / link / snippet); yanıtta "organic" yoksa None."""
+    SERPER_KEY = os.getenv("SERPER_KEY", "60616d6ea2b6da230c1930c4817a755439d44cba")
+    headers = {"X-API-KEY": SERPER_KEY, "Content-Type": "application/json"}
+    payload = {"q": soru, "gl": "tr", "hl": "tr"}
+    r = sweax_http.post("https://google.serper.dev/search", json=payload, headers=headers)
+    data = r.json()
+    if "organic" not in data:
+        return None
+    return data["organic"][:max_results]
+
+
 def web_ara_serper(soru: str, max_results: int = 3) -> str | None:
     """
     Serper.dev Google Search API —
     """
-    import requests, os
-    SERPER_KEY = os.getenv("SERPER_KEY", "60616d6ea2b6da230c1930c4817a755439d44cba")
-
     try:
-        headers = {"X-API-KEY": SERPER_KEY, "Content-Type": "application/json"}
-        payload = {"q": soru, "gl": "tr", "hl": "tr"}
-        r = requests.post("https://google.serper.dev/search", json=payload, headers=headers, timeout=10)
-        data = r.json()
-
-        if "organic" not in data:
+        results = _serper_sonuclari(soru, max_results)
+        if results is None:
             return None
-
-        results = data["organic"][:max_results]
-        if not results:
-            return "🔍 Üzgünüm, bu konuda güncel bilgi bulunamadı."
-
-        # Başlık
-        yanit = [f"💎 **{soru.title()} (Güncel Bilgiler)**", "─────────────────────────────"]
-
-        # Sonuçları düzenle
-        for r in results:
-            baslik = r.get("title", "Kaynak").strip()
-            link = r.get("link", "")
-            aciklama = r.get("snippet", "").replace("\n", " ").strip()
-            if len(aciklama) > 220:
-                aciklama = aciklama[:220] + "…"
-
-            # Basit domain çıkarımı
-            domain = ""
-            if "://" in link:
-                domain = link.split("/")[2].replace("www.", "")
-
-            yanit.append(
-                f"📍 **{domain}**\n"
-                f"📰 [{baslik}]({link})\n"
-                f"💬 {aciklama}\n"
-                "─────────────────────────────"
-            )
-        # Sonuçları birleştirirken kısa özet üret
-        joined = " ".join(r.get("snippet", "") for r in results if r.get("snippet"))
-        if joined:
-            yanit += ["\n🧠 **Kısa Özet:** " + joined[:600] + "…"]
-        return "\n".join(yanit)
-
+        return web_sonuc_bicimle(soru, results)
     except Exception as e:
         return f"⚠️ Web arama hatası: {e}"
 
 
+def web_sonuc_bicimle(soru: str, results: list[dict]) -> str:
+    """Serper sonuçlarının kullanıcıya gösterilen ham listesi (model kullanılamazsa yedek)."""
+    if not results:
+        return "🔍 Üzgünüm, bu konuda güncel bilgi bulunamadı."
+
+    # Başlık
+    yanit = [f"💎 **{soru.title()} (Güncel Bilgiler)**", "─────────────────────────────"]
+
+    # Sonuçları düzenle
+    for r in results:
+        baslik = r.get("title", "Kaynak").strip()
+        link = r.get("link", "")
+        aciklama = r.get("snippet", "").replace("\n", " ").strip()
+        if len(aciklama) > 220:
+            aciklama = aciklama[:220] + "…"
+
+        # Basit domain çıkarımı
+        domain = ""
+        if "://" in link:
+            domain = link.split("/")[2].replace("www.", "")
+
+        yanit.append(
+            f"📍 **{domain}**\n"
+            f"📰 [{baslik}]({link})\n"
+            f"💬 {aciklama}\n"
+            "─────────────────────────────"
+        )
+    # Sonuçları birleştirirken kısa özet üret
+    joined = " ".join(r.get("snippet", "") for r in results if r.get("snippet"))
+    if joined:
+        yanit += ["\n🧠 **Kısa Özet:** " + joined[:600] + "…"]
+    return "\n".join(yanit)
+
+
+
 
 def _guncel_sorgu_mu(soru: str) -> bool:
     s = soru.lower()
@@ -359,12 +509,68 @@ def _guncel_sorgu_mu(soru: str) -> bool:
     ]
     return any(k in s for k in anahtarlar)
 
-def web_fallback_ara(soru: str) -> str:
+# Aynı sorgu için sonuç önbelleği + eşzamanlı aynı sorgularda tek upstream çağrı
+WEB_GUNCEL_TTL = float(os.environ.get("SWEAX_WEB_CURRENT_TTL", "300"))   # "güncel" sorgular
+WEB_TTL        = float(os.environ.get("SWEAX_WEB_TTL", "3600"))
+WEB_NEGATIF_TTL = float(os.environ.get("SWEAX_WEB_NEGATIVE_TTL", "120"))  # Serper'ın boş döndüğü sorgular
+_web_onbellek = Onbellek("web", boyut=int(os.environ.get("SWEAX_WEB_CACHE_SIZE", "512")), ttl=WEB_TTL)
+_web_ucus = TekUcus("web")
 
-    sonuc = web_ara_serper(soru)
-    if sonuc:
-        return sonuc
+def _web_anahtar(soru: str) -> str:
+    return re.sub(r"\s+", " ", soru.lower()).strip(" ?!.")
+
+def _web_fallback_ara_uzak(soru: str, serper: bool = True) -> str:
+
+    if serper:
+        sonuc = web_ara_serper(soru)
+        if sonuc:
+            return sonuc
     sonuc = web_ara_genel(soru)
     if sonuc:
         return sonuc
-    return "🌐 Bu konuda güvenilir bir kaynak bulunamadı."
\ No newline at end of file
+    return "🌐 Bu konuda güvenilir bir kaynak bulunamadı."
+
+def web_kaynaklari(soru: str, max_results: int = 3) -> list[dict]:
+    """
+    Kaynaklı (grounded) cevap için Serper sonuçları: [{"title", "link", "snippet"}, ...].
+    Sonuç yoksa / hata olursa boş liste; web_fallback_ara ile aynı önbellek ve tek-uçuş kullanılır.
+    Boş sonuç da (wiki 404'leri gibi) kısa süre saklanır; ağ hataları saklanmaz.
+    """
+    anahtar = ("kaynak", _web_anahtar(soru))
+    sonuc = _web_onbellek.al(anahtar)
+    if sonuc is not YOK:
+        return sonuc
+
+    def getir():
+        try:
+            sonuc = [r for r in (_serper_sonuclari(soru, max_results) or []) if r.get("snippet")]
+        except Exception as e:
+            print(f"⚠️ Web kaynakları alınamadı: {e}")
+            return []
+        if sonuc:
+            ttl = WEB_GUNCEL_TTL if (_guncel_sorgu_mu(soru) or soru_guncel_mi(soru)) else WEB_TTL
+        else:
+            ttl = WEB_NEGATIF_TTL
+        _web_onbellek.koy(anahtar, sonuc, ttl=ttl)
+        return sonuc
+
+    return _web_ucus.yap(anahtar, getir)
+
+def web_fallback_ara(soru: str, serper: bool = True) -> str:
+    """
+    Web araması metin yanıtı (Serper → DuckDuckGo → arama linki).
+    serper=False: Serper'ın bu sorguya boş döndüğü zaten biliniyorsa (web_kaynaklari) tekrar sorulmaz.
+    """
+    anahtar = _web_anahtar(soru)
+    sonuc = _web_onbellek.al(anahtar)
+    if sonuc is not YOK:
+        return sonuc
+
+    def getir():
+        sonuc = _web_fallback_ara_uzak(soru, serper)
+        if not sonuc.startswith("⚠️"):  # hata metinlerini saklama
+            ttl = WEB_GUNCEL_TTL if (_guncel_sorgu_mu(soru) or soru_guncel_mi(soru)) else WEB_TTL
+            _web_onbellek.koy(anahtar, sonuc, ttl=ttl)
+        return sonuc
+
+    return _web_ucus.yap(anahtar, getir)
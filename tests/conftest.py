@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# Testler depo kökünden `python -m pytest` ile çalışır; modüller `app.` önekiyle içe aktarılır.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
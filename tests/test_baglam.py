@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# sweax_baglam: sohbet bağlamı önbelleği (süreç içi ve paylaşılan SQLite modları)
+import pytest
+
+from app.sweax_baglam import BaglamOnbellegi, _BellekDepo, _KapaliDepo, _SqliteDepo
+
+
+def _mesaj(i):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i}", "token_count": 1}
+
+
+@pytest.fixture(params=["bellek", "sqlite"])
+def baglam(request, tmp_path):
+    yol = str(tmp_path / "baglam.db") if request.param == "sqlite" else None
+    return BaglamOnbellegi(n=4, boyut=10, sqlite_yolu=yol, acik=True)
+
+
+def test_varsayilan_kapali_paylasimli_acik(tmp_path):
+    assert isinstance(BaglamOnbellegi(acik=False)._depo, _KapaliDepo)
+    assert isinstance(BaglamOnbellegi(acik=True, sqlite_yolu=None)._depo, _BellekDepo)
+    assert isinstance(BaglamOnbellegi(acik=True, sqlite_yolu=str(tmp_path / "b.db"))._depo, _SqliteDepo)
+
+
+def test_sqlite_acilamazsa_kapali(tmp_path):
+    yol = str(tmp_path / "yok" / "b.db")  # dizin yok
+    assert isinstance(BaglamOnbellegi(acik=True, sqlite_yolu=yol)._depo, _KapaliDepo)
+
+
+def test_doldur_ekle_son_n(baglam):
+    assert baglam.son_mesajlar(1, 4) is None
+    baglam.mesajlari_doldur(1, [_mesaj(i) for i in range(3)])
+    baglam.mesajlar_eklendi(7, 1, [_mesaj(3), _mesaj(4)])
+    assert [m["content"] for m in baglam.son_mesajlar(1, 4)] == ["m1", "m2", "m3", "m4"]
+    assert [m["content"] for m in baglam.son_mesajlar(1, 2)] == ["m3", "m4"]
+    assert baglam.son_mesajlar(1, 5) is None  # N'den fazlası eksik olabilir: ıska
+    assert baglam.aktif_sohbet(7) == 1
+
+
+def test_onbellekte_olmayan_sohbete_ekleme_doldurmaz(baglam):
+    baglam.mesajlar_eklendi(7, 2, [_mesaj(0)])
+    assert baglam.son_mesajlar(2, 4) is None  # ilk okuma DB'den tam geçmişi getirmeli
+
+
+def test_yeni_sohbet_ve_gecersiz_kilma(baglam):
+    baglam.sohbet_acildi(7, 3)
+    assert baglam.son_mesajlar(3, 4) == [] and baglam.aktif_sohbet(7) == 3
+    baglam.sohbet_gecersiz(sohbet_id=3)
+    assert baglam.son_mesajlar(3, 4) is None
+    assert baglam.aktif_sohbet(7) is None
+
+
+def test_sqlite_worker_arasi_paylasim(tmp_path):
+    yol = str(tmp_path / "baglam.db")
+    w1 = BaglamOnbellegi(n=4, sqlite_yolu=yol, acik=True)
+    w2 = BaglamOnbellegi(n=4, sqlite_yolu=yol, acik=True)
+    w1.mesajlari_doldur(1, [_mesaj(0)])
+    w2.mesajlar_eklendi(7, 1, [_mesaj(1)])
+    assert [m["content"] for m in w1.son_mesajlar(1, 4)] == ["m0", "m1"]
+    assert w1.aktif_sohbet(7) == 1
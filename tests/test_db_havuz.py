@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# db_conn.BaglantiHavuzu: gerçek MySQL yerine sahte bağlantılarla
+import threading
+import time
+
+import pytest
+
+import app.db_conn as db_conn
+
+
+class SahteBaglanti:
+    def __init__(self):
+        self.open = True
+        self.geri_alma = 0
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise ConnectionError("kapalı")
+
+    def rollback(self):
+        self.geri_alma += 1
+
+    def close(self):
+        self.open = False
+
+
+@pytest.fixture
+def acilan(monkeypatch):
+    baglantilar = []
+
+    def yeni(ayarlar):
+        baglantilar.append(SahteBaglanti())
+        return baglantilar[-1]
+
+    monkeypatch.setattr(db_conn, "_yeni_baglanti", yeni)
+    return baglantilar
+
+
+def test_birakilan_baglanti_yeniden_kullanilir(acilan):
+    havuz = db_conn.BaglantiHavuzu({}, boyut=2)
+    with havuz.al() as conn:
+        ilk = conn._conn
+    with havuz.al() as conn:
+        assert conn._conn is ilk
+    assert len(acilan) == 1
+    ist = havuz.istatistik()
+    assert (ist["kullanimda"], ist["bosta"], ist["acik"]) == (0, 1, 1)
+
+
+def test_close_havuza_geri_birakir(acilan):
+    havuz = db_conn.BaglantiHavuzu({}, boyut=1)
+    conn = havuz.al()
+    conn.close()
+    assert acilan[0].open
+    with pytest.raises(Exception):
+        conn.cursor()  # bırakılan sarmalayıcı artık kullanılamaz
+    assert havuz.istatistik()["bosta"] == 1
+
+
+def test_hatali_blok_rollback_yapip_geri_birakir(acilan):
+    havuz = db_conn.BaglantiHavuzu({}, boyut=1)
+    with pytest.raises(RuntimeError):
+        with havuz.al():
+            raise RuntimeError("sorgu hatası")
+    assert acilan[0].geri_alma == 1
+    assert havuz.istatistik()["bosta"] == 1
+
+
+def test_bos_baglanti_yoksa_zaman_asimi(acilan):
+    havuz = db_conn.BaglantiHavuzu({}, boyut=1, bekleme=0.05)
+    tutulan = havuz.al()
+    baslangic = time.monotonic()
+    with pytest.raises(TimeoutError):
+        havuz.al()
+    assert time.monotonic() - baslangic >= 0.05
+    assert havuz.istatistik()["zaman_asimi"] == 1
+    tutulan.close()
+    havuz.al().close()  # geri bırakılınca yeniden alınabilir
+
+
+def test_bekleyen_birakilan_baglantiyi_alir(acilan):
+    havuz = db_conn.BaglantiHavuzu({}, boyut=1, bekleme=2)
+    tutulan = havuz.al()
+    alinan = []
+    t = threading.Thread(target=lambda: alinan.append(havuz.al()))
+    t.start()
+    time.sleep(0.05)
+    assert not alinan
+    tutulan.close()
+    t.join(1)
+    assert alinan and alinan[0]._conn is acilan[0]
+    assert len(acilan) == 1
+
+
+def test_baglanti_acilamazsa_yer_bosalir(monkeypatch):
+    def hata(ayarlar):
+        raise ConnectionError("ulaşılamadı")
+
+    monkeypatch.setattr(db_conn, "_yeni_baglanti", hata)
+    havuz = db_conn.BaglantiHavuzu({}, boyut=1, bekleme=0.05)
+    for _ in range(2):  # ilk hata slotu tutsaydı ikincisi TimeoutError olurdu
+        with pytest.raises(ConnectionError):
+            havuz.al()
+    assert havuz.istatistik()["acik"] == 0
+
+
+def test_bozuk_bosta_baglanti_yenilenir(acilan):
+    havuz = db_conn.BaglantiHavuzu({}, boyut=1, ping_esik=0)
+    havuz.al().close()
+    acilan[0].open = False  # sunucu bağlantıyı kesti
+    with havuz.al() as conn:
+        assert conn._conn is acilan[1]
+    assert havuz.istatistik()["bozuk"] == 1
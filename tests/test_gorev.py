@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# sweax_gorev: kalıcı görev kuyruğu (kira, tekrar eleme, yeniden deneme)
+import time
+
+import pytest
+
+from app.sweax_gorev import GorevKuyrugu
+
+
+@pytest.fixture
+def kuyruk(tmp_path):
+    k = GorevKuyrugu(str(tmp_path / "gorev.db"), kira=0.05, max_deneme=2)
+    k.baslat = lambda: None  # thread'ler başlamasın; _al / _calistir elle çağrılır
+    return k
+
+
+def _durumlar(k):
+    return [tuple(r) for r in k._baglanti().execute("SELECT tur, anahtar, durum, deneme FROM gorev ORDER BY id")]
+
+
+def test_ayni_anahtarli_bekleyen_tekrar_eklenmez(kuyruk):
+    assert kuyruk.ekle("web", {"url": "a"}, anahtar="a")
+    assert not kuyruk.ekle("web", {"url": "a"}, anahtar="a")
+    assert kuyruk.ekle("web", {"url": "b"}, anahtar="b")
+    assert kuyruk.ekle("wiki", {"url": "a"}, anahtar="a")  # anahtar tür başına
+    assert kuyruk.ekle("web", {}) and kuyruk.ekle("web", {})  # anahtarsız görevler elenmez
+    assert kuyruk.istatistik()["bekliyor"] == 5
+
+
+def test_calisan_gorev_varken_yenisi_eklenebilir(kuyruk):
+    kuyruk.ekle("web", {"n": 1}, anahtar="a")
+    assert kuyruk._al() is not None
+    assert kuyruk.ekle("web", {"n": 2}, anahtar="a")
+    assert [d[2] for d in _durumlar(kuyruk)] == ["calisiyor", "bekliyor"]
+
+
+def test_kirasi_dolan_gorev_geri_doner(kuyruk):
+    kuyruk.ekle("web", {}, anahtar="a")
+    ilk = kuyruk._al()
+    assert kuyruk._al() is None  # kira sürerken başkası alamaz
+    time.sleep(0.06)
+    ikinci = kuyruk._al()
+    assert ikinci is not None and ikinci[0] == ilk[0]
+    assert _durumlar(kuyruk) == [("web", "a", "calisiyor", 2)]
+
+
+def test_kirasi_dolan_gorev_yenisiyle_birlesir(kuyruk):
+    kuyruk.ekle("web", {"n": 1}, anahtar="a")
+    eski = kuyruk._al()
+    kuyruk.ekle("web", {"n": 2}, anahtar="a")
+    time.sleep(0.06)
+    yeni = kuyruk._al()
+    assert yeni[0] != eski[0]
+    assert _durumlar(kuyruk) == [("web", "a", "calisiyor", 1)]
+
+
+def test_basarili_gorev_silinir(kuyruk):
+    calisan = []
+    kuyruk.kaydet("web", calisan.append)
+    kuyruk.ekle("web", {"url": "a"})
+    kuyruk._calistir(kuyruk._al())
+    assert calisan == [{"url": "a"}]
+    assert kuyruk.bekleyen() == 0
+
+
+def test_hata_veren_gorev_yeniden_denenir_sonra_hata(kuyruk):
+    def patla(veri):
+        raise RuntimeError("ulaşılamadı")
+
+    kuyruk.kaydet("web", patla)
+    kuyruk.ekle("web", {}, anahtar="a")
+    kuyruk._calistir(kuyruk._al())
+    assert _durumlar(kuyruk) == [("web", "a", "bekliyor", 1)]
+    assert kuyruk._al() is None  # 5 sn sonrasına ertelendi
+    kuyruk._baglanti().execute("UPDATE gorev SET zaman = 0")
+    kuyruk._calistir(kuyruk._al())
+    assert _durumlar(kuyruk) == [("web", "a", "hata", 2)]
+    assert kuyruk.istatistik()["hata"] == 1
+
+
+def test_bilinmeyen_tur_hata_sayilir(kuyruk):
+    kuyruk.ekle("yok", {})
+    kuyruk._calistir(kuyruk._al())
+    assert _durumlar(kuyruk)[0][2] == "bekliyor"
+
+
+def test_iki_kuyruk_ayni_gorevi_almaz(tmp_path):
+    yol = str(tmp_path / "gorev.db")
+    a, b = GorevKuyrugu(yol, kira=60), GorevKuyrugu(yol, kira=60)
+    a.baslat = b.baslat = lambda: None
+    a.ekle("web", {})
+    assert (a._al() is None) != (b._al() is None)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# sweax_hesap: AST tabanlı hesaplayıcının sonuçları ve sınırları
+import time
+
+import pytest
+
+from app.sweax_hesap import HESAP_MAX_DERINLIK, HesapHatasi, SozdizimiHatasi, hesapla
+
+
+@pytest.mark.parametrize("ifade, beklenen", [
+    ("1 + 2 * 3", 7),
+    ("(1 + 2) * 3", 9),
+    ("7 / 2", 3.5),
+    ("7 // 2", 3),
+    ("2 ** 3 ** 2", 512),   # sağdan birleşir
+    ("10 - 4 - 3", 3),      # soldan birleşir
+    ("-3 ** 2", -9),
+    ("- - 4", 4),
+    ("2 ** -1", 0.5),
+])
+def test_sonuclar(ifade, beklenen):
+    assert hesapla(ifade) == beklenen
+
+
+def test_uzun_duz_zincir_kabul_edilir():
+    assert hesapla("+".join(["1"] * 90)) == 90
+    assert hesapla("*".join(["1"] * 90)) == 1
+
+
+def test_derin_parantez_reddedilir():
+    sinirda = "(" * HESAP_MAX_DERINLIK + "1" + ")" * HESAP_MAX_DERINLIK
+    assert hesapla(sinirda) == 1
+    with pytest.raises(HesapHatasi, match="iç içe"):
+        hesapla("(" * (HESAP_MAX_DERINLIK + 1) + "1" + ")" * (HESAP_MAX_DERINLIK + 1))
+
+
+def test_ardisik_isaretler_reddedilir():
+    with pytest.raises(HesapHatasi, match="iç içe"):
+        hesapla("-" * (HESAP_MAX_DERINLIK + 1) + "1")
+
+
+@pytest.mark.parametrize("ifade", ["9**9**9", "2**100000", "10**5000", "(10**1000)*(10**1000)"])
+def test_buyuk_sonuclar_hesaplanmadan_reddedilir(ifade):
+    baslangic = time.monotonic()
+    with pytest.raises(HesapHatasi, match="büyük"):
+        hesapla(ifade)
+    assert time.monotonic() - baslangic < 0.5
+
+
+@pytest.mark.parametrize("ifade", ["1/0", "5//0", "0**-1"])
+def test_sifira_bolme(ifade):
+    with pytest.raises(HesapHatasi, match="Sıfıra"):
+        hesapla(ifade)
+
+
+@pytest.mark.parametrize("ifade", ["__import__('os')", "abs(-1)", "x + 1", "[1, 2]", "'a' * 3", "1 if 1 else 2",
+                                   "2 % 3", "True + 1"])
+def test_izin_verilmeyen_dugumler(ifade):
+    with pytest.raises(SozdizimiHatasi):
+        hesapla(ifade)
+
+
+def test_cok_uzun_ifade():
+    with pytest.raises(HesapHatasi, match="uzun"):
+        hesapla("1+" * 200 + "1")
+
+
+def test_sure_siniri():
+    with pytest.raises(HesapHatasi, match="zaman"):
+        hesapla("+".join(["2**4000"] * 20), sure_ms=0)
+
+
+def test_hata_tekrarinda_da_ayni_tur():
+    for _ in range(2):  # ikinci çağrı önbellekten gelir
+        with pytest.raises(SozdizimiHatasi):
+            hesapla("1 +")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# sweax_vektor: arka uçlar ve BilgiIndeksi (sahte gömme modeliyle)
+import numpy as np
+import pytest
+
+from app.sweax_depo import BilgiDeposu
+from app.sweax_vektor import BilgiIndeksi, NicemArka, NumpyArka
+
+
+def _kumeli_veri(n=3000, boyut=64, sorgu=50):
+    rng = np.random.default_rng(0)
+    merkezler = rng.normal(size=(n // 50, boyut))
+    vektorler = (merkezler[rng.integers(len(merkezler), size=n)]
+                 + 0.5 * rng.normal(size=(n, boyut))).astype(np.float32)
+    sorgular = vektorler[rng.integers(n, size=sorgu)] + 0.1 * rng.normal(size=(sorgu, boyut)).astype(np.float32)
+    return vektorler, sorgular
+
+
+@pytest.mark.parametrize("tur", ["int8", "float16"])
+def test_nicem_recall_numpy_ile_ayni(tmp_path, tur):
+    vektorler, sorgular = _kumeli_veri()
+    tam = NumpyArka(np, str(tmp_path / "tam.npy"))
+    nicem = NicemArka(np, str(tmp_path / f"{tur}.npy"), tur=tur, yeniden_skor=4)
+    for arka in (tam, nicem):
+        arka.ekle(vektorler)
+        arka.kaydet()
+    k = 10
+    isabet = sum(len(set(tam.ara(q[None, :], k)) & set(nicem.ara(q[None, :], k))) for q in sorgular)
+    assert isabet / (k * len(sorgular)) >= 0.95
+    assert nicem.bellek_bayt() < tam.matris.nbytes / 1.9
+
+
+def test_nicem_bekleyen_satirlar_aranir(tmp_path):
+    vektorler, _ = _kumeli_veri(n=200)
+    arka = NicemArka(np, str(tmp_path / "v.npy"))
+    arka.ekle(vektorler[:150])
+    arka.kaydet()
+    arka.ekle(vektorler[150:])  # henüz diske yazılmadı
+    assert (arka.sayi(), arka.diskte()) == (200, 150)
+    assert arka.ara(vektorler[170][None, :], 1) == [170]
+    assert arka.ara(vektorler[10][None, :], 1) == [10]
+
+
+@pytest.mark.parametrize("sinif", [NumpyArka, NicemArka])
+def test_yeniden_yukle_bekleyenleri_korur(tmp_path, sinif):
+    vektorler, _ = _kumeli_veri(n=100)
+    yol = str(tmp_path / "v.npy")
+    yazan, okuyan = sinif(np, yol), sinif(np, yol)
+    yazan.ekle(vektorler[:60])
+    yazan.kaydet()
+    okuyan.yukle()
+    okuyan.ekle(vektorler[60:80])     # okuyanın bekleyen satırları: 60..79
+    yazan.ekle(vektorler[60:70])
+    yazan.kaydet()                    # disk: 0..69
+    assert okuyan.yeniden_yukle()
+    assert (okuyan.sayi(), okuyan.diskte()) == (80, 70)
+    assert okuyan.ara(vektorler[75][None, :], 1) == [75]
+    # Diskteki dosya bizdekinden eskiyse (daha az satır) yok sayılır
+    geride = sinif(np, yol)
+    geride.ekle(vektorler[:30])
+    geride.kaydet()
+    assert not okuyan.yeniden_yukle()
+    assert (okuyan.sayi(), okuyan.diskte()) == (80, 70)
+
+
+class SahteModel:
+    """Metne göre belirlenimli vektör; kaç metin kodlandığını sayar."""
+
+    def __init__(self):
+        self.kodlanan = 0
+
+    def encode(self, metinler, batch_size=64):
+        self.kodlanan += len(metinler)
+        return np.stack([np.random.default_rng(abs(hash(m)) % 2**32).normal(size=16) for m in metinler])
+
+
+def _indeks(tmp_path, model):
+    return BilgiIndeksi(BilgiDeposu(str(tmp_path / "bilgi.db")), arka=NumpyArka(np, str(tmp_path / "v.npy")),
+                        model=model)
+
+
+def test_okuma_yolu_kodlama_yapmaz(tmp_path):
+    yazan_model, okuyan_model = SahteModel(), SahteModel()
+    yazan, okuyan = _indeks(tmp_path, yazan_model), _indeks(tmp_path, okuyan_model)
+    yazan.toplu_ekle([("konu", f"kayıt {i}") for i in range(5)])
+    okuyan.ara("kayıt 1")  # vektör yok: konu taramasına düşer, hiçbir şey kodlanmaz
+    assert okuyan_model.kodlanan == 0
+    assert okuyan.arka.sayi() == 0 and len(okuyan.idler) == 5
+    yazan.snapshot()
+    sonuc = okuyan.ara("kayıt 3", top_k=1)
+    assert okuyan_model.kodlanan == 1  # yalnızca sorgu
+    assert sonuc[0]["icerik"] == "kayıt 3"
+
+
+def test_baska_worker_snapshoti_bekleyenleri_silmez(tmp_path):
+    a_model, b_model = SahteModel(), SahteModel()
+    a, b = _indeks(tmp_path, a_model), _indeks(tmp_path, b_model)
+    a.snapshot_her = b.snapshot_her = 1000
+    a.toplu_ekle([("a", f"a {i}") for i in range(3)])
+    b.toplu_ekle([("b", f"b {i}") for i in range(2)])  # b, a'nın 3 kaydını da kodlar (yazma yolu)
+    a.toplu_ekle([("a", "a son")])                      # a: 0..5 bellekte, diskte hiçbiri
+    b.snapshot()                                        # disk: 0..4
+    once = a_model.kodlanan
+    a.ara("a son", top_k=1)
+    assert a_model.kodlanan == once + 1
+    assert (a.arka.sayi(), a.arka.diskte(), a._vektor_kirli()) == (6, 5, 1)
+
+
+def test_eksikleri_kodla_parca_parca(tmp_path):
+    depo = BilgiDeposu(str(tmp_path / "bilgi.db"))
+    depo.toplu_ekle([("k", f"metin {i}") for i in range(25)])
+    model = SahteModel()
+    indeks = _indeks(tmp_path, model)
+    assert indeks.arka.sayi() == 0  # açılışta kodlanmaz
+    assert indeks.eksikleri_kodla(parca=10) == 25
+    assert model.kodlanan == 25 and indeks.arka.sayi() == 25
+    assert indeks.eksikleri_kodla() == 0
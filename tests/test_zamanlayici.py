@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# sweax_zamanlayici: LLM kabul kontrolü ve öncelikli kuyruk
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.sweax_zamanlayici import (
+    ONCELIK_ARKA, ONCELIK_OZET, ONCELIK_SOHBET, LLMZamanlayici, MesgulHatasi,
+)
+
+
+def _bekle(kosul, sure=1.0):
+    son = time.monotonic() + sure
+    while not kosul():
+        assert time.monotonic() < son, "koşul gerçekleşmedi"
+        time.sleep(0.005)
+
+
+def _sirada_bekle(z, oncelik, kullanici, sira, butce=2.0):
+    """Thread'de slot bekler; alınca `sira`ya yazar ve hemen bırakır."""
+    def calis():
+        with z.izin(oncelik, kullanici, butce=butce):
+            sira.append(kullanici)
+    t = threading.Thread(target=calis)
+    t.start()
+    return t
+
+
+def test_bos_zamanlayici_hemen_verir():
+    z = LLMZamanlayici(eszamanli=2, kuyruk=4)
+    with z.izin(), z.izin():
+        assert z.istatistik()["aktif"] == 2
+    assert z.istatistik()["aktif"] == 0
+
+
+def test_soguk_sureçte_ozet_kuyruga_girer():
+    # Ölçüm yokken ort_sure (8 sn) özet bütçesinden (5 sn) büyük: yine de boş kuyrukta reddedilmemeli
+    z = LLMZamanlayici(eszamanli=1, kuyruk=4, ort_sure=8)
+    sira = []
+    with z.izin():
+        t = _sirada_bekle(z, ONCELIK_OZET, "ozet", sira, butce=5)
+        _bekle(lambda: z.istatistik()["bekleyen"])
+    t.join(1)
+    assert sira == ["ozet"]
+
+
+def test_kuyruk_doluysa_reddedilir():
+    z = LLMZamanlayici(eszamanli=1, kuyruk=0)
+    with z.izin():
+        with pytest.raises(MesgulHatasi) as hata:
+            with z.izin():
+                pass
+    assert hata.value.bekleme >= z.ort_sure
+
+
+def test_ondeki_kuyruk_butceyi_asarsa_reddedilir():
+    z = LLMZamanlayici(eszamanli=1, kuyruk=8, ort_sure=10)
+    sira = []
+    with z.izin():
+        t = _sirada_bekle(z, ONCELIK_SOHBET, "ilk", sira, butce=30)
+        _bekle(lambda: z.istatistik()["bekleyen"])
+        with pytest.raises(MesgulHatasi):
+            with z.izin(ONCELIK_OZET, butce=5):  # önde 1 × 10 sn
+                pass
+    t.join(1)
+    assert sira == ["ilk"]
+
+
+def test_butce_dolarsa_zaman_asimi():
+    z = LLMZamanlayici(eszamanli=1, kuyruk=4)
+    with z.izin():
+        baslangic = time.monotonic()
+        with pytest.raises(MesgulHatasi):
+            with z.izin(butce=0.05):
+                pass
+        assert time.monotonic() - baslangic >= 0.05
+    assert z.istatistik()["bekleyen"] == {}
+
+
+def test_oncelik_sirasi():
+    z = LLMZamanlayici(eszamanli=1, kuyruk=8, ort_sure=0.01)
+    sira, threadler = [], []
+    with z.izin():
+        for oncelik, ad in [(ONCELIK_ARKA, "arka"), (ONCELIK_OZET, "ozet"), (ONCELIK_SOHBET, "sohbet")]:
+            threadler.append(_sirada_bekle(z, oncelik, ad, sira))
+            _bekle(lambda: sum(z.istatistik()["bekleyen"].values()) == len(threadler))
+    for t in threadler:
+        t.join(1)
+    assert sira == ["sohbet", "ozet", "arka"]
+
+
+def test_adil_pay_slot_tutmayan_kullanici_once():
+    z = LLMZamanlayici(eszamanli=2, kuyruk=8, ort_sure=0.01)
+    sira, threadler = [], []
+    with z.izin(kullanici="a"):
+        diger = z.izin(kullanici="x")
+        diger.__enter__()
+        for ad in ("a", "b"):  # "a" önce geldi ama zaten bir slot tutuyor
+            threadler.append(_sirada_bekle(z, ONCELIK_SOHBET, ad, sira))
+            _bekle(lambda: sum(z.istatistik()["bekleyen"].values()) == len(threadler))
+        diger.__exit__(None, None, None)
+        _bekle(lambda: sira)
+        assert sira[0] == "b"
+    for t in threadler:
+        t.join(1)
+    assert sira == ["b", "a"]
+
+
+def test_async_izin():
+    z = LLMZamanlayici(eszamanli=1, kuyruk=4)
+
+    async def senaryo():
+        sira = []
+
+        async def is_(ad):
+            async with z.izin_async(kullanici=ad, butce=1):
+                sira.append(ad)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(is_("a"), is_("b"))
+        return sira
+
+    assert asyncio.run(senaryo()) == ["a", "b"]
+    assert z.istatistik()["aktif"] == 0
+
+
+def test_async_iptal_slotu_birakir():
+    z = LLMZamanlayici(eszamanli=1, kuyruk=4)
+
+    async def senaryo():
+        with z.izin():
+            gorev = asyncio.create_task(z.izin_async(butce=5).__aenter__())
+            await asyncio.sleep(0.01)
+            gorev.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await gorev
+
+    asyncio.run(senaryo())
+    assert z.istatistik()["aktif"] == 0 and z.istatistik()["bekleyen"] == {}
@@ -1,2 +1,7 @@
+from app.sweax_hesap import hesapla, HesapHatasi
+
 a = input("sayı gir:")
-print(eval(a))
+try:
+    print(hesapla(a))
+except HesapHatasi as e:
+    print(f"⚠️ {e}")